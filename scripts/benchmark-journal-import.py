@@ -0,0 +1,643 @@
+#!/usr/bin/env python3
+"""
+Benchmarks for the Journal → Notion import scripts
+
+Runs offline: no Notion token or network access is needed.
+
+Usage:
+    python3 scripts/benchmark-journal-import.py convert [--size-mb 4] [--repeat 5] [--lists 0.4]
+    python3 scripts/benchmark-journal-import.py frontmatter [--files 2000] [--repeat 5]
+    python3 scripts/benchmark-journal-import.py dates [--values 100000] [--days 1500] [--repeat 5]
+    python3 scripts/benchmark-journal-import.py cache [--files 500] [--mean-kb 4] [--pack]
+    python3 scripts/benchmark-journal-import.py import [--files 200] [--latency-ms 50] [-- --workers 4]
+    python3 scripts/benchmark-journal-import.py serve [--port 8787]
+
+Commands:
+    convert   Markdown → Notion block conversion throughput and peak memory
+              of the original regex-per-paragraph converter (legacy), of
+              journal_markdown.content_to_notion_blocks (list), of
+              journal_markdown.iter_content_blocks consumed lazily (lazy),
+              of journal_entries.iter_body_blocks reading the entry from
+              disk (stream), and of content_to_notion_blocks with
+              paragraphs packed (pack), with the requests each takes
+    frontmatter
+              Entries per second through frontmatter.loads (full PyYAML)
+              and journal_entries.read_frontmatter (flat-header fast path)
+    dates     Frontmatter dates per second through the original
+              strptime-per-format parse_date (legacy), the regex parser of
+              journal_entries.parse_date on its own (regex), and
+              journal_entries.parse_date with its cache (cached)
+    cache     Entries per second through journal_entries.read_entries
+              without the conversion cache (convert), filling an empty
+              cache (cold) and served from a full one (warm), and the
+              cache's size on disk
+    import    End-to-end run of import-journal-to-notion.py over a synthetic
+              journal against a local fake Notion server: files/s, API
+              calls per file, p50/p99 request latency and peak RSS.
+              Arguments after "--" are passed to the importer.
+    serve     Run the fake Notion server in the foreground, for dry runs
+              with NOTION_BASE_URL pointing at it
+"""
+
+import gc
+import os
+import re
+import math
+import sys
+import time
+import random
+import argparse
+import tempfile
+import subprocess
+import tracemalloc
+from pathlib import Path
+from datetime import date, datetime, timedelta
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+import frontmatter
+
+from fake_notion_server import FakeNotionServer
+from journal_cache import ConversionCache
+from journal_entries import iter_body_blocks, parse_date, read_entries, read_frontmatter, \
+    scan_markdown_file
+from journal_importer import block_batches
+from journal_markdown import content_to_notion_blocks, iter_content_blocks
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Baselines
+# ─────────────────────────────────────────────────────────────────────────────
+
+def legacy_content_to_notion_blocks(content: str, max_block_size: int = 2000) -> List[Dict]:
+    """The original converter, kept verbatim as the baseline."""
+    blocks = []
+
+    if not content or not content.strip():
+        return blocks
+
+    paragraphs = content.split('\n\n')
+
+    for para in paragraphs:
+        para = para.strip()
+        if not para:
+            continue
+
+        if para.startswith('#'):
+            heading_match = re.match(r'^(#{1,3})\s+(.+)$', para)
+            if heading_match:
+                level = len(heading_match.group(1))
+                text = heading_match.group(2)
+
+                heading_type = f"heading_{min(level, 3)}"
+                blocks.append({
+                    "object": "block",
+                    "type": heading_type,
+                    heading_type: {
+                        "rich_text": [{"type": "text", "text": {"content": text[:2000]}}]
+                    }
+                })
+                continue
+
+        if para.startswith('- ') or para.startswith('* '):
+            lines = para.split('\n')
+            for line in lines:
+                line = line.strip()
+                if line.startswith('- ') or line.startswith('* '):
+                    text = line[2:].strip()
+                    blocks.append({
+                        "object": "block",
+                        "type": "bulleted_list_item",
+                        "bulleted_list_item": {
+                            "rich_text": [{"type": "text", "text": {"content": text[:2000]}}]
+                        }
+                    })
+            continue
+
+        if re.match(r'^\d+\.\s', para):
+            lines = para.split('\n')
+            for line in lines:
+                line = line.strip()
+                match = re.match(r'^\d+\.\s+(.+)$', line)
+                if match:
+                    text = match.group(1)
+                    blocks.append({
+                        "object": "block",
+                        "type": "numbered_list_item",
+                        "numbered_list_item": {
+                            "rich_text": [{"type": "text", "text": {"content": text[:2000]}}]
+                        }
+                    })
+            continue
+
+        if len(para) > max_block_size:
+            chunks = [para[i:i+max_block_size] for i in range(0, len(para), max_block_size)]
+            for chunk in chunks:
+                blocks.append({
+                    "object": "block",
+                    "type": "paragraph",
+                    "paragraph": {
+                        "rich_text": [{"type": "text", "text": {"content": chunk}}]
+                    }
+                })
+        else:
+            blocks.append({
+                "object": "block",
+                "type": "paragraph",
+                "paragraph": {
+                    "rich_text": [{"type": "text", "text": {"content": para}}]
+                }
+            })
+
+    return blocks
+
+
+def legacy_parse_date(date_value: Any) -> Optional[str]:
+    """The original date parser, kept verbatim as the baseline."""
+    if not date_value:
+        return None
+
+    # If already a datetime object
+    if isinstance(date_value, datetime):
+        return date_value.strftime('%Y-%m-%d')
+
+    # If string, try to parse it
+    if isinstance(date_value, str):
+        try:
+            # Try parsing common formats
+            for fmt in ['%Y-%m-%d', '%Y/%m/%d', '%d-%m-%Y', '%d/%m/%Y']:
+                try:
+                    dt = datetime.strptime(date_value, fmt)
+                    return dt.strftime('%Y-%m-%d')
+                except ValueError:
+                    continue
+        except Exception:
+            pass
+
+    return None
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Synthetic Content
+# ─────────────────────────────────────────────────────────────────────────────
+
+WORDS = ("soil moisture sensor reading greenhouse irrigation yield trial plot "
+         "nitrogen harvest seedling drone survey temperature humidity canopy "
+         "field notes weather drip line calibration batch").split()
+
+
+def synthetic_entry(rng: random.Random, body_lines: int = 20) -> str:
+    """A journal entry with the documented title/tags/date frontmatter."""
+    title = " ".join(rng.choice(WORDS) for _ in range(rng.randint(2, 6))).title()
+    tags = ", ".join(rng.sample(WORDS, rng.randint(1, 4)))
+    date = f"2024-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}"
+    body = "\n".join(" ".join(rng.choice(WORDS) for _ in range(12))
+                     for _ in range(body_lines))
+    return f"---\ntitle: {title}\ntags: {tags}\ndate: {date}\n---\n\n{body}\n"
+
+
+def synthetic_markdown(size_bytes: int, seed: int = 42,
+                       headings: float = 0.1, lists: float = 0.4) -> str:
+    """
+    Generate a journal-like Markdown document of roughly `size_bytes`.
+
+    The default mix is mostly short paragraphs and lists with some headings,
+    which matches the field-trial logs the importer spends most of its time
+    on. `headings` and `lists` are the shares of each kind of part.
+    """
+    rng = random.Random(seed)
+
+    def sentence(min_words: int = 6, max_words: int = 30) -> str:
+        return " ".join(rng.choice(WORDS) for _ in range(rng.randint(min_words, max_words)))
+
+    parts = []
+    size = 0
+    while size < size_bytes:
+        kind = rng.random()
+        if kind < headings:
+            part = f"{'#' * rng.randint(1, 3)} {sentence(2, 6).title()}"
+        elif kind < headings + lists * 0.625:
+            part = "\n".join(f"- {sentence(3, 12)}" for _ in range(rng.randint(2, 8)))
+        elif kind < headings + lists:
+            part = "\n".join(f"{n}. {sentence(3, 12)}" for n in range(1, rng.randint(3, 8)))
+        else:
+            part = "\n".join(sentence() for _ in range(rng.randint(1, 6)))
+        parts.append(part)
+        size += len(part) + 2
+    return "\n\n".join(parts)
+
+
+def write_synthetic_journal(root: Path, files: int, mean_kb: float, spread: float = 1.0,
+                            headings: float = 0.1, lists: float = 0.4,
+                            seed: int = 42) -> List[int]:
+    """
+    Write a Journal/YYYY/MM tree of `files` entries under `root`.
+
+    Body sizes follow a log-normal distribution with the given mean, so
+    there are many short entries and a long tail of large ones, like a real
+    journal. `spread` is the sigma of the distribution (0 for equal sizes).
+
+    Returns:
+        The size in bytes of each file written
+    """
+    rng = random.Random(seed)
+    mu = math.log(max(mean_kb, 0.01) * 1024) - spread ** 2 / 2
+    sizes = []
+    for i in range(files):
+        month, day = rng.randint(1, 12), rng.randint(1, 28)
+        folder = root / "2024" / f"{month:02d}"
+        folder.mkdir(parents=True, exist_ok=True)
+        body = synthetic_markdown(int(rng.lognormvariate(mu, spread)), rng.randrange(2 ** 32),
+                                  headings=headings, lists=lists)
+        tags = ", ".join(rng.sample(WORDS, rng.randint(1, 4)))
+        text = (f"---\ntitle: Entry {i + 1} - {' '.join(rng.sample(WORDS, 3)).title()}\n"
+                f"tags: {tags}\ndate: 2024-{month:02d}-{day:02d}\n---\n\n{body}\n")
+        path = folder / f"2024-{month:02d}-{day:02d}-{i + 1:05d}.md"
+        path.write_text(text, encoding="utf-8")
+        sizes.append(len(text.encode("utf-8")))
+    return sizes
+
+
+# Shares of each way of writing the date in synthetic_dates(); DD/MM/YYYY
+# is the slowest for the legacy parser, which tries it last
+DATE_FORMATS = (("%d/%m/%Y", 0.5), ("%Y-%m-%d", 0.3), ("%d-%m-%Y", 0.1), ("%Y/%m/%d", 0.1))
+
+
+def synthetic_dates(count: int, days: int, seed: int = 42) -> List[str]:
+    """
+    `count` frontmatter date strings drawn from `days` distinct days, in the
+    mix of DATE_FORMATS: an archive where many entries share a day.
+    """
+    rng = random.Random(seed)
+    start = date(2015, 1, 1)
+    formats = [fmt for fmt, _ in DATE_FORMATS]
+    weights = [share for _, share in DATE_FORMATS]
+    return [(start + timedelta(days=rng.randrange(days))).strftime(rng.choices(formats, weights)[0])
+            for _ in range(count)]
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Measurement
+# ─────────────────────────────────────────────────────────────────────────────
+
+def best_times(fns: Dict[str, Callable[[], object]], repeat: int) -> Dict[str, float]:
+    """
+    Best wall time of `repeat` runs of each function, in seconds.
+
+    Runs are interleaved so that noise from the machine hits every function
+    alike, and the GC is paused while timing (like timeit).
+    """
+    best = {name: float("inf") for name in fns}
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(repeat):
+            for name, fn in fns.items():
+                start = time.perf_counter()
+                fn()
+                best[name] = min(best[name], time.perf_counter() - start)
+                gc.collect()
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+    return best
+
+
+def peak_memory(fn: Callable[[], object]) -> int:
+    """Peak bytes allocated while running fn (measured on a separate run)."""
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def drain(blocks: Iterable[Dict]) -> int:
+    """Consume blocks one at a time, as an uploader would, and count them."""
+    count = 0
+    for _ in blocks:
+        count += 1
+    return count
+
+
+def bench_convert(args: argparse.Namespace) -> int:
+    content = synthetic_markdown(int(args.size_mb * 1024 * 1024),
+                                 headings=args.headings, lists=args.lists)
+    size_mb = len(content.encode("utf-8")) / (1024 * 1024)
+
+    with tempfile.TemporaryDirectory(prefix="journal-bench-") as temp:
+        entry_path = Path(temp) / "entry.md"
+        entry_path.write_text("---\ntitle: Benchmark\n---\n\n" + content, encoding="utf-8")
+        body_offset = scan_markdown_file(entry_path)["body_offset"]
+
+        converters = {
+            "legacy": lambda: legacy_content_to_notion_blocks(content),
+            "list": lambda: content_to_notion_blocks(content),
+            "lazy": lambda: drain(iter_content_blocks(content)),
+            "stream": lambda: drain(iter_body_blocks(entry_path, body_offset)),
+            "pack": lambda: content_to_notion_blocks(content, pack=True),
+        }
+        counts = {name: fn() if name in ("lazy", "stream") else len(fn())
+                  for name, fn in converters.items()}
+        requests = {name: drain(block_batches(content_to_notion_blocks(content, pack=packed)))
+                    for name, packed in (("list", False), ("pack", True))}
+        times = best_times(converters, args.repeat)
+        peaks = {name: peak_memory(fn) for name, fn in converters.items()}
+
+    print(f"📄 Synthetic entry: {size_mb:.2f} MB, best of {args.repeat} run(s)\n")
+    print(f"  {'converter':<10} {'blocks':>8} {'time':>9} {'MB/s':>8} {'peak MB':>9}")
+    for name in converters:
+        peak = peaks[name] / (1024 * 1024)
+        elapsed = times[name]
+        print(f"  {name:<10} {counts[name]:>8} {elapsed * 1000:>7.1f}ms "
+              f"{size_mb / elapsed:>8.1f} {peak:>9.1f}")
+
+    print(f"\n⚡ Speedup: {times['legacy'] / times['list']:.2f}x "
+          f"(list), {times['legacy'] / times['lazy']:.2f}x (lazy), "
+          f"{times['legacy'] / times['stream']:.2f}x (stream)")
+    print(f"   Peaks exclude the {size_mb:.1f} MB text the others keep in memory; "
+          f"stream reads it from disk")
+    print(f"📦 Packed: {counts['pack']} blocks in {requests['pack']} request(s), "
+          f"instead of {counts['list']} blocks in {requests['list']} request(s)")
+    return 0
+
+
+def bench_frontmatter(args: argparse.Namespace) -> int:
+    rng = random.Random(42)
+    entries = [synthetic_entry(rng) for _ in range(args.files)]
+
+    readers = {
+        "pyyaml": lambda: [frontmatter.loads(text) for text in entries],
+        "fast": lambda: [read_frontmatter(text) for text in entries],
+    }
+    times = best_times(readers, args.repeat)
+
+    print(f"📄 {args.files} synthetic entries, best of {args.repeat} run(s)\n")
+    print(f"  {'reader':<10} {'time':>9} {'entries/s':>11}")
+    for name in readers:
+        print(f"  {name:<10} {times[name] * 1000:>7.1f}ms {args.files / times[name]:>11.0f}")
+
+    print(f"\n⚡ Speedup: {times['pyyaml'] / times['fast']:.2f}x")
+    return 0
+
+
+def bench_dates(args: argparse.Namespace) -> int:
+    values = synthetic_dates(args.values, args.days)
+    mismatches = sum(legacy_parse_date(value) != parse_date(value) for value in values)
+    parse_text = sys.modules[parse_date.__module__]._parse_date_text.__wrapped__
+
+    parsers = {
+        "legacy": lambda: [legacy_parse_date(value) for value in values],
+        "regex": lambda: [parse_text(value) for value in values],
+        "cached": lambda: [parse_date(value) for value in values],
+    }
+    times = best_times(parsers, args.repeat)
+
+    print(f"📅 {args.values} synthetic dates over {args.days} days, "
+          f"best of {args.repeat} run(s)\n")
+    print(f"  {'parser':<10} {'time':>9} {'dates/s':>11}")
+    for name in parsers:
+        print(f"  {name:<10} {times[name] * 1000:>7.1f}ms {args.values / times[name]:>11.0f}")
+
+    print(f"\n⚡ Speedup: {times['legacy'] / times['regex']:.2f}x (regex), "
+          f"{times['legacy'] / times['cached']:.2f}x (cached)")
+    if mismatches:
+        print(f"❌ {mismatches} date(s) parsed differently from the legacy parser")
+        return 1
+    return 0
+
+
+def bench_cache(args: argparse.Namespace) -> int:
+    with tempfile.TemporaryDirectory(prefix="journal-cache-bench-") as tmp:
+        sizes = write_synthetic_journal(Path(tmp) / "Journal", args.files, args.mean_kb)
+        paths = sorted((Path(tmp) / "Journal").rglob("*.md"))
+        runs = iter(range(args.repeat + 1))
+        warm = ConversionCache(os.path.join(tmp, "warm"))
+        expected = read_entries(paths, pack=args.pack)
+        filled = read_entries(paths, pack=args.pack, cache=warm)
+        hits = read_entries(paths, pack=args.pack, cache=warm)
+        mismatches = sum(a['blocks'] != b['blocks'] or a['title'] != b['title']
+                         for a, b in zip(expected, hits))
+        mismatches += sum(not entry.get('cached') for entry in hits)
+
+        readers = {
+            "convert": lambda: read_entries(paths, pack=args.pack),
+            "cold": lambda: read_entries(paths, pack=args.pack, cache=ConversionCache(
+                os.path.join(tmp, f"cold-{next(runs)}"))),
+            "warm": lambda: read_entries(paths, pack=args.pack, cache=warm),
+        }
+        times = best_times(readers, args.repeat)
+        entries, cache_bytes = warm.usage()
+
+    print(f"💾 {args.files} synthetic entries ({sum(sizes) / 1024 / 1024:.1f} MB"
+          f"{', packed' if args.pack else ''}), best of {args.repeat} run(s)\n")
+    print(f"  {'reader':<10} {'time':>9} {'entries/s':>11}")
+    for name in readers:
+        print(f"  {name:<10} {times[name] * 1000:>7.1f}ms {args.files / times[name]:>11.0f}")
+
+    print(f"\n⚡ Speedup: {times['convert'] / times['warm']:.2f}x (warm), "
+          f"{times['convert'] / times['cold']:.2f}x (cold)")
+    print(f"📦 Cache: {entries} entries, {cache_bytes / 1024 / 1024:.1f} MB")
+    if mismatches or len(filled) != entries:
+        print(f"❌ {mismatches} entries read differently from the cache")
+        return 1
+    return 0
+
+
+IMPORTER = Path(__file__).with_name("import-journal-to-notion.py")
+
+
+def peak_child_rss() -> Optional[int]:
+    """Peak RSS in bytes of the largest finished child process, if known."""
+    try:
+        import resource
+    except ImportError:
+        return None  # Windows
+    peak = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def _fake_server(args: argparse.Namespace, address=("127.0.0.1", 0)) -> FakeNotionServer:
+    return FakeNotionServer(address, latency=args.latency_ms / 1000,
+                            jitter=args.jitter_ms / 1000, rate_limit=args.rate_limit,
+                            throttle=args.throttle, seed=args.seed)
+
+
+def _describe_server(args: argparse.Namespace) -> str:
+    parts = [f"{args.latency_ms:g} ms latency"]
+    if args.jitter_ms:
+        parts[0] += f" (+0-{args.jitter_ms:g} ms)"
+    if args.rate_limit:
+        parts.append(f"rate limit {args.rate_limit:g}/s")
+    if args.throttle:
+        parts.append(f"{args.throttle:.0%} of requests answered 429")
+    return ", ".join(parts)
+
+
+def bench_import(args: argparse.Namespace) -> int:
+    importer_args = args.importer_args
+    if importer_args[:1] == ["--"]:
+        importer_args = importer_args[1:]
+
+    with tempfile.TemporaryDirectory(prefix="journal-bench-") as temp_dir:
+        root = Path(temp_dir, "Journal")
+        sizes = write_synthetic_journal(root, args.files, args.mean_kb, args.size_spread,
+                                        headings=args.headings, lists=args.lists,
+                                        seed=args.seed)
+        total_mb = sum(sizes) / (1024 * 1024)
+        print(f"📁 Synthetic journal: {args.files} files, {total_mb:.2f} MB "
+              f"(mean {sum(sizes) / max(len(sizes), 1) / 1024:.1f} KB, "
+              f"largest {max(sizes, default=0) / 1024:.0f} KB)")
+        print(f"🌐 Fake Notion: {_describe_server(args)}")
+        print(f"🚀 import-journal-to-notion.py {' '.join(importer_args)}".rstrip())
+        print(f"   at NOTION_REQUESTS_PER_SECOND={args.requests_per_second:g}\n")
+
+        with _fake_server(args) as server:
+            env = dict(os.environ,
+                       NOTION_TOKEN="secret_benchmark",
+                       NOTION_JOURNAL_DB_ID="benchmark-db",
+                       NOTION_BASE_URL=server.url,
+                       JOURNAL_ROOT_PATH=str(root),
+                       NOTION_REQUESTS_PER_SECOND=str(args.requests_per_second))
+            for name in ("JOURNAL_MANIFEST_PATH", "JOURNAL_DEAD_LETTER_PATH",
+                         "JOURNAL_CHECKPOINT_PATH"):
+                env.pop(name, None)  # keep the run's state inside the temp journal
+            started = time.perf_counter()
+            result = subprocess.run([sys.executable, str(IMPORTER), *importer_args],
+                                    env=env, cwd=temp_dir, capture_output=True,
+                                    text=True, encoding="utf-8")
+            elapsed = time.perf_counter() - started
+            stats = server.stats
+
+    output = result.stdout + result.stderr
+    if result.returncode != 0:
+        print("\n".join(output.splitlines()[-20:]))
+        print(f"\n❌ The importer exited with status {result.returncode}")
+        return 1
+    summary = dict(re.findall(r"(Imported|Failed): (\d+)", output))
+
+    requests = stats.total
+    peak = peak_child_rss()
+    print(f"  {'files/s':<16} {args.files / elapsed:>9.1f}")
+    print(f"  {'API calls/file':<16} {requests / max(args.files, 1):>9.2f}   "
+          f"({requests} requests, {stats.throttled} answered 429)")
+    print(f"  {'latency p50':<16} {stats.percentile(50) * 1000:>7.1f}ms")
+    print(f"  {'latency p99':<16} {stats.percentile(99) * 1000:>7.1f}ms")
+    if peak is not None:
+        print(f"  {'peak RSS':<16} {peak / (1024 * 1024):>7.1f}MB")
+    print(f"  {'wall time':<16} {elapsed:>8.2f}s")
+    print()
+    for name, count in sorted(stats.calls.items(), key=lambda item: -item[1]):
+        print(f"  {name:<24} {count:>7}")
+    print(f"\n✅ Imported: {summary.get('Imported', '?')}   "
+          f"❌ Failed: {summary.get('Failed', '?')}")
+    return 0
+
+
+def serve(args: argparse.Namespace) -> int:
+    server = _fake_server(args, (args.host, args.port))
+    print(f"🌐 Fake Notion API at {server.url} ({_describe_server(args)})")
+    print(f"   NOTION_BASE_URL={server.url} NOTION_TOKEN=secret_fake "
+          f"NOTION_JOURNAL_DB_ID=fake python3 scripts/import-journal-to-notion.py")
+    print("   Press Ctrl+C to stop.\n")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    stats = server.stats
+    print(f"\n📊 {stats.total} request(s), {stats.throttled} answered 429, "
+          f"p50 {stats.percentile(50) * 1000:.1f}ms, p99 {stats.percentile(99) * 1000:.1f}ms")
+    return 0
+
+
+def _add_server_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--latency-ms", type=float, default=50.0,
+                        help="delay added to every response (default: 50)")
+    parser.add_argument("--jitter-ms", type=float, default=0.0,
+                        help="extra random delay of up to this much (default: 0)")
+    parser.add_argument("--rate-limit", type=float, default=0.0, metavar="RPS",
+                        help="answer 429 above this many requests/second, "
+                             "like Notion's limit of 3 (default: no limit)")
+    parser.add_argument("--throttle", type=float, default=0.0, metavar="FRACTION",
+                        help="answer this fraction of requests with 429 at random "
+                             "(default: 0)")
+    parser.add_argument("--seed", type=int, default=42,
+                        help="random seed (default: 42)")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the journal import scripts offline.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    convert = commands.add_parser("convert", help="Markdown → Notion block conversion")
+    convert.add_argument("--size-mb", type=float, default=4.0,
+                         help="size of the synthetic entry (default: 4)")
+    convert.add_argument("--repeat", type=int, default=5,
+                         help="timed runs per converter (default: 5)")
+    convert.add_argument("--headings", type=float, default=0.1, metavar="FRACTION",
+                         help="share of headings among body parts (default: 0.1)")
+    convert.add_argument("--lists", type=float, default=0.4, metavar="FRACTION",
+                         help="share of bulleted and numbered lists (default: 0.4)")
+    convert.set_defaults(run=bench_convert)
+
+    header = commands.add_parser("frontmatter", help="frontmatter parsing")
+    header.add_argument("--files", type=int, default=2000,
+                        help="number of synthetic entries (default: 2000)")
+    header.add_argument("--repeat", type=int, default=5,
+                        help="timed runs per reader (default: 5)")
+    header.set_defaults(run=bench_frontmatter)
+
+    dates = commands.add_parser("dates", help="frontmatter date parsing")
+    dates.add_argument("--values", type=int, default=100000,
+                       help="number of date strings (default: 100000)")
+    dates.add_argument("--days", type=int, default=1500,
+                       help="distinct days among them (default: 1500)")
+    dates.add_argument("--repeat", type=int, default=5,
+                       help="timed runs per parser (default: 5)")
+    dates.set_defaults(run=bench_dates)
+
+    cached = commands.add_parser("cache", help="conversion cache")
+    cached.add_argument("--files", type=int, default=500,
+                        help="number of journal entries (default: 500)")
+    cached.add_argument("--mean-kb", type=float, default=4.0,
+                        help="mean entry size in KB (default: 4)")
+    cached.add_argument("--pack", action="store_true",
+                        help="convert with paragraphs packed, as --pack does")
+    cached.add_argument("--repeat", type=int, default=5,
+                        help="timed runs per reader (default: 5)")
+    cached.set_defaults(run=bench_cache)
+
+    end_to_end = commands.add_parser("import", help="end-to-end import against a fake Notion")
+    end_to_end.add_argument("--files", type=int, default=200,
+                            help="number of journal entries (default: 200)")
+    end_to_end.add_argument("--mean-kb", type=float, default=4.0,
+                            help="mean entry size in KB (default: 4)")
+    end_to_end.add_argument("--size-spread", type=float, default=1.0, metavar="SIGMA",
+                            help="log-normal spread of entry sizes, 0 for equal "
+                                 "sizes (default: 1)")
+    end_to_end.add_argument("--headings", type=float, default=0.1, metavar="FRACTION",
+                            help="share of headings among body parts (default: 0.1)")
+    end_to_end.add_argument("--lists", type=float, default=0.4, metavar="FRACTION",
+                            help="share of bulleted and numbered lists (default: 0.4)")
+    end_to_end.add_argument("--requests-per-second", type=float, default=50.0, metavar="RPS",
+                            help="NOTION_REQUESTS_PER_SECOND for the importer (default: 50)")
+    _add_server_arguments(end_to_end)
+    end_to_end.add_argument("importer_args", nargs=argparse.REMAINDER,
+                            help="arguments for import-journal-to-notion.py, after --")
+    end_to_end.set_defaults(run=bench_import)
+
+    server = commands.add_parser("serve", help="run the fake Notion server")
+    server.add_argument("--host", default="127.0.0.1",
+                        help="address to listen on (default: 127.0.0.1)")
+    server.add_argument("--port", type=int, default=8787,
+                        help="port to listen on (default: 8787)")
+    _add_server_arguments(server)
+    server.set_defaults(run=serve)
+
+    args = parser.parse_args(argv)
+    return args.run(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,498 @@
+#!/usr/bin/env python3
+"""
+Export a Notion Journal Database to Markdown Files
+
+The reverse of import-journal-to-notion.py: every page of the journal
+database is written to a Markdown file with the same YAML frontmatter the
+importer reads (title, tags, date), under <output>/YYYY/MM/.
+
+Runs are incremental. The export folder keeps a small state file with a
+high-water mark, and the next run only asks Notion for pages edited since
+then, so a nightly mirror transfers just the pages that changed.
+
+Usage:
+    python scripts/export-journal-from-notion.py
+    python scripts/export-journal-from-notion.py --workers 8
+    python scripts/export-journal-from-notion.py --output ./Journal-mirror
+    python scripts/export-journal-from-notion.py --full
+
+Environment Variables Required:
+    - NOTION_TOKEN: Your Notion integration token
+    - NOTION_JOURNAL_DB_ID: The ID of your Notion "Journal.db" database
+
+Optional Environment Variables:
+    - JOURNAL_EXPORT_PATH: Folder to export to (default: ./Journal-export)
+    - JOURNAL_EXPORT_STATE_PATH: High-water mark and exported files
+      (default: <JOURNAL_EXPORT_PATH>/.notion-export.json)
+    - NOTION_REQUESTS_PER_SECOND: Shared API rate limit (default: 3)
+    - NOTION_MAX_RETRIES: Retries per request for rate limits and outages
+      (default: 5)
+    - NOTION_BASE_URL: API server (default: https://api.notion.com)
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import argparse
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional
+from dotenv import load_dotenv
+
+from journal_entries import format_frontmatter
+from journal_markdown import notion_blocks_to_markdown, plain_text
+from notion_api import LazyClient, RetryBudget, RunningTotal, TokenBucket, call_with_retries
+
+# Load environment variables
+load_dotenv()
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Configuration
+# ─────────────────────────────────────────────────────────────────────────────
+
+NOTION_TOKEN = os.getenv("NOTION_TOKEN")
+NOTION_JOURNAL_DB_ID = os.getenv("NOTION_JOURNAL_DB_ID")
+JOURNAL_EXPORT_PATH = os.getenv("JOURNAL_EXPORT_PATH", "./Journal-export")
+JOURNAL_EXPORT_STATE_PATH = os.getenv(
+    "JOURNAL_EXPORT_STATE_PATH", os.path.join(JOURNAL_EXPORT_PATH, ".notion-export.json")
+)
+NOTION_REQUESTS_PER_SECOND = float(os.getenv("NOTION_REQUESTS_PER_SECOND", "3"))
+NOTION_MAX_RETRIES = int(os.getenv("NOTION_MAX_RETRIES", "5"))
+NOTION_BASE_URL = os.getenv("NOTION_BASE_URL", "https://api.notion.com")
+
+# Notion rounds last_edited_time down to the minute, and our clock may not
+# match Notion's, so each run re-asks for a little before the last one started
+MARK_OVERLAP = timedelta(minutes=2)
+
+# Save the state file after this many exported pages
+SAVE_EVERY = 100
+
+# Created on the first request (see notion_api.LazyClient)
+notion = LazyClient(auth=NOTION_TOKEN, base_url=NOTION_BASE_URL)
+
+rate_limiter = TokenBucket(NOTION_REQUESTS_PER_SECOND)
+retry_budget = RetryBudget()
+retries_made = RunningTotal()
+
+
+def missing_settings() -> List[str]:
+    """The required environment variables that are not set."""
+    return [name for name, value in (("NOTION_TOKEN", NOTION_TOKEN),
+                                     ("NOTION_JOURNAL_DB_ID", NOTION_JOURNAL_DB_ID))
+            if not value]
+
+
+def notion_request(method: Callable[..., Any], **kwargs) -> Any:
+    """Call a (read-only) Notion endpoint through the shared rate limiter and retries."""
+    return call_with_retries(method, kwargs, rate_limiter, retry_budget, NOTION_MAX_RETRIES,
+                             retries=retries_made)
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Export State
+# ─────────────────────────────────────────────────────────────────────────────
+
+class ExportState:
+    """
+    What earlier runs exported, kept as JSON in the export folder.
+
+    Holds the high-water mark (the last_edited_time to query from next
+    time) and, per page ID, the file it was written to and the
+    last_edited_time it was written at.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.high_water_mark: Optional[str] = None
+        self.pages: Dict[str, Dict[str, str]] = {}
+        try:
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            print(f"⚠️  Couldn't read export state {path} ({e}); exporting everything")
+            return
+        self.high_water_mark = data.get("high_water_mark")
+        self.pages = data.get("pages", {})
+
+    def save(self) -> None:
+        """Write the state, replacing the file atomically."""
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        temp_path = self.path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump({"high_water_mark": self.high_water_mark, "pages": self.pages},
+                      f, indent=1, ensure_ascii=False)
+        os.replace(temp_path, self.path)
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Reading from Notion
+# ─────────────────────────────────────────────────────────────────────────────
+
+def iter_changed_pages(database_id: str, since: Optional[str]) -> Iterator[Dict[str, Any]]:
+    """
+    Yield the database's pages edited on or after `since`, oldest edit
+    first, one query (up to 100 pages) at a time.
+
+    Args:
+        database_id: Notion database ID
+        since: ISO timestamp, or None for every page
+    """
+    query: Dict[str, Any] = {
+        "database_id": database_id, "page_size": 100,
+        "sorts": [{"timestamp": "last_edited_time", "direction": "ascending"}],
+    }
+    if since:
+        query["filter"] = {"timestamp": "last_edited_time",
+                           "last_edited_time": {"on_or_after": since}}
+    while True:
+        results = notion_request(notion.databases.query, **query)
+        yield from results.get("results", [])
+        if not results.get("has_more"):
+            return
+        query["start_cursor"] = results.get("next_cursor")
+
+
+# Blocks whose children are separate pages, not part of this one
+_OWN_PAGE_TYPES = frozenset(("child_page", "child_database"))
+
+
+def fetch_block_tree(block_id: str) -> List[Dict]:
+    """
+    Return every child block of a page or block, following pagination, with
+    nested children stored under block[type]["children"].
+    """
+    children = []
+    start_cursor = None
+    while True:
+        query = {"block_id": block_id, "page_size": 100}
+        if start_cursor:
+            query["start_cursor"] = start_cursor
+        results = notion_request(notion.blocks.children.list, **query)
+        children.extend(results.get("results", []))
+        if not results.get("has_more"):
+            break
+        start_cursor = results.get("next_cursor")
+
+    for block in children:
+        if block.get("has_children") and block.get("type") not in _OWN_PAGE_TYPES:
+            block[block["type"]]["children"] = fetch_block_tree(block["id"])
+    return children
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Writing Markdown
+# ─────────────────────────────────────────────────────────────────────────────
+
+def page_metadata(page: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Frontmatter for a page: the Name, Tags and Date properties the importer
+    fills in, as title, tags and date.
+    """
+    properties = page.get("properties", {})
+    metadata: Dict[str, Any] = {
+        "title": plain_text(properties.get("Name", {}).get("title", [])) or "Untitled",
+    }
+    tags = [option["name"] for option in properties.get("Tags", {}).get("multi_select") or []]
+    if tags:
+        metadata["tags"] = tags
+    start = ((properties.get("Date", {}).get("date") or {}).get("start") or "")[:10]
+    try:
+        metadata["date"] = date.fromisoformat(start)
+    except ValueError:
+        pass
+    return metadata
+
+
+def entry_path(metadata: Dict[str, Any]) -> str:
+    """File for an entry, relative to the export folder: YYYY/MM/YYYY-MM-DD-title.md."""
+    slug = re.sub(r"[^\w]+", "-", metadata["title"].lower()).strip("-_")[:60].rstrip("-_")
+    slug = slug or "untitled"
+    day = metadata.get("date")
+    if day is None:
+        return os.path.join("undated", f"{slug}.md")
+    return os.path.join(f"{day:%Y}", f"{day:%m}", f"{day:%Y-%m-%d}-{slug}.md")
+
+
+def _timestamp(value: str) -> datetime:
+    return datetime.fromisoformat(value.replace("Z", "+00:00"))
+
+
+def write_entry(path: str, text: str, modified: Optional[str] = None) -> None:
+    """
+    Write a file atomically, so a mirror never holds a half-written entry.
+
+    Args:
+        path: File to write
+        text: Its contents
+        modified: ISO timestamp to set as the file's modification time
+    """
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    temp_path = path + ".tmp"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(temp_path, path)
+    if modified:
+        mtime = _timestamp(modified).timestamp()
+        os.utime(path, (mtime, mtime))
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Exporting Pages
+# ─────────────────────────────────────────────────────────────────────────────
+
+EXPORTED = "exported"
+UNCHANGED = "unchanged"
+FAILED = "failed"
+
+
+@dataclass
+class ExportJob:
+    """One page being exported."""
+    page: Dict[str, Any]
+    path: str                         # relative to the export folder
+    previous_path: Optional[str] = None
+    status: str = EXPORTED
+    error: Optional[str] = None
+
+    @property
+    def page_id(self) -> str:
+        return self.page["id"]
+
+    @property
+    def last_edited_time(self) -> str:
+        return self.page.get("last_edited_time", "")
+
+
+def export_page(job: ExportJob, output_root: str) -> ExportJob:
+    """Fetch a page's blocks and write its Markdown file. Runs on a worker thread."""
+    try:
+        blocks = fetch_block_tree(job.page_id)
+        text = format_frontmatter(page_metadata(job.page)) + "\n" + notion_blocks_to_markdown(blocks)
+        write_entry(os.path.join(output_root, job.path), text, job.last_edited_time or None)
+        if job.previous_path and job.previous_path != job.path:
+            # Renamed or re-dated in Notion: don't leave the old copy behind
+            try:
+                os.remove(os.path.join(output_root, job.previous_path))
+            except FileNotFoundError:
+                pass
+    except Exception as e:
+        job.status = FAILED
+        job.error = str(e)
+    return job
+
+
+def plan_job(page: Dict[str, Any], state: ExportState, output_root: str,
+             claimed: Dict[str, str]) -> ExportJob:
+    """
+    Decide where a page goes, and whether it needs exporting at all.
+
+    Args:
+        page: Page object from databases.query
+        state: Export state from earlier runs
+        output_root: Export folder
+        claimed: Paths already taken, to the IDs of their pages
+
+    Returns:
+        ExportJob, with status UNCHANGED if the file already holds this edit
+    """
+    page_id = page["id"]
+    known = state.pages.get(page_id)
+    previous_path = known["path"] if known else None
+    path = entry_path(page_metadata(page))
+    owner = claimed.get(path)
+    if owner is not None and owner != page_id:
+        # Two entries with the same date and title
+        stem, extension = os.path.splitext(path)
+        path = f"{stem}-{page_id.replace('-', '')[:8]}{extension}"
+    claimed[path] = page_id
+
+    job = ExportJob(page, path, previous_path)
+    if (known and known.get("last_edited_time") == job.last_edited_time
+            and previous_path == path
+            and os.path.exists(os.path.join(output_root, path))):
+        job.status = UNCHANGED
+    return job
+
+
+def run_export(pages: Iterator[Dict[str, Any]], state: ExportState, output_root: str,
+               workers: int = 4) -> Iterator[ExportJob]:
+    """
+    Export pages on a pool of worker threads, yielding each job when done.
+
+    Pages are listed on the calling thread while the workers fetch blocks,
+    with at most a few pages per worker queued up ahead.
+    """
+    claimed = {page["path"]: page_id for page_id, page in state.pages.items()}
+    pending: Deque["Future[ExportJob]"] = deque()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for page in pages:
+            if page.get("archived") or page.get("in_trash"):
+                continue
+            job = plan_job(page, state, output_root, claimed)
+            if job.status == UNCHANGED:
+                yield job
+                continue
+            pending.append(executor.submit(export_page, job, output_root))
+            while pending and (pending[0].done() or len(pending) >= workers * 4):
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def prune_missing(state: ExportState, seen: set, output_root: str) -> int:
+    """Delete files of pages that are no longer in the database. Returns how many."""
+    removed = 0
+    for page_id in [page_id for page_id in state.pages if page_id not in seen]:
+        try:
+            os.remove(os.path.join(output_root, state.pages.pop(page_id)["path"]))
+            removed += 1
+        except FileNotFoundError:
+            pass
+    return removed
+
+
+def _isoformat(moment: datetime) -> str:
+    return moment.astimezone(timezone.utc).isoformat(timespec="milliseconds").replace("+00:00", "Z")
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Main Function
+# ─────────────────────────────────────────────────────────────────────────────
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Export a Notion journal database to Markdown files."
+    )
+    parser.add_argument(
+        "--output", default=JOURNAL_EXPORT_PATH, metavar="PATH",
+        help="folder to write the Markdown files to (default: %(default)s)"
+    )
+    parser.add_argument(
+        "--state", metavar="PATH",
+        help="export state file (default: .notion-export.json in the output "
+             "folder, or JOURNAL_EXPORT_STATE_PATH)"
+    )
+    parser.add_argument(
+        "--workers", type=int, default=4, metavar="N",
+        help="number of pages fetched concurrently (default: 4). API calls "
+             "still share the NOTION_REQUESTS_PER_SECOND limit."
+    )
+    parser.add_argument(
+        "--full", action="store_true",
+        help="ignore the high-water mark and check every page, deleting the "
+             "files of pages that were removed from Notion"
+    )
+    parser.add_argument(
+        "--quiet", action="store_true",
+        help="don't print a line per page, only the totals"
+    )
+    args = parser.parse_args(argv)
+    if args.workers < 1:
+        parser.error("--workers must be at least 1")
+    if args.state is None:
+        args.state = (JOURNAL_EXPORT_STATE_PATH if args.output == JOURNAL_EXPORT_PATH
+                      else os.path.join(args.output, ".notion-export.json"))
+    return args
+
+
+def main(argv: Optional[List[str]] = None):
+    args = parse_args(argv)
+    missing = missing_settings()
+    if missing:
+        print(f"❌ Missing required environment variable: {missing[0]}")
+        print("\nPlease set this in your .env file:")
+        print("  NOTION_TOKEN=secret_..." if missing[0] == "NOTION_TOKEN"
+              else "  NOTION_JOURNAL_DB_ID=your-database-id")
+        sys.exit(1)
+
+    print("╔════════════════════════════════════════════════════════╗")
+    print("║     📓 Export Journal Entries from Notion 📓           ║")
+    print("╚════════════════════════════════════════════════════════╝")
+    print()
+
+    state = ExportState(args.state)
+    since = None if args.full else state.high_water_mark
+    print(f"📁 Exporting to: {args.output}")
+    if since:
+        print(f"⏩ Only pages edited since {since}")
+    elif state.pages:
+        print(f"🔁 Checking every page ({len(state.pages)} exported before)")
+    print(f"⚡ Using {args.workers} workers at {NOTION_REQUESTS_PER_SECOND:g} requests/second")
+    print()
+
+    exported_count = 0
+    unchanged_count = 0
+    failed_count = 0
+    seen = set()
+    # Pages edited from here on may be missed by this run's queries
+    run_started = datetime.now(timezone.utc)
+    first_failure: Optional[str] = None
+    complete = False
+    started = time.monotonic()
+
+    jobs = run_export(iter_changed_pages(NOTION_JOURNAL_DB_ID, since), state,
+                      args.output, workers=args.workers)
+    try:
+        for job in jobs:
+            seen.add(job.page_id)
+            if job.status == FAILED:
+                failed_count += 1
+                if first_failure is None or job.last_edited_time < first_failure:
+                    first_failure = job.last_edited_time
+                print(f"❌ {job.path}: {job.error}")
+                continue
+            state.pages[job.page_id] = {"path": job.path,
+                                        "last_edited_time": job.last_edited_time}
+            if job.status == UNCHANGED:
+                unchanged_count += 1
+                continue
+            exported_count += 1
+            if not args.quiet:
+                print(f"✅ {job.path}")
+            if exported_count % SAVE_EVERY == 0:
+                state.save()
+        complete = True
+    except KeyboardInterrupt:
+        print("\n⏸️  Interrupted, saving progress...\n")
+    except Exception as e:
+        print(f"\n❌ Failed to query the database: {e}\n")
+    finally:
+        jobs.close()
+
+    pruned = 0
+    if complete:
+        # Next time, ask for pages edited since this run started, or since
+        # the oldest edit that failed so it is tried again
+        mark = _isoformat(run_started - MARK_OVERLAP)
+        if first_failure is not None:
+            mark = min(mark, _isoformat(_timestamp(first_failure)))
+        state.high_water_mark = mark
+        if args.full:
+            pruned = prune_missing(state, seen, args.output)
+    state.save()
+    elapsed = time.monotonic() - started
+
+    # Print summary
+    print("═" * 56)
+    print("📊 Export Summary")
+    print(f"   ✅ Exported: {exported_count}")
+    print(f"   ⏭️  Unchanged: {unchanged_count}")
+    if args.full:
+        print(f"   🗑️  Removed: {pruned}")
+    print(f"   ❌ Failed: {failed_count}")
+    print(f"   ⏱️  Elapsed: {elapsed:.1f}s")
+    if retries_made.total:
+        print(f"   🔁 Retried requests: {retries_made.total}")
+    print("═" * 56)
+    print()
+
+    if not complete:
+        print("ℹ️  The high-water mark was not moved; the next run picks up from the same point.")
+    elif failed_count:
+        print("ℹ️  Failed pages will be tried again on the next run.")
+    print(f"💾 State saved to {args.state}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,625 @@
+"""
+A local stand-in for the Notion API, for offline dry runs and benchmarks.
+
+Serves the endpoints the journal import and export scripts use (pages,
+database query/retrieve/update, block children list/append, block
+update/delete, file uploads) over HTTP, so the real notion_client.Client talks to it
+unchanged:
+
+    python3 scripts/benchmark-journal-import.py serve --port 8787
+    NOTION_BASE_URL=http://127.0.0.1:8787 NOTION_TOKEN=secret_fake \\
+        NOTION_JOURNAL_DB_ID=fake python3 scripts/import-journal-to-notion.py
+
+Pages, blocks and the size of uploaded files are kept in memory, and pages keep a last_edited_time that
+database queries can filter and sort on. Latency, a requests-per-second limit
+and randomly injected 429 responses can be configured to see how the
+importer behaves against a slow or throttling API.
+"""
+
+import re
+import json
+import time
+import uuid
+import random
+import threading
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, quote, urlsplit
+
+# Notion's limit on children per request and on page_size
+MAX_PAGE_SIZE = 100
+
+# Notion's limit on a single-part upload and on each part of a multi-part one
+MAX_UPLOAD_SIZE = 20 * 1024 * 1024
+
+# Block types that can show an uploaded file
+_FILE_BLOCK_TYPES = frozenset(("image", "file", "pdf", "video", "audio"))
+
+DEFAULT_SCHEMA = {
+    "Name": {"id": "title", "name": "Name", "type": "title", "title": {}},
+    "Tags": {"id": "tags", "name": "Tags", "type": "multi_select",
+             "multi_select": {"options": []}},
+    "Date": {"id": "date", "name": "Date", "type": "date", "date": {}},
+}
+
+
+class NotionError(Exception):
+    """An error response, in the shape Notion sends them."""
+
+    def __init__(self, status: int, code: str, message: str,
+                 retry_after: Optional[int] = None):
+        super().__init__(message)
+        self.status = status
+        self.code = code
+        self.retry_after = retry_after
+
+    def body(self) -> Dict[str, Any]:
+        return {"object": "error", "status": self.status, "code": self.code,
+                "message": str(self)}
+
+
+class RequestStats:
+    """Counts and latencies of the requests served, per endpoint."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.calls: Dict[str, int] = {}
+        self.latencies: List[float] = []
+        self.throttled = 0
+
+    def add(self, endpoint: str, latency: float, throttled: bool) -> None:
+        with self._lock:
+            self.calls[endpoint] = self.calls.get(endpoint, 0) + 1
+            self.latencies.append(latency)
+            self.throttled += throttled
+
+    @property
+    def total(self) -> int:
+        return sum(self.calls.values())
+
+    def percentile(self, pct: float) -> float:
+        """Latency below which `pct` percent of requests were served."""
+        with self._lock:
+            ordered = sorted(self.latencies)
+        if not ordered:
+            return 0.0
+        return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# In-Memory Workspace
+# ─────────────────────────────────────────────────────────────────────────────
+
+def _now() -> str:
+    """The current time as Notion formats timestamps."""
+    return datetime.now(timezone.utc).isoformat(timespec="milliseconds").replace("+00:00", "Z")
+
+
+def _parse_time(value: str) -> datetime:
+    value = value.replace("Z", "+00:00")
+    if "T" not in value:
+        value += "T00:00:00+00:00"
+    parsed = datetime.fromisoformat(value)
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+# Operators of a timestamp filter
+_TIME_OPERATORS = {
+    "after": lambda a, b: a > b,
+    "on_or_after": lambda a, b: a >= b,
+    "before": lambda a, b: a < b,
+    "on_or_before": lambda a, b: a <= b,
+    "equals": lambda a, b: a == b,
+}
+
+
+class FakeWorkspace:
+    """Pages, blocks and database schemas behind the fake endpoints."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.pages: Dict[str, Dict[str, Any]] = {}
+        self.children: Dict[str, List[Dict[str, Any]]] = {}
+        self.blocks: Dict[str, Dict[str, Any]] = {}
+        self.schemas: Dict[str, Dict[str, Any]] = {}
+        self.file_uploads: Dict[str, Dict[str, Any]] = {}
+
+    def _schema(self, database_id: str) -> Dict[str, Any]:
+        return self.schemas.setdefault(database_id, json.loads(json.dumps(DEFAULT_SCHEMA)))
+
+    def _store_blocks(self, parent_id: str, blocks: List[Dict]) -> List[Dict]:
+        if len(blocks) > MAX_PAGE_SIZE:
+            raise NotionError(400, "validation_error",
+                              f"body.children.length should be ≤ `{MAX_PAGE_SIZE}`, "
+                              f"instead was `{len(blocks)}`.")
+        stored = []
+        for block in blocks:
+            block = json.loads(json.dumps(block))
+            block_id = str(uuid.uuid4())
+            data = block.get(block.get("type"), {})
+            nested = data.pop("children", None)
+            for part in data.get("rich_text", []):
+                part.setdefault("plain_text", part.get("text", {}).get("content", ""))
+            self._attach_file(block)
+            block.update(object="block", id=block_id, has_children=bool(nested),
+                         parent={"block_id": parent_id})
+            self.blocks[block_id] = block
+            if nested:
+                self.children[block_id] = self._store_blocks(block_id, nested)
+            stored.append(block)
+        return stored
+
+    def _attach_file(self, block: Dict[str, Any]) -> None:
+        """Swap a block's file_upload for the uploaded file, as Notion returns it."""
+        block_type = block.get("type")
+        data = block.get(block_type) or {}
+        if data.get("type") != "file_upload":
+            return
+        reference = data.get("file_upload") or {}
+        if block_type not in _FILE_BLOCK_TYPES or set(reference) != {"id"}:
+            raise NotionError(400, "validation_error",
+                              f"body.{block_type}.file_upload should be an object with "
+                              f"only an `id`, instead was `{json.dumps(reference)}`.")
+        upload = self.file_uploads.get(reference["id"])
+        if upload is None or upload["status"] not in ("uploaded", "attached"):
+            raise NotionError(400, "validation_error",
+                              f"File upload {reference['id']} isn't uploaded yet "
+                              f"or has expired.")
+        upload["status"] = "attached"
+        data.pop("file_upload")
+        data.update(type="file", file={
+            "url": f"https://files.fake-notion.invalid/{upload['id']}/{quote(upload['filename'])}",
+            "expiry_time": _now()})
+        if block_type == "file":
+            data["name"] = upload["filename"]
+
+    def _add_options(self, database_id: str, properties: Dict[str, Any]) -> None:
+        """Create the multi-select options a page uses, as Notion does."""
+        schema = self._schema(database_id)
+        for name, prop in properties.items():
+            if "multi_select" not in prop or name not in schema:
+                continue
+            options = schema[name].setdefault("multi_select", {}).setdefault("options", [])
+            known = {option["name"] for option in options}
+            for value in prop["multi_select"]:
+                if value["name"] not in known:
+                    known.add(value["name"])
+                    options.append({"id": str(uuid.uuid4()), "name": value["name"],
+                                    "color": "default"})
+
+    def _touch(self, block_id: str) -> None:
+        """Bump last_edited_time of the page a block belongs to."""
+        while block_id in self.blocks:
+            block_id = self.blocks[block_id]["parent"]["block_id"]
+        if block_id in self.pages:
+            self.pages[block_id]["last_edited_time"] = _now()
+
+    def create_page(self, body: Dict[str, Any]) -> Dict[str, Any]:
+        parent = body.get("parent", {})
+        if "database_id" not in parent:
+            raise NotionError(400, "validation_error", "body.parent.database_id should be defined.")
+        properties = _with_plain_text(body.get("properties", {}))
+        page_id = str(uuid.uuid4())
+        with self._lock:
+            self._add_options(parent["database_id"], properties)
+            children = self._store_blocks(page_id, body.get("children", []))
+            now = _now()
+            page = {"object": "page", "id": page_id, "parent": parent,
+                    "created_time": now, "last_edited_time": now,
+                    "archived": False, "properties": properties}
+            self.pages[page_id] = page
+            self.children[page_id] = children
+        return page
+
+    def update_page(self, page_id: str, body: Dict[str, Any]) -> Dict[str, Any]:
+        with self._lock:
+            page = self._get(self.pages, page_id)
+            if "database_id" in page["parent"]:
+                self._add_options(page["parent"]["database_id"], body.get("properties", {}))
+            page["properties"].update(_with_plain_text(body.get("properties", {})))
+            if "archived" in body:
+                page["archived"] = body["archived"]
+            page["last_edited_time"] = _now()
+            return page
+
+    def query_database(self, database_id: str, body: Dict[str, Any]) -> Dict[str, Any]:
+        query_filter = body.get("filter", {})
+        title = query_filter.get("title", {}).get("equals")
+        page_size = min(body.get("page_size", MAX_PAGE_SIZE), MAX_PAGE_SIZE)
+        start = int(body.get("start_cursor") or 0)
+        with self._lock:
+            pages = [page for page in self.pages.values()
+                     if page["parent"].get("database_id") == database_id
+                     and not page["archived"]]
+        if title is not None:
+            pages = [page for page in pages if _page_title(page) == title]
+        timestamp = query_filter.get("timestamp")
+        if timestamp:
+            for operator, value in query_filter.get(timestamp, {}).items():
+                compare, bound = _TIME_OPERATORS[operator], _parse_time(value)
+                pages = [page for page in pages if compare(_parse_time(page[timestamp]), bound)]
+        for sort in reversed(body.get("sorts", [])):
+            if "timestamp" in sort:
+                pages.sort(key=lambda page: page[sort["timestamp"]],
+                           reverse=sort.get("direction") == "descending")
+        end = start + page_size
+        return {"object": "list", "results": pages[start:end],
+                "has_more": end < len(pages),
+                "next_cursor": str(end) if end < len(pages) else None}
+
+    def retrieve_database(self, database_id: str) -> Dict[str, Any]:
+        with self._lock:
+            return {"object": "database", "id": database_id,
+                    "title": [{"type": "text", "plain_text": "Journal.db",
+                               "text": {"content": "Journal.db"}}],
+                    "properties": self._schema(database_id)}
+
+    def update_database(self, database_id: str, body: Dict[str, Any]) -> Dict[str, Any]:
+        with self._lock:
+            schema = self._schema(database_id)
+            for name, prop in body.get("properties", {}).items():
+                kind = next((key for key in prop if key != "name"), None)
+                schema.setdefault(name, {"id": name, "name": name, "type": kind}).update(prop)
+                for option in prop.get("multi_select", {}).get("options", []):
+                    option.setdefault("id", str(uuid.uuid4()))
+                    option.setdefault("color", "default")
+        return self.retrieve_database(database_id)
+
+    def list_children(self, block_id: str, query: Dict[str, str]) -> Dict[str, Any]:
+        page_size = min(int(query.get("page_size", MAX_PAGE_SIZE)), MAX_PAGE_SIZE)
+        start = int(query.get("start_cursor") or 0)
+        with self._lock:
+            children = list(self.children.get(block_id, []))
+        end = start + page_size
+        return {"object": "list", "results": children[start:end],
+                "has_more": end < len(children),
+                "next_cursor": str(end) if end < len(children) else None}
+
+    def append_children(self, block_id: str, body: Dict[str, Any]) -> Dict[str, Any]:
+        with self._lock:
+            if block_id not in self.pages and block_id not in self.blocks:
+                raise NotionError(404, "object_not_found",
+                                  f"Could not find block with ID: {block_id}.")
+            new = self._store_blocks(block_id, body.get("children", []))
+            children = self.children.setdefault(block_id, [])
+            after = body.get("after")
+            if after:
+                ids = [child["id"] for child in children]
+                if after not in ids:
+                    raise NotionError(400, "validation_error",
+                                      f"Block {after} is not a child of {block_id}.")
+                position = ids.index(after) + 1
+                children[position:position] = new
+            else:
+                children.extend(new)
+            if block_id in self.blocks:
+                self.blocks[block_id]["has_children"] = True
+            self._touch(block_id)
+        return {"object": "list", "results": new, "has_more": False, "next_cursor": None}
+
+    def update_block(self, block_id: str, body: Dict[str, Any]) -> Dict[str, Any]:
+        with self._lock:
+            block = self._get(self.blocks, block_id)
+            for key, value in body.items():
+                if key == block["type"]:
+                    for part in value.get("rich_text", []):
+                        part.setdefault("plain_text", part.get("text", {}).get("content", ""))
+                    if value.get("type") == "file_upload":
+                        replacement = {"type": key, key: json.loads(json.dumps(value))}
+                        self._attach_file(replacement)
+                        block[key] = {"caption": [], **replacement[key]}
+                    else:
+                        block[key].update(value)
+            self._touch(block_id)
+            return block
+
+    def delete_block(self, block_id: str) -> Dict[str, Any]:
+        with self._lock:
+            block = self.blocks.pop(block_id, None)
+            if block is None:
+                raise NotionError(404, "object_not_found",
+                                  f"Could not find block with ID: {block_id}.")
+            siblings = self.children.get(block["parent"]["block_id"], [])
+            siblings[:] = [child for child in siblings if child["id"] != block_id]
+            self._touch(block["parent"]["block_id"])
+            block["archived"] = True
+            return block
+
+    def create_file_upload(self, body: Dict[str, Any]) -> Dict[str, Any]:
+        mode = body.get("mode", "single_part")
+        if mode not in ("single_part", "multi_part"):
+            raise NotionError(400, "validation_error",
+                              f"body.mode should be `single_part` or `multi_part`, "
+                              f"instead was `{mode}`.")
+        parts = body.get("number_of_parts") if mode == "multi_part" else 1
+        if not isinstance(parts, int) or parts < 1:
+            raise NotionError(400, "validation_error",
+                              "body.number_of_parts should be a positive integer.")
+        upload_id = str(uuid.uuid4())
+        now = _now()
+        upload = {"object": "file_upload", "id": upload_id, "created_time": now,
+                  "last_edited_time": now, "status": "pending", "mode": mode,
+                  "filename": body.get("filename") or "file",
+                  "content_type": body.get("content_type"), "content_length": None,
+                  "number_of_parts": {"total": parts, "sent": 0}, "parts": {}}
+        with self._lock:
+            self.file_uploads[upload_id] = upload
+            return _public_upload(upload)
+
+    def send_file_upload(self, upload_id: str, form: Dict[str, Any]) -> Dict[str, Any]:
+        if not isinstance(form.get("file"), tuple):
+            raise NotionError(400, "validation_error", "The request should include a `file` field.")
+        size = len(form["file"][1])
+        with self._lock:
+            upload = self._get(self.file_uploads, upload_id)
+            if upload["status"] != "pending":
+                raise NotionError(400, "validation_error",
+                                  f"File upload {upload_id} is {upload['status']}, not pending.")
+            if size > MAX_UPLOAD_SIZE:
+                raise NotionError(400, "validation_error",
+                                  f"The file is {size} bytes, over the "
+                                  f"{MAX_UPLOAD_SIZE}-byte limit of one request.")
+            if upload["mode"] == "single_part":
+                upload["parts"][1] = size
+                upload["status"] = "uploaded"
+                upload["content_length"] = size
+            else:
+                try:
+                    number = int(form.get("part_number", ""))
+                except ValueError:
+                    number = 0
+                if not 1 <= number <= upload["number_of_parts"]["total"]:
+                    raise NotionError(400, "validation_error",
+                                      "part_number should be between 1 and number_of_parts.")
+                upload["parts"][number] = size
+            upload["number_of_parts"]["sent"] = len(upload["parts"])
+            upload["last_edited_time"] = _now()
+            return _public_upload(upload)
+
+    def complete_file_upload(self, upload_id: str) -> Dict[str, Any]:
+        with self._lock:
+            upload = self._get(self.file_uploads, upload_id)
+            if upload["mode"] != "multi_part" or upload["status"] != "pending":
+                raise NotionError(400, "validation_error",
+                                  f"File upload {upload_id} can't be completed.")
+            if len(upload["parts"]) != upload["number_of_parts"]["total"]:
+                raise NotionError(400, "validation_error",
+                                  f"Sent {len(upload['parts'])} of "
+                                  f"{upload['number_of_parts']['total']} parts.")
+            upload["status"] = "uploaded"
+            upload["content_length"] = sum(upload["parts"].values())
+            upload["last_edited_time"] = _now()
+            return _public_upload(upload)
+
+    @staticmethod
+    def _get(objects: Dict[str, Dict], object_id: str) -> Dict[str, Any]:
+        if object_id not in objects:
+            raise NotionError(404, "object_not_found", f"Could not find object with ID: {object_id}.")
+        return objects[object_id]
+
+
+def _with_plain_text(properties: Dict[str, Any]) -> Dict[str, Any]:
+    """A copy of page property values with plain_text filled in, as Notion returns them."""
+    properties = json.loads(json.dumps(properties))
+    for prop in properties.values():
+        for part in (prop.get("title") or []) + (prop.get("rich_text") or []):
+            part.setdefault("plain_text", part.get("text", {}).get("content", ""))
+    return properties
+
+
+def _public_upload(upload: Dict[str, Any]) -> Dict[str, Any]:
+    """A file upload object as the endpoints return it."""
+    return {key: value for key, value in upload.items() if key not in ("mode", "parts")}
+
+
+def _parse_form(content_type: str, raw: bytes) -> Dict[str, Any]:
+    """
+    Fields of a multipart/form-data body: text for plain fields,
+    (filename, bytes) for files.
+    """
+    match = re.search(r'boundary="?([^";]+)"?', content_type)
+    if match is None:
+        raise ValueError("multipart body without a boundary")
+    form: Dict[str, Any] = {}
+    for section in raw.split(b"--" + match.group(1).encode())[1:-1]:
+        head, _, data = section[2:].partition(b"\r\n\r\n")
+        head_text = head.decode("latin-1")
+        name = re.search(r'(?<![a-z])name="([^"]*)"', head_text)
+        filename = re.search(r'filename="([^"]*)"', head_text)
+        if name is None:
+            raise ValueError("multipart section without a name")
+        data = data[:-2]  # the line break before the next boundary
+        form[name.group(1)] = (filename.group(1), data) if filename else data.decode()
+    return form
+
+
+def _page_title(page: Dict[str, Any]) -> str:
+    for prop in page["properties"].values():
+        if "title" in prop:
+            return "".join(part.get("plain_text", "") for part in prop["title"])
+    return ""
+
+
+# (method, path pattern) → (endpoint name, FakeWorkspace call)
+ROUTES = [
+    ("POST", re.compile(r"/v1/pages$"), "pages.create",
+     lambda ws, body, query: ws.create_page(body)),
+    ("PATCH", re.compile(r"/v1/pages/([^/]+)$"), "pages.update",
+     lambda ws, body, query, page_id: ws.update_page(page_id, body)),
+    ("POST", re.compile(r"/v1/databases/([^/]+)/query$"), "databases.query",
+     lambda ws, body, query, db_id: ws.query_database(db_id, body)),
+    ("GET", re.compile(r"/v1/databases/([^/]+)$"), "databases.retrieve",
+     lambda ws, body, query, db_id: ws.retrieve_database(db_id)),
+    ("PATCH", re.compile(r"/v1/databases/([^/]+)$"), "databases.update",
+     lambda ws, body, query, db_id: ws.update_database(db_id, body)),
+    ("GET", re.compile(r"/v1/blocks/([^/]+)/children$"), "blocks.children.list",
+     lambda ws, body, query, block_id: ws.list_children(block_id, query)),
+    ("PATCH", re.compile(r"/v1/blocks/([^/]+)/children$"), "blocks.children.append",
+     lambda ws, body, query, block_id: ws.append_children(block_id, body)),
+    ("PATCH", re.compile(r"/v1/blocks/([^/]+)$"), "blocks.update",
+     lambda ws, body, query, block_id: ws.update_block(block_id, body)),
+    ("DELETE", re.compile(r"/v1/blocks/([^/]+)$"), "blocks.delete",
+     lambda ws, body, query, block_id: ws.delete_block(block_id)),
+    ("POST", re.compile(r"/v1/file_uploads$"), "file_uploads.create",
+     lambda ws, body, query: ws.create_file_upload(body)),
+    ("POST", re.compile(r"/v1/file_uploads/([^/]+)/send$"), "file_uploads.send",
+     lambda ws, body, query, upload_id: ws.send_file_upload(upload_id, body)),
+    ("POST", re.compile(r"/v1/file_uploads/([^/]+)/complete$"), "file_uploads.complete",
+     lambda ws, body, query, upload_id: ws.complete_file_upload(upload_id)),
+]
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# HTTP Server
+# ─────────────────────────────────────────────────────────────────────────────
+
+class FakeNotionServer(ThreadingHTTPServer):
+    """
+    Threaded HTTP server answering like api.notion.com/v1.
+
+    Args:
+        address: (host, port) to listen on; port 0 picks a free one
+        latency: Seconds added to every response
+        jitter: Extra random delay, up to this many seconds
+        rate_limit: Requests per second before answering 429 (0 for none).
+            Bursts of up to one second's worth are allowed, like Notion.
+        throttle: Fraction of requests answered 429 at random
+        retry_after: Retry-After seconds sent with every 429
+        seed: Seed for the jitter and throttling
+    """
+
+    daemon_threads = True
+
+    def __init__(self, address: Tuple[str, int] = ("127.0.0.1", 0),
+                 latency: float = 0.0, jitter: float = 0.0,
+                 rate_limit: float = 0.0, throttle: float = 0.0,
+                 retry_after: int = 1, seed: Optional[int] = None):
+        super().__init__(address, _NotionHandler)
+        self.workspace = FakeWorkspace()
+        self.stats = RequestStats()
+        self.latency = latency
+        self.jitter = jitter
+        self.rate_limit = rate_limit
+        self.throttle = throttle
+        self.retry_after = retry_after
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._tokens = max(rate_limit, 1.0)
+        self._refilled = time.monotonic()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        """Base URL to give notion_client.Client (or NOTION_BASE_URL)."""
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "FakeNotionServer":
+        """Serve from a background thread."""
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.shutdown()
+        self.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self) -> "FakeNotionServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    def admit(self) -> Tuple[bool, float]:
+        """
+        Decide how to treat the next request.
+
+        Returns:
+            (throttled, delay): whether to answer 429, and how long to wait
+            before answering
+        """
+        with self._lock:
+            delay = self.latency + (self._random.uniform(0, self.jitter) if self.jitter else 0)
+            if self.throttle and self._random.random() < self.throttle:
+                return True, delay
+            if self.rate_limit:
+                now = time.monotonic()
+                self._tokens = min(max(self.rate_limit, 1.0),
+                                   self._tokens + (now - self._refilled) * self.rate_limit)
+                self._refilled = now
+                if self._tokens < 1:
+                    return True, delay
+                self._tokens -= 1
+            return False, delay
+
+
+class _NotionHandler(BaseHTTPRequestHandler):
+    server: FakeNotionServer
+    protocol_version = "HTTP/1.1"  # keep-alive, as httpx expects
+
+    def do_GET(self) -> None:
+        self._handle()
+
+    def do_POST(self) -> None:
+        self._handle()
+
+    def do_PATCH(self) -> None:
+        self._handle()
+
+    def do_DELETE(self) -> None:
+        self._handle()
+
+    def _handle(self) -> None:
+        started = time.perf_counter()
+        length = int(self.headers.get("Content-Length") or 0)
+        raw = self.rfile.read(length) if length else b""
+        url = urlsplit(self.path)
+        query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        route, args = None, ()
+        for method, pattern, name, call in ROUTES:
+            match = pattern.match(url.path)
+            if match and method == self.command:
+                route, args = (name, call), match.groups()
+                break
+        throttled, delay = self.server.admit()
+        if delay:
+            time.sleep(delay)
+
+        headers = {}
+        try:
+            if throttled:
+                raise NotionError(429, "rate_limited", "You have been rate limited.",
+                                  retry_after=self.server.retry_after)
+            if not self.headers.get("Authorization", "").startswith("Bearer "):
+                raise NotionError(401, "unauthorized", "API token is invalid.")
+            if route is None:
+                raise NotionError(400, "invalid_request_url", "Invalid request URL.")
+            content_type = self.headers.get("Content-Type", "")
+            if content_type.startswith("multipart/form-data"):
+                body = _parse_form(content_type, raw)
+            else:
+                body = json.loads(raw) if raw else {}
+            status, response = 200, route[1](self.server.workspace, body, query, *args)
+        except NotionError as e:
+            status, response = e.status, e.body()
+            if e.retry_after:
+                headers["Retry-After"] = str(e.retry_after)
+        except ValueError as e:
+            status, response = 400, NotionError(400, "invalid_json", str(e)).body()
+
+        payload = json.dumps(response).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+        self.server.stats.add(route[0] if route else "unknown",
+                              time.perf_counter() - started, status == 429)
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass  # one line per request would drown the importer's output
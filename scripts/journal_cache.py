@@ -0,0 +1,221 @@
+"""
+On-disk cache of converted journal entries.
+
+Reading an entry means parsing its frontmatter and converting its body to
+Notion blocks, and the result only depends on the file's bytes. A retry of
+failed files, a --sync of files that were only touched or a dry run
+against fake_notion_server.py would otherwise redo that work for text that
+was converted before. The cache keeps the title, tags, date and blocks of
+every entry read, keyed by the file's content hash and a fingerprint of
+the conversion code, so a change to either one is a miss.
+
+Entries are pickled into one SQLite file, which worker processes can read
+and fill at the same time. Each entry notes the day it was last used, and
+prune() deletes the least recently used ones once the cache is bigger than
+its limit.
+
+Loading a pickle takes about half the time converting the Markdown again
+does (a third with --pack); JSON, compressed or not, loads no faster than
+the converter runs. As pickles can run code when loaded, the cache belongs
+in a folder only its owner can write to, not in a shared or synced one.
+"""
+
+import os
+import time
+import pickle
+import sqlite3
+import hashlib
+import functools
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+# Default size limit, overridden by JOURNAL_CACHE_SIZE_MB
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+# Bumped when the layout of the stored entries changes
+FORMAT_VERSION = 1
+
+# The modules whose code decides what an entry converts to
+_CONVERTER_MODULES = ("journal_entries.py", "journal_markdown.py", "journal_tags.py")
+
+# A pruned cache is brought down to this share of its limit, so the next
+# few runs don't each have to prune again
+_PRUNE_TO = 0.9
+
+
+@functools.lru_cache(maxsize=None)
+def converter_version() -> str:
+    """A fingerprint of the conversion code: the hash of its source files."""
+    digest = hashlib.sha256(f"{FORMAT_VERSION}:{pickle.HIGHEST_PROTOCOL}".encode())
+    folder = os.path.dirname(os.path.abspath(__file__))
+    for name in _CONVERTER_MODULES:
+        with open(os.path.join(folder, name), 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()[:16]
+
+
+def _today() -> int:
+    return int(time.time() // 86400)
+
+
+class ConversionCache:
+    """
+    Converted entries on disk, by content hash.
+
+    Pickles as its settings only, so it can be handed to the parse
+    processes along with the files to read; each process opens the
+    database on first use. Thread-safe. Errors reading or writing the cache
+    are never raised: a broken cache is a miss.
+    """
+
+    def __init__(self, path: str, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.version = converter_version()
+        self._reset()
+
+    def _reset(self) -> None:
+        self._conn: Optional[sqlite3.Connection] = None
+        self._pid: Optional[int] = None
+        self._broken = False
+        self._lock = threading.Lock()
+
+    def __getstate__(self) -> Dict[str, Any]:
+        return {"path": self.path, "max_bytes": self.max_bytes, "version": self.version}
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self._reset()
+
+    def _connect(self) -> Optional[sqlite3.Connection]:
+        """The database, opened on first use in each process. Call with the lock held."""
+        if self._conn is not None and self._pid == os.getpid():
+            return self._conn
+        if self._broken:
+            return None
+        try:
+            folder = os.path.dirname(os.path.abspath(self.path))
+            os.makedirs(folder, mode=0o700, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None,
+                                   check_same_thread=False)
+            # Only takes effect on a new database, so pruning can shrink the file
+            conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS entries (
+                    key TEXT PRIMARY KEY,
+                    data BLOB NOT NULL,
+                    size INTEGER NOT NULL,
+                    used_on INTEGER NOT NULL
+                )
+                """
+            )
+        except (OSError, sqlite3.Error):
+            self._broken = True
+            return None
+        self._conn, self._pid = conn, os.getpid()
+        return conn
+
+    def _key(self, content_hash: str, pack: bool, max_block_size: int) -> str:
+        return f"{content_hash}:{self.version}:{int(pack)}:{max_block_size}"
+
+    def get(self, content_hash: str, pack: bool, max_block_size: int) -> Optional[Dict[str, Any]]:
+        """
+        The stored entry for a file's content, if there is one.
+
+        Returns:
+            Dictionary with 'tags', 'date', 'blocks' and, unless the file
+            has no title of its own and is named after its path, 'title'
+            keys, or None on a miss
+        """
+        key = self._key(content_hash, pack, max_block_size)
+        today = _today()
+        with self._lock:
+            conn = self._connect()
+            if conn is None:
+                return None
+            try:
+                row = conn.execute("SELECT data, used_on FROM entries WHERE key = ?",
+                                   (key,)).fetchone()
+                if row is not None and row[1] < today:
+                    conn.execute("UPDATE entries SET used_on = ? WHERE key = ?", (today, key))
+            except sqlite3.Error:
+                return None
+        if row is None:
+            return None
+        try:
+            return pickle.loads(row[0])
+        except Exception:
+            return None  # from an incompatible version; replaced on the next put()
+
+    def put(self, content_hash: str, pack: bool, max_block_size: int,
+            entry: Dict[str, Any]) -> None:
+        """Store an entry (the same keys get() returns) for a file's content."""
+        try:
+            data = pickle.dumps(entry, protocol=pickle.HIGHEST_PROTOCOL)
+        except (TypeError, pickle.PicklingError):
+            return
+        with self._lock:
+            conn = self._connect()
+            if conn is None:
+                return
+            try:
+                conn.execute(
+                    "INSERT OR REPLACE INTO entries (key, data, size, used_on) VALUES (?, ?, ?, ?)",
+                    (self._key(content_hash, pack, max_block_size), data, len(data), _today())
+                )
+            except sqlite3.Error:
+                pass
+
+    def usage(self) -> Tuple[int, int]:
+        """(entries, bytes) in the cache."""
+        with self._lock:
+            conn = self._connect()
+            if conn is None:
+                return 0, 0
+            try:
+                return conn.execute(
+                    "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries").fetchone()
+            except sqlite3.Error:
+                return 0, 0
+
+    def prune(self) -> Tuple[int, int]:
+        """
+        Delete the least recently used entries if the cache is over its limit.
+
+        Returns:
+            (entries deleted, bytes freed)
+        """
+        with self._lock:
+            conn = self._connect()
+            if conn is None:
+                return 0, 0
+            try:
+                total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+                if total <= self.max_bytes:
+                    return 0, 0
+                target = self.max_bytes * _PRUNE_TO
+                doomed, freed = [], 0
+                for key, size in conn.execute(
+                        "SELECT key, size FROM entries ORDER BY used_on, rowid").fetchall():
+                    if total - freed <= target:
+                        break
+                    doomed.append((key,))
+                    freed += size
+                conn.execute("BEGIN")
+                conn.executemany("DELETE FROM entries WHERE key = ?", doomed)
+                conn.execute("COMMIT")
+                conn.execute("PRAGMA incremental_vacuum")
+            except sqlite3.Error:
+                if conn.in_transaction:
+                    conn.rollback()
+                return 0, 0
+        return len(doomed), freed
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None and self._pid == os.getpid():
+                self._conn.close()
+            self._conn = None
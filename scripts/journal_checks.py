@@ -0,0 +1,140 @@
+"""
+Deep checks of journal entries, for validate-journal-setup.py --deep.
+
+Entries are read with the importer's own functions (journal_entries and
+journal_markdown), so a file that passes here parses and converts the same
+way during the import. check_entries() is the unit of work of the
+validator's process pool and returns small summaries that pickle cheaply,
+not the converted blocks.
+"""
+
+import io
+import os
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+from journal_entries import iter_body_blocks, parse_date, parse_markdown_file, parse_tags, \
+    scan_markdown_file
+from journal_markdown import MAX_BLOCKS_PER_REQUEST, MAX_TEXT_LENGTH, iter_content_blocks, \
+    local_file
+from journal_uploads import find_local_file
+
+# Problems that make the import fail for a file; the rest are warnings
+ERRORS = frozenset(("parse", "title", "run"))
+
+
+def _runs(blocks: Iterable[Dict]) -> Iterable[str]:
+    """The text of every rich_text run in some blocks and their children."""
+    for block in blocks:
+        data = block.get(block.get("type"), {})
+        for part in data.get("rich_text", ()):
+            yield part.get("text", {}).get("content", "")
+        yield from _runs(data.get("children", ()))
+
+
+def check_entry(file_path: Path, stream_threshold: Optional[int] = None,
+                root: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Parse and convert one entry, and note anything the import would trip on.
+
+    Args:
+        file_path: Path to the Markdown file
+        stream_threshold: Files bigger than this many bytes are converted
+            as they are read, as the importer does
+        root: Journal root, which files the entry refers to must be in
+            (or in the entry's own folder) to be uploaded
+
+    Returns:
+        Dictionary with 'path', 'title', 'content_hash', 'blocks' (how
+        many), 'tags', 'has_date', 'fields' (frontmatter keys) and
+        'problems', a list of (kind, message) pairs. A file that can't be
+        parsed has a single ('parse', error) problem.
+    """
+    result: Dict[str, Any] = {
+        'path': str(file_path), 'title': None, 'content_hash': None, 'blocks': 0,
+        'tags': [], 'has_date': False, 'fields': [], 'problems': [],
+    }
+    problems = result['problems']
+    try:
+        scanned = None
+        if stream_threshold is not None and os.path.getsize(file_path) > stream_threshold:
+            scanned = scan_markdown_file(file_path)
+        if scanned is not None:
+            metadata = scanned['metadata']
+            result['content_hash'] = scanned['content_hash']
+            blocks = iter_body_blocks(file_path, scanned['body_offset'])
+            longest = _longest_line(file_path, scanned['body_offset'])
+        else:
+            with open(file_path, 'rb') as f:
+                parsed = parse_markdown_file(file_path, f.read())
+            metadata = parsed['metadata']
+            result['content_hash'] = parsed['content_hash']
+            blocks = iter_content_blocks(parsed['content'])
+            longest = max((len(line) for line in parsed['content'].split('\n')), default=0)
+
+        count = 0
+        longest_run = 0
+        local_files = []
+        for block in blocks:
+            count += 1
+            path = local_file(block)
+            if path is not None:
+                local_files.append(path)
+            for run in _runs((block,)):
+                longest_run = max(longest_run, len(run))
+    except Exception as e:
+        problems.append(('parse', " ".join(str(e).split())))
+        return result
+
+    title = metadata.get('title', Path(file_path).stem)
+    result['title'] = title if isinstance(title, str) else str(title)
+    result['fields'] = sorted(str(key) for key in metadata)
+    result['blocks'] = count
+    if not isinstance(title, str):
+        problems.append(('title', f"title {title} isn't text (put it in quotes)"))
+
+    raw_date = metadata.get('date')
+    result['has_date'] = bool(raw_date)
+    if raw_date and parse_date(raw_date) is None:
+        problems.append(('date', f"date \"{raw_date}\" isn't recognised, the page gets no date"))
+
+    raw_tags = metadata.get('tags')
+    if raw_tags and not isinstance(raw_tags, (list, str)):
+        problems.append(('tags', f"tags \"{raw_tags}\" are ignored (use a list or a "
+                                 f"comma-separated string)"))
+    result['tags'] = parse_tags(raw_tags)
+
+    if count > MAX_BLOCKS_PER_REQUEST:
+        requests = -(-count // MAX_BLOCKS_PER_REQUEST)
+        problems.append(('blocks', f"{count} blocks, sent in {requests} requests"))
+    if longest > MAX_TEXT_LENGTH:
+        problems.append(('long_line', f"a {longest}-character line is split into "
+                                      f"{MAX_TEXT_LENGTH}-character blocks"))
+    if longest_run > MAX_TEXT_LENGTH:
+        problems.append(('run', f"a {longest_run}-character text run, over Notion's "
+                                f"{MAX_TEXT_LENGTH}-character limit"))
+    folder = os.path.dirname(file_path)
+    for path in dict.fromkeys(local_files):
+        full_path = find_local_file(path, folder, root)
+        if full_path is None:
+            problems.append(('missing_file', f"{path} is outside the journal, "
+                                             f"the reference stays text"))
+        elif not os.path.isfile(full_path):
+            problems.append(('missing_file', f"{path} isn't there, the reference stays text"))
+    return result
+
+
+def _longest_line(file_path: Path, body_offset: int) -> int:
+    longest = 0
+    with open(file_path, 'rb') as f:
+        f.seek(body_offset)
+        with io.TextIOWrapper(f, encoding='utf-8', newline='') as text:
+            for line in text:
+                longest = max(longest, len(line.rstrip('\r\n')))
+    return longest
+
+
+def check_entries(file_paths: Sequence[Path], stream_threshold: Optional[int] = None,
+                  root: Optional[str] = None) -> List[Dict[str, Any]]:
+    """check_entry() for a chunk of files: one round-trip to a worker per chunk."""
+    return [check_entry(file_path, stream_threshold, root) for file_path in file_paths]
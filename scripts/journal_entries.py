@@ -0,0 +1,530 @@
+"""
+Reading journal entries for the Notion import scripts.
+
+Everything here is pure CPU work on local files (frontmatter parsing, tag
+and date normalisation, Markdown → block conversion) with no Notion client
+or global state, so it can run in worker processes as well as threads.
+"""
+
+import io
+import os
+import re
+import json
+import time
+import codecs
+import functools
+import hashlib
+from datetime import date, datetime
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import frontmatter
+
+from journal_markdown import MAX_TEXT_LENGTH, content_to_notion_blocks, iter_stream_blocks
+from journal_tags import normalize_tag, tag_key
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Frontmatter
+# ─────────────────────────────────────────────────────────────────────────────
+
+# The "---" line python-frontmatter splits on
+_FM_BOUNDARY = frontmatter.YAMLHandler.FM_BOUNDARY
+
+_FLAT_KEY = re.compile(r'([A-Za-z_][A-Za-z0-9_-]*):(?: (.*))?$')
+_ISO_DATE = re.compile(r'[0-9]{4}-[0-9]{2}-[0-9]{2}$')
+
+# Plain scalars that YAML resolves to something other than a string
+# (booleans and null); compared lowercased, so a few extra cases fall back
+_YAML_WORDS = frozenset(("yes", "no", "true", "false", "on", "off", "null"))
+
+
+# Returned by _flat_scalar() for values it can't resolve without PyYAML
+_COMPLEX = object()
+
+
+def _flat_scalar(value: str, in_list: bool = False) -> Any:
+    """
+    The value of a one-line YAML scalar, or _COMPLEX if it is anything that
+    needs a real YAML parser to resolve exactly.
+    """
+    value = value.strip(' ')
+    if not value:
+        return _COMPLEX if in_list else None
+    first = value[0]
+    if first == "'" or first == '"':
+        # Quoted, with no escapes or embedded quotes to interpret
+        body = value[1:-1]
+        if (len(value) < 2 or value[-1] != first or first in body
+                or (first == '"' and '\\' in body)):
+            return _COMPLEX
+        return body
+    if first.isdigit():
+        if _ISO_DATE.match(value):
+            try:
+                return date(int(value[:4]), int(value[5:7]), int(value[8:]))
+            except ValueError:
+                return _COMPLEX  # let YAML raise its own error
+        return _COMPLEX  # numbers, times...
+    if (not first.isalpha() or value.lower() in _YAML_WORDS
+            or ': ' in value or ' #' in value or value[-1] == ':'
+            or (in_list and any(c in value for c in '[]{},:'))):
+        return _COMPLEX
+    return value
+
+
+def _load_flat_yaml(fm: str) -> Optional[Dict[str, Any]]:
+    """
+    Parse frontmatter made only of `key: value` lines, where a value is a
+    plain or simply-quoted string, a YYYY-MM-DD date, or a list of those
+    (`[a, b]` or `- a` lines). Returns the same dict yaml.safe_load() would,
+    or None if the frontmatter uses anything else.
+    """
+    # Tabs, control characters and the like are left to PyYAML
+    if not fm.replace('\n', '').isprintable():
+        return None
+    data: Dict[str, Any] = {}
+    key = None      # key of a `key:` line that may start a block list
+    items = None    # that block list, and the indent of its "- " lines
+    indent = None
+    for line in fm.split('\n'):
+        if not line.strip(' ') or line.lstrip(' ')[0] == '#':
+            continue
+        stripped = line.lstrip(' ')
+        if key is not None and stripped[:2] == '- ':
+            prefix = len(line) - len(stripped)
+            if indent is None:
+                indent = prefix
+            if prefix != indent:
+                return None
+            item = _flat_scalar(stripped[2:], in_list=True)
+            if item is _COMPLEX:
+                return None
+            items.append(item)
+            data[key] = items
+            continue
+
+        match = _FLAT_KEY.match(line)
+        if not match or match.group(1).lower() in _YAML_WORDS:
+            return None
+        name, value = match.groups()
+        key, items, indent = None, None, None
+        if not value or not value.strip(' '):
+            data[name] = None
+            key, items = name, []
+            continue
+        value = value.strip(' ')
+        if value[0] == '[':
+            if value[-1] != ']':
+                return None
+            inner = value[1:-1]
+            parsed = [_flat_scalar(item, in_list=True) for item in inner.split(',')] \
+                if inner.strip(' ') else []
+            if any(item is _COMPLEX for item in parsed):
+                return None
+            data[name] = parsed
+        else:
+            scalar = _flat_scalar(value)
+            if scalar is _COMPLEX:
+                return None
+            data[name] = scalar
+    return data
+
+
+def read_frontmatter(text: str) -> Tuple[Dict[str, Any], str]:
+    """
+    Split a Markdown file into frontmatter metadata and body content.
+
+    Same result as frontmatter.loads(), but flat `key: value` headers like
+    the one in the importer's docstring are read without a full YAML parse.
+    Anything else (nested mappings, anchors, numbers, multi-line values...)
+    goes through python-frontmatter and PyYAML as before.
+
+    Args:
+        text: File contents
+
+    Returns:
+        (metadata, content) tuple
+    """
+    text = text.replace('\r\n', '\n')
+    if _FM_BOUNDARY.match(text):
+        parts = _FM_BOUNDARY.split(text.strip(), 2)
+        if len(parts) == 3:
+            metadata = _load_flat_yaml(parts[1])
+            if metadata is not None:
+                return metadata, parts[2].strip()
+
+    post = frontmatter.loads(text)
+    return dict(post.metadata), post.content
+
+
+def format_frontmatter(metadata: Dict[str, Any]) -> str:
+    """
+    Write a flat frontmatter header that read_frontmatter() reads back to
+    the same values, usually without needing PyYAML.
+
+    Strings are written plain when YAML would read them back unchanged and
+    double-quoted otherwise, dates as YYYY-MM-DD and lists in [a, b] form.
+    None values are left out.
+
+    Args:
+        metadata: Flat mapping of strings, dates and lists of strings
+
+    Returns:
+        The header, from the opening "---" line to the closing one
+    """
+    lines = ['---']
+    for key, value in metadata.items():
+        if value is not None:
+            lines.append(f"{key}: {_format_scalar(value)}")
+    lines.append('---')
+    return '\n'.join(lines) + '\n'
+
+
+def _format_scalar(value: Any, in_list: bool = False) -> str:
+    if isinstance(value, (date, datetime)):
+        return value.strftime('%Y-%m-%d')
+    if isinstance(value, (list, tuple)):
+        return '[' + ', '.join(_format_scalar(item, in_list=True) for item in value) + ']'
+    value = str(value)
+    if value.isprintable() and value.strip() == value and _flat_scalar(value, in_list) == value:
+        return value
+    # A JSON string is also a valid double-quoted YAML scalar; line
+    # separators YAML would fold (U+0085, U+2028...) are left escaped
+    return json.dumps(value, ensure_ascii=not value.isprintable())
+
+
+def parse_markdown_file(file_path: Path, raw: Optional[bytes] = None) -> Dict[str, Any]:
+    """
+    Parse a Markdown file with YAML frontmatter.
+
+    Args:
+        file_path: Path to the Markdown file
+        raw: The file's bytes, if they have been read already
+
+    Returns:
+        Dictionary with 'metadata', 'content' and 'content_hash' (SHA-256 of
+        the raw file) keys
+
+    Raises:
+        OSError, UnicodeDecodeError or a YAML error if the file can't be read
+    """
+    if raw is None:
+        with open(file_path, 'rb') as f:
+            raw = f.read()
+    metadata, content = read_frontmatter(raw.decode('utf-8'))
+
+    return {
+        'metadata': metadata,
+        'content': content,
+        'content_hash': hashlib.sha256(raw).hexdigest(),
+        'file_path': str(file_path)
+    }
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Streaming Large Files
+# ─────────────────────────────────────────────────────────────────────────────
+
+# Bytes hashed at a time when scanning a large file
+_READ_CHUNK = 1024 * 1024
+
+# Frontmatter longer than this isn't looked for; the file is read whole
+_MAX_HEADER_SIZE = 64 * 1024
+
+
+def scan_markdown_file(file_path: Path) -> Optional[Dict[str, Any]]:
+    """
+    Parse a file's frontmatter and hash it without holding the body.
+
+    The body is read a chunk at a time to be hashed and checked to be
+    valid UTF-8, so a broken file fails here as it would when read whole.
+    iter_body_blocks() converts the body later, straight from the file.
+
+    Args:
+        file_path: Path to the Markdown file
+
+    Returns:
+        Dictionary with 'metadata', 'content_hash' and 'body_offset' (where
+        the body starts, in bytes) keys, or None if the file doesn't start
+        with a frontmatter header of at most 64 KB
+
+    Raises:
+        OSError, UnicodeDecodeError or a YAML error if the file can't be read
+    """
+    digest = hashlib.sha256()
+    decoder = codecs.getincrementaldecoder('utf-8')()
+    with open(file_path, 'rb') as f:
+        header = _read_header(f, digest, decoder)
+        if header is None:
+            return None
+        metadata, _ = read_frontmatter(header)
+        body_offset = f.tell()
+
+        while True:
+            chunk = f.read(_READ_CHUNK)
+            if not chunk:
+                break
+            digest.update(chunk)
+            decoder.decode(chunk)
+        decoder.decode(b'', final=True)
+
+    return {
+        'metadata': metadata,
+        'content_hash': digest.hexdigest(),
+        'body_offset': body_offset,
+    }
+
+
+def read_metadata(file_path: Path) -> Dict[str, Any]:
+    """
+    Just the frontmatter of a file, read without the body when the header
+    is at most 64 KB long.
+
+    Raises:
+        OSError, UnicodeDecodeError or a YAML error if the file can't be read
+    """
+    with open(file_path, 'rb') as f:
+        header = _read_header(f, hashlib.sha256(), codecs.getincrementaldecoder('utf-8')())
+    if header is None:
+        return parse_markdown_file(file_path)['metadata']
+    return read_frontmatter(header)[0]
+
+
+def _read_header(f, digest, decoder) -> Optional[str]:
+    """
+    Read the frontmatter lines at the start of a binary file, adding them
+    to the digest. None if there is no frontmatter within 64 KB.
+    """
+    header: List[str] = []
+    size = 0
+    while True:
+        line = f.readline(_MAX_HEADER_SIZE)
+        size += len(line)
+        if not line or size > _MAX_HEADER_SIZE:
+            return None
+        digest.update(line)
+        text = decoder.decode(line)
+        header.append(text)
+        if _FM_BOUNDARY.match(text):
+            if len(header) > 1:
+                return ''.join(header)
+        elif len(header) == 1:
+            return None  # no frontmatter
+
+
+def iter_body_blocks(file_path: Path, body_offset: int,
+                     max_block_size: int = MAX_TEXT_LENGTH, pack: bool = False) -> Iterator[Dict]:
+    """
+    Convert the body of a file found by scan_markdown_file() to Notion
+    blocks as it is read, about 64 KB at a time. With pack=True,
+    paragraphs are merged (see journal_markdown.pack_blocks()).
+    """
+    with open(file_path, 'rb') as f:
+        f.seek(body_offset)
+        with io.TextIOWrapper(f, encoding='utf-8', newline='') as text:
+            yield from iter_stream_blocks(text, max_block_size, pack)
+
+
+def parse_tags(tags_value: Any) -> List[str]:
+    """
+    Parse tags from various formats (string, list, comma-separated).
+
+    Tags are normalised (see journal_tags.normalize_tag()), and empty tags
+    and repeats differing only in case are dropped.
+
+    Args:
+        tags_value: Tags value from frontmatter (can be string or list)
+
+    Returns:
+        List of tag strings
+    """
+    if not tags_value:
+        return []
+
+    if isinstance(tags_value, list):
+        tags = tags_value
+    elif isinstance(tags_value, str):
+        # Split by comma and clean up
+        tags = tags_value.split(',')
+    else:
+        return []
+
+    seen = set()
+    result = []
+    for tag in tags:
+        tag = normalize_tag(tag)
+        if tag and tag_key(tag) not in seen:
+            seen.add(tag_key(tag))
+            result.append(tag)
+    return result
+
+
+# Year first: 2024-01-05 and 2024/1/5, optionally with an ISO 8601 time
+# (2024-01-05T09:30, 2024-01-05 09:30:00.5+02:00) whose date part is kept
+_YEAR_FIRST = re.compile(
+    r'([0-9]{4})([-/])([0-9]{1,2})\2([0-9]{1,2})'
+    r'(?:[T ][0-9]{1,2}:[0-9]{2}(?::[0-9]{2}(?:[.,][0-9]+)?)?'
+    r' ?(?:Z|[+-][0-9]{2}(?::?[0-9]{2})?)?)?$')
+# Day first: 05-01-2024 and 5/1/2024
+_DAY_FIRST = re.compile(r'([0-9]{1,2})([-/])([0-9]{1,2})\2([0-9]{4})$')
+
+# Distinct date strings remembered by _parse_date_text(); a journal repeats
+# the same few thousand days across its entries
+_DATE_CACHE_SIZE = 8192
+
+
+@functools.lru_cache(maxsize=_DATE_CACHE_SIZE)
+def _parse_date_text(text: str) -> Optional[str]:
+    """parse_date() for strings: one regex match instead of trying formats in turn."""
+    text = text.strip()
+    match = _YEAR_FIRST.match(text)
+    if match:
+        year, _, month, day = match.group(1, 2, 3, 4)
+    else:
+        match = _DAY_FIRST.match(text)
+        if not match:
+            return None
+        day, _, month, year = match.group(1, 2, 3, 4)
+    try:
+        return date(int(year), int(month), int(day)).isoformat()
+    except ValueError:
+        return None  # 2024-02-30
+
+
+def parse_date(date_value: Any) -> Optional[str]:
+    """
+    Parse date from various formats and return ISO format string.
+
+    Accepts date and datetime objects (PyYAML turns unquoted dates and
+    timestamps into these) and strings in YYYY-MM-DD, YYYY/MM/DD,
+    DD-MM-YYYY or DD/MM/YYYY format, or ISO 8601 with a time. Only the date
+    is kept: a timestamp's day is the day in its own timezone.
+
+    Args:
+        date_value: Date value from frontmatter
+
+    Returns:
+        ISO format date string (YYYY-MM-DD) or None
+    """
+    if not date_value:
+        return None
+
+    if isinstance(date_value, datetime):
+        date_value = date_value.date()
+    if isinstance(date_value, date):
+        return date_value.isoformat()
+
+    if isinstance(date_value, str):
+        return _parse_date_text(date_value)
+
+    return None
+
+
+def read_entry(file_path: Path, convert: bool = False,
+               max_block_size: int = MAX_TEXT_LENGTH,
+               stream_threshold: Optional[int] = None,
+               pack: bool = False, cache=None) -> Dict[str, Any]:
+    """
+    Read one journal entry into the fields the importer needs.
+
+    Args:
+        file_path: Path to the Markdown file
+        convert: Also convert the body to Notion blocks
+        max_block_size: Maximum characters per paragraph block
+        stream_threshold: Files bigger than this many bytes are only
+            scanned (see scan_markdown_file()): 'content' is left empty,
+            nothing is converted and 'body_offset' says where
+            iter_body_blocks() should start reading the body
+        pack: Merge consecutive paragraphs when converting (see
+            journal_markdown.pack_blocks())
+        cache: A journal_cache.ConversionCache. Implies convert: entries
+            it holds aren't parsed or converted again ('content' is left
+            empty, as the blocks are there), and the others are stored.
+            Streamed files aren't cached.
+
+    Returns:
+        Dictionary with 'title', 'tags', 'date', 'content', 'content_hash',
+        'blocks' (None unless convert is set), 'body_offset' (None unless
+        the file is streamed) and 'timings' (seconds spent in the read,
+        parse and convert stages) keys, plus 'cached' (whether the cache
+        had the entry) when a cache is used. On failure, 'error' holds the
+        message, next to 'timings'. Errors are returned rather than raised
+        so the result always pickles.
+    """
+    timings: Dict[str, float] = {}
+    started = time.perf_counter()
+    try:
+        if stream_threshold is not None and os.path.getsize(file_path) > stream_threshold:
+            scanned = scan_markdown_file(file_path)
+            if scanned is not None:
+                timings['read'] = time.perf_counter() - started
+                metadata = scanned['metadata']
+                return {
+                    'title': metadata.get('title', Path(file_path).stem),
+                    'tags': parse_tags(metadata.get('tags')),
+                    'date': parse_date(metadata.get('date')),
+                    'content': '',
+                    'content_hash': scanned['content_hash'],
+                    'blocks': None,
+                    'body_offset': scanned['body_offset'],
+                    'timings': timings,
+                }
+        with open(file_path, 'rb') as f:
+            raw = f.read()
+        read_done = time.perf_counter()
+        timings['read'] = read_done - started
+        content_hash = hashlib.sha256(raw).hexdigest()
+        if cache is not None:
+            cached = cache.get(content_hash, pack, max_block_size)
+            if cached is not None:
+                timings['parse'] = time.perf_counter() - read_done
+                return {
+                    'title': cached.get('title', Path(file_path).stem),
+                    'tags': cached['tags'],
+                    'date': cached['date'],
+                    'content': '',
+                    'content_hash': content_hash,
+                    'blocks': cached['blocks'],
+                    'body_offset': None,
+                    'timings': timings,
+                    'cached': True,
+                }
+        metadata, content = read_frontmatter(raw.decode('utf-8'))
+        entry = {
+            'title': metadata.get('title', Path(file_path).stem),
+            'tags': parse_tags(metadata.get('tags')),
+            'date': parse_date(metadata.get('date')),
+            'content': content,
+            'content_hash': content_hash,
+            'blocks': None,
+            'body_offset': None,
+            'timings': timings,
+        }
+    except Exception as e:
+        return {'error': str(e), 'timings': timings}
+    parse_done = time.perf_counter()
+    timings['parse'] = parse_done - read_done
+
+    if convert or cache is not None:
+        entry['blocks'] = content_to_notion_blocks(entry['content'], max_block_size, pack)
+        timings['convert'] = time.perf_counter() - parse_done
+    if cache is not None:
+        entry['cached'] = False
+        stored = {'tags': entry['tags'], 'date': entry['date'], 'blocks': entry['blocks']}
+        if 'title' in metadata:
+            stored['title'] = metadata['title']
+        cache.put(content_hash, pack, max_block_size, stored)
+    return entry
+
+
+def read_entries(file_paths: Sequence[Path],
+                 stream_threshold: Optional[int] = None,
+                 pack: bool = False, cache=None) -> List[Dict[str, Any]]:
+    """
+    Read and convert a chunk of entries; the unit of work of the process
+    pool parse stage (one round-trip to a worker per chunk, not per file).
+    Files over stream_threshold bytes are only scanned, as in read_entry().
+    """
+    return [read_entry(file_path, convert=True, stream_threshold=stream_threshold, pack=pack,
+                       cache=cache)
+            for file_path in file_paths]
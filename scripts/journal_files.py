@@ -0,0 +1,142 @@
+"""
+Finding journal entries on disk for the Notion import scripts.
+
+The journal tree is walked with os.scandir() as a generator, so callers can
+start on the first entry while the rest of a large (or network-mounted)
+tree is still being listed. Year and month folders older than a cutoff
+are skipped without being opened.
+"""
+
+import os
+import re
+from pathlib import Path
+from typing import Iterator, NamedTuple, Optional, Tuple
+
+# "2024", "2024-06", "2024_06 June"...: a year folder, maybe with a month
+_YEAR_DIR = re.compile(r'(\d{4})(?:[-_](\d{1,2}))?(?!\d)')
+
+# "06", "6", "06-June"...: a month folder inside a year folder
+_MONTH_DIR = re.compile(r'(\d{1,2})(?!\d)')
+
+_SINCE = re.compile(r'(\d{4})(?:-(\d{1,2}))?$')
+
+
+class JournalFile(NamedTuple):
+    """A Markdown file, usually found by iter_markdown_files()."""
+    path: Path
+    entry: Optional[os.DirEntry] = None
+
+    def stat(self) -> os.stat_result:
+        """The file's stat, cached by the directory scan if there was one."""
+        if self.entry is None:
+            return os.stat(self.path)
+        return self.entry.stat()
+
+
+def parse_since(value: str) -> Tuple[int, int]:
+    """
+    Parse a --since value ("YYYY" or "YYYY-MM") into a (year, month) tuple.
+
+    Raises:
+        ValueError: if the value isn't a year or a year and month
+    """
+    match = _SINCE.match(value.strip())
+    if not match:
+        raise ValueError(f"expected YYYY or YYYY-MM, got {value!r}")
+    year, month = int(match.group(1)), int(match.group(2) or 1)
+    if not 1 <= month <= 12:
+        raise ValueError(f"month out of range in {value!r}")
+    return year, month
+
+
+def _too_old(name: str, year: Optional[int],
+             since: Tuple[int, int]) -> Tuple[bool, Optional[int]]:
+    """
+    Whether a folder is entirely before `since`, judging by its name.
+
+    Args:
+        name: Folder name
+        year: Year of the parent folder, if it is a plain year folder
+        since: (year, month) cutoff
+
+    Returns:
+        (too_old, year) where year is set when the folder is a plain year
+        folder, so its month folders can be judged too
+    """
+    match = _YEAR_DIR.match(name)
+    if match:
+        folder_year = int(match.group(1))
+        if match.group(2):
+            return (folder_year, int(match.group(2))) < since, None
+        return folder_year < since[0], folder_year
+    if year is not None:
+        match = _MONTH_DIR.match(name)
+        if match and 1 <= int(match.group(1)) <= 12:
+            return (year, int(match.group(1))) < since, None
+    return False, None
+
+
+def iter_markdown_files(root_path: str,
+                        since: Optional[Tuple[int, int]] = None,
+                        after: Optional[str] = None) -> Iterator[JournalFile]:
+    """
+    Recursively yield the Markdown files below a directory.
+
+    Files come out in the same order as sorted(glob("**/*.md")), and hidden
+    files and folders are skipped like glob does, but each folder is only
+    listed when the walk reaches it.
+
+    Args:
+        root_path: Root directory to search
+        since: (year, month) cutoff. Year folders ("2023") and month
+            folders ("2024/05", "2024-05") entirely before it are pruned;
+            files outside dated folders are always included.
+        after: Path of a file (relative to root_path) to resume after. Only
+            files that come later in the walk are yielded, and folders that
+            come entirely before it are skipped without being listed.
+
+    Yields:
+        JournalFile for each .md file found
+    """
+    # The walk is in path order, so resuming is a string comparison
+    resume_at = os.path.join(root_path, after) if after else None
+
+    # One (sorted listing, year if it is a year folder) per open folder
+    stack = [(iter(_listing(root_path)), None)]
+    while stack:
+        entries, year = stack[-1]
+        entry = next(entries, None)
+        if entry is None:
+            stack.pop()
+        elif entry.is_dir():
+            if resume_at is not None and _done_before(entry.path + os.sep, resume_at):
+                continue
+            folder_year = None
+            if since is not None:
+                too_old, folder_year = _too_old(entry.name, year, since)
+                if too_old:
+                    continue
+            stack.append((iter(_listing(entry.path)), folder_year))
+        elif entry.name.endswith('.md') and entry.is_file():
+            if resume_at is not None:
+                if entry.path <= resume_at:
+                    continue
+                resume_at = None  # everything from here on is new
+            yield JournalFile(Path(entry.path), entry)
+
+
+def _done_before(folder: str, resume_at: str) -> bool:
+    """Whether every path in a folder ("a/b/") sorts before resume_at."""
+    return folder < resume_at and not resume_at.startswith(folder)
+
+
+def _listing(directory: str) -> list:
+    """A folder's visible entries, in glob's sorted-path order."""
+    try:
+        with os.scandir(directory) as scan:
+            entries = [entry for entry in scan if not entry.name.startswith('.')]
+    except OSError:
+        return []  # unreadable folders are skipped, as glob does
+    # glob sorts full paths, so a folder sorts as "name/"
+    entries.sort(key=lambda entry: entry.name + '/' if entry.is_dir() else entry.name)
+    return entries
@@ -0,0 +1,1952 @@
+"""
+Bulk import of Markdown journal entries into a Notion database.
+
+The importer behind import-journal-to-notion.py. Nothing is checked and no
+Notion client is created at import time: settings come from the
+environment (and .env) and can be changed with configure(), and the client
+is made on the first request.
+
+This module runs the import and holds what every part of it shares: the
+client, rate limiter, running totals and log. The rest lives beside it:
+
+    journal_state    the manifest, dead-letter file and checkpoint
+    journal_sync     updating pages in place, for --sync
+    journal_service  JournalImporter for other Python code, and --serve
+
+See import-journal-to-notion.py for the settings and options.
+"""
+
+import os
+import sys
+import json
+import time
+import signal
+import argparse
+import threading
+import multiprocessing
+from collections import deque
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import contextmanager, redirect_stdout
+from dataclasses import dataclass, field
+from pathlib import Path
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Any
+from dotenv import load_dotenv
+
+from journal_cache import ConversionCache
+from journal_entries import iter_body_blocks, read_entry, read_entries, read_metadata, parse_tags
+from journal_files import JournalFile, iter_markdown_files, parse_since
+from journal_markdown import MAX_BLOCKS_PER_REQUEST, content_to_notion_blocks, plain_text
+from journal_metrics import EventLog, Metrics
+from journal_schedule import ORDERS, schedule, sort_key
+from journal_state import DeadLetterFile, ImportCheckpoint, ImportManifest
+from journal_sync import PageSync
+from journal_tags import TagRegistry
+from journal_uploads import FileUploader, resolve_files
+from journal_watch import Debouncer, open_watcher
+from notion_api import FileUploadsEndpoint, LazyClient, RetryBudget, RunningTotal, TokenBucket, \
+    call_with_retries
+
+# Load environment variables
+load_dotenv()
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Configuration
+# ─────────────────────────────────────────────────────────────────────────────
+
+NOTION_TOKEN = os.getenv("NOTION_TOKEN")
+NOTION_JOURNAL_DB_ID = os.getenv("NOTION_JOURNAL_DB_ID")
+JOURNAL_ROOT_PATH = os.getenv("JOURNAL_ROOT_PATH", "./Journal")
+NOTION_REQUESTS_PER_SECOND = float(os.getenv("NOTION_REQUESTS_PER_SECOND", "3"))
+NOTION_MAX_RETRIES = int(os.getenv("NOTION_MAX_RETRIES", "5"))
+NOTION_BASE_URL = os.getenv("NOTION_BASE_URL", "https://api.notion.com")
+JOURNAL_STREAM_THRESHOLD_MB = float(os.getenv("JOURNAL_STREAM_THRESHOLD_MB", "8"))
+STREAM_THRESHOLD = int(JOURNAL_STREAM_THRESHOLD_MB * 1024 * 1024)
+JOURNAL_CACHE_SIZE_MB = float(os.getenv("JOURNAL_CACHE_SIZE_MB", "256"))
+
+# Created on the first request (see notion_api.LazyClient)
+notion = LazyClient(auth=NOTION_TOKEN, base_url=NOTION_BASE_URL)
+
+
+def configure(token: Optional[str] = None, database_id: Optional[str] = None,
+              root_path: Optional[str] = None, base_url: Optional[str] = None) -> None:
+    """
+    Override settings read from the environment. Arguments left as None
+    keep their current value.
+
+    Args:
+        token: Notion integration token (NOTION_TOKEN)
+        database_id: ID of the journal database (NOTION_JOURNAL_DB_ID)
+        root_path: Folder to import from (JOURNAL_ROOT_PATH)
+        base_url: API server (NOTION_BASE_URL)
+    """
+    global NOTION_TOKEN, NOTION_JOURNAL_DB_ID, JOURNAL_ROOT_PATH, NOTION_BASE_URL
+    NOTION_TOKEN = token if token is not None else NOTION_TOKEN
+    NOTION_JOURNAL_DB_ID = database_id if database_id is not None else NOTION_JOURNAL_DB_ID
+    JOURNAL_ROOT_PATH = root_path if root_path is not None else JOURNAL_ROOT_PATH
+    NOTION_BASE_URL = base_url if base_url is not None else NOTION_BASE_URL
+    if token is not None or base_url is not None:
+        notion.configure(auth=NOTION_TOKEN, base_url=NOTION_BASE_URL)
+
+
+def missing_settings() -> List[str]:
+    """The required environment variables that are not set."""
+    return [name for name, value in (("NOTION_TOKEN", NOTION_TOKEN),
+                                     ("NOTION_JOURNAL_DB_ID", NOTION_JOURNAL_DB_ID))
+            if not value]
+
+
+def default_paths() -> Dict[str, str]:
+    """Where the manifest, dead-letter file, checkpoint and cache go unless told otherwise."""
+    return {
+        "manifest": os.getenv(
+            "JOURNAL_MANIFEST_PATH", os.path.join(JOURNAL_ROOT_PATH, ".notion-import.sqlite")),
+        "dead_letter": os.getenv(
+            "JOURNAL_DEAD_LETTER_PATH",
+            os.path.join(JOURNAL_ROOT_PATH, ".notion-import-failed.jsonl")),
+        "checkpoint": os.getenv(
+            "JOURNAL_CHECKPOINT_PATH",
+            os.path.join(JOURNAL_ROOT_PATH, ".notion-import.checkpoint.jsonl")),
+        "cache": os.getenv(
+            "JOURNAL_CACHE_PATH",
+            os.path.join(os.getenv("XDG_CACHE_HOME", os.path.expanduser("~/.cache")),
+                         "notion-journal-import", "conversions.sqlite")),
+    }
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Rate Limiting & Worker Output
+# ─────────────────────────────────────────────────────────────────────────────
+
+rate_limiter = TokenBucket(NOTION_REQUESTS_PER_SECOND)
+retry_budget = RetryBudget()
+
+
+def notion_request(method: Callable[..., Any], idempotent: bool = True, **kwargs) -> Any:
+    """
+    Call a Notion client endpoint once the shared rate limiter allows it.
+
+    Rate limits, conflicts, 5xx responses, timeouts and connection errors
+    are retried up to NOTION_MAX_RETRIES times (see
+    notion_api.call_with_retries()).
+
+    Args:
+        method: Bound client endpoint, e.g. notion.pages.create
+        idempotent: False for calls that must not run twice (creating a
+            page, appending blocks)
+        **kwargs: Arguments passed straight to the endpoint
+
+    Returns:
+        The endpoint's response
+
+    Raises:
+        The last error, once it is not retryable or retries run out
+    """
+    return call_with_retries(method, kwargs, rate_limiter, retry_budget, NOTION_MAX_RETRIES,
+                             idempotent=idempotent, retries=retries_made, metrics=metrics)
+
+
+retries_made = RunningTotal()
+blocks_written = RunningTotal()
+cache_hits = RunningTotal()
+
+# Stage timings and counters for --metrics and --events
+metrics = Metrics()
+
+# The Tags options of the database, and every tag seen this run
+tag_registry = TagRegistry("Tags")
+
+# Local images and files that entries refer to, each one uploaded once
+file_uploader = FileUploader(FileUploadsEndpoint(notion), notion_request, metrics=metrics)
+
+# Rich-text properties that tie a page to the file it came from
+CONTENT_HASH_PROPERTY = "Content Hash"
+SOURCE_PATH_PROPERTY = "Source Path"
+
+# Notion rejects request bodies over 500 KB. Batches stop at this many
+# characters of block JSON, which leaves room for the page properties.
+MAX_REQUEST_SIZE = 400_000
+
+
+def block_batches(blocks: Iterable[Dict]) -> Iterator[List[Dict]]:
+    """
+    Split blocks into request-sized lists, taking them lazily from an iterator.
+
+    A batch holds at most 100 blocks and MAX_REQUEST_SIZE characters of
+    JSON, so that packed blocks (--pack) or text that JSON escapes, such as
+    CJK, don't make a request too large.
+    """
+    batch: List[Dict] = []
+    size = 0
+    for block in blocks:
+        block_size = len(json.dumps(block))
+        if batch and (len(batch) >= MAX_BLOCKS_PER_REQUEST
+                      or size + block_size > MAX_REQUEST_SIZE):
+            yield batch
+            batch, size = [], 0
+        batch.append(block)
+        size += block_size
+    if batch:
+        yield batch
+
+
+def append_blocks(block_id: str, blocks: Iterable[Dict], after: Optional[str] = None) -> Optional[str]:
+    """
+    Append blocks to a page or block in batches of 100.
+
+    Batches for one page are sent back to back, because each one has to land
+    after the previous one. Batches from different workers interleave behind
+    the shared rate limiter. A generator of blocks is only consumed one
+    batch ahead.
+
+    Args:
+        block_id: Parent page or block ID
+        blocks: Blocks to append
+        after: Insert after this child instead of at the end
+
+    Returns:
+        ID of the last block appended (or `after` if there was nothing to send)
+    """
+    for batch in block_batches(blocks):
+        request = {"block_id": block_id, "children": batch}
+        if after:
+            request["after"] = after
+        with metrics.time("append"):
+            response = notion_request(notion.blocks.children.append, idempotent=False,
+                                      **request)
+        blocks_written.add(len(batch))
+        results = response.get("results", [])
+        if results:
+            after = results[-1]["id"]
+    return after
+
+
+_output = threading.local()
+
+
+def log(message: str = "") -> None:
+    """
+    Print a progress line, or buffer it when running inside a worker.
+
+    Workers finish out of order, so their lines are collected per file and
+    printed by the main thread in file order.
+    """
+    lines = getattr(_output, "lines", None)
+    if lines is None:
+        print(message)
+    else:
+        lines.append(message)
+
+
+@contextmanager
+def capture_log(lines: List[str]):
+    """Redirect log() calls made by the current thread into `lines`."""
+    previous = getattr(_output, "lines", None)
+    _output.lines = lines
+    try:
+        yield lines
+    finally:
+        _output.lines = previous
+
+
+# Brings existing pages in line with their files, for --sync
+page_sync = PageSync(notion, notion_request, append_blocks, file_uploader, metrics=metrics,
+                     blocks_written=blocks_written, log=log)
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Helper Functions
+# ─────────────────────────────────────────────────────────────────────────────
+
+def find_markdown_files(root_path: str) -> List[Path]:
+    """
+    Recursively find all Markdown files in the given directory.
+    
+    Args:
+        root_path: Root directory to search
+        
+    Returns:
+        List of Path objects for all .md files found
+    """
+    return [found.path for found in iter_markdown_files(root_path)]
+
+
+def build_page_properties(title: str, tags: List[str], date: Optional[str],
+                          clear_missing: bool = False,
+                          content_hash: Optional[str] = None,
+                          source_path: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Build the Notion property values for a journal entry.
+    
+    Args:
+        title: Page title
+        tags: List of tags
+        date: Date string (YYYY-MM-DD)
+        clear_missing: Send empty Tags/Date values instead of leaving them
+            out, so an update removes values deleted from the file
+        content_hash: SHA-256 of the file, stored in the Content Hash
+            property for deduplication
+        source_path: The file's path relative to the journal root, stored
+            in the Source Path property
+        
+    Returns:
+        Properties dict for pages.create / pages.update
+    """
+    properties = {
+        "Name": {  # Assuming the title property is named "Name"
+            "title": [
+                {
+                    "type": "text",
+                    "text": {"content": title}
+                }
+            ]
+        }
+    }
+    
+    # Add tags if present (pages share one {"name": tag} dict per tag)
+    if tags or clear_missing:
+        properties["Tags"] = tag_registry.multi_select(tags)
+    
+    # Add date if present
+    if date:
+        properties["Date"] = {
+            "date": {"start": date}
+        }
+    elif clear_missing:
+        properties["Date"] = {"date": None}
+
+    # Dedupe keys, only sent once the database has the properties
+    if content_hash:
+        properties[CONTENT_HASH_PROPERTY] = _rich_text_value(content_hash)
+    if source_path:
+        properties[SOURCE_PATH_PROPERTY] = _rich_text_value(source_path)
+    
+    return properties
+
+
+def _rich_text_value(text: str) -> Dict[str, Any]:
+    return {"rich_text": [{"type": "text", "text": {"content": text}}]}
+
+
+def create_notion_page(database_id: str, title: str, tags: List[str], 
+                       date: Optional[str], content: str, file_path: str,
+                       blocks: Optional[Iterable[Dict]] = None,
+                       content_hash: Optional[str] = None,
+                       source_path: Optional[str] = None,
+                       pack: bool = False, upload_files: bool = True,
+                       uploads: Optional[Dict[str, str]] = None) -> Optional[str]:
+    """
+    Create a page in the Notion database.
+    
+    Args:
+        database_id: Notion database ID
+        title: Page title
+        tags: List of tags
+        date: Date string (YYYY-MM-DD)
+        content: Page content
+        file_path: Original file path (for reference)
+        blocks: content already converted to Notion blocks, if available.
+            May be a generator, e.g. from iter_body_blocks(): it is read 100
+            blocks at a time as they are sent.
+        content_hash: File hash for the Content Hash property, if used
+        source_path: Relative path for the Source Path property, if used
+        pack: Merge consecutive paragraphs when converting the content
+        upload_files: Upload the local images and files the content refers
+            to (relative to file_path), instead of keeping them as text
+        uploads: Filled in with upload key → upload ID of the files uploaded
+        
+    Returns:
+        The new page's ID if successful, None otherwise
+    """
+    try:
+        properties = build_page_properties(title, tags, date, content_hash=content_hash,
+                                           source_path=source_path)
+        
+        # Convert content to Notion blocks
+        if blocks is None:
+            with metrics.time("convert"):
+                blocks = content_to_notion_blocks(content, pack=pack)
+        blocks = resolve_files(blocks, os.path.dirname(file_path),
+                               file_uploader if upload_files else None, uploads, warn=log,
+                               root=JOURNAL_ROOT_PATH)
+        batches = block_batches(blocks)
+        
+        # Create the page with the first 100 blocks (Notion API limit for
+        # initial creation)
+        first = next(batches, [])
+        with metrics.time("create"):
+            response = notion_request(
+                notion.pages.create,
+                idempotent=False,
+                parent={"database_id": database_id},
+                properties=properties,
+                children=first
+            )
+        page_id = response["id"]
+        blocks_written.add(len(first))
+        
+    except Exception as e:
+        log(f"   ❌ Failed to create page: {e}")
+        return None
+
+    # Stream the rest of the content in 100-block batches
+    try:
+        written = len(first)
+        for batch in batches:
+            append_blocks(page_id, batch)
+            written += len(batch)
+        if written > len(first):
+            log(f"   🧱 Wrote {written} blocks")
+    except Exception as e:
+        log(f"   ❌ Failed to append blocks: {e}")
+        # Archive the partial page so the next run creates it again
+        try:
+            notion_request(notion.pages.update, page_id=page_id, archived=True)
+        except Exception as archive_error:
+            log(f"   ⚠️  Failed to archive partial page {page_id}: {archive_error}")
+        return None
+
+    return page_id
+
+
+def check_if_page_exists(database_id: str, title: str) -> Optional[str]:
+    """
+    Check if a page with the given title already exists in the database.
+    
+    Args:
+        database_id: Notion database ID
+        title: Page title to search for
+        
+    Returns:
+        ID of the existing page, or None if there is none
+
+    Raises:
+        The API error if the query fails, so a failed check is never
+        mistaken for "no such page" (which would create a duplicate)
+    """
+    results = notion_request(
+        notion.databases.query,
+        database_id=database_id,
+        filter={
+            "property": "Name",
+            "title": {
+                "equals": title
+            }
+        }
+    )
+    pages = results.get("results", [])
+    return pages[0]["id"] if pages else None
+
+
+class TitleIndex:
+    """
+    Thread-safe map of page titles in the database to their page IDs.
+
+    Filled once by fetch_existing_titles() and kept up to date as pages are
+    created, so every duplicate check is answered locally.
+    """
+
+    def __init__(self):
+        self._pages: Dict[str, Optional[str]] = {}
+        self._lock = threading.Lock()
+
+    def __contains__(self, title: str) -> bool:
+        with self._lock:
+            return title in self._pages
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._pages)
+
+    def get(self, title: str) -> Optional[str]:
+        """Return the page ID for `title`, or None if unknown."""
+        with self._lock:
+            return self._pages.get(title)
+
+    def add(self, title: str, page_id: Optional[str] = None) -> None:
+        """Record a title, optionally with the ID of the page that owns it."""
+        with self._lock:
+            if page_id or title not in self._pages:
+                self._pages[title] = page_id
+
+    def discard(self, title: str) -> None:
+        """Forget a title."""
+        with self._lock:
+            self._pages.pop(title, None)
+
+
+def page_title(page: Dict[str, Any], property_name: str = "Name") -> str:
+    """Return the plain-text title of a page object from the Notion API."""
+    title_parts = page.get("properties", {}).get(property_name, {}).get("title", [])
+    return "".join(part.get("plain_text", "") for part in title_parts)
+
+
+def fetch_existing_titles(database_id: str, page_size: int = 100) -> TitleIndex:
+    """
+    Page through the whole database once and index every page title.
+
+    Only the title property is requested, so each query returns 100 pages
+    with little payload.
+
+    Args:
+        database_id: Notion database ID
+        page_size: Pages per query (Notion maximum is 100)
+
+    Returns:
+        TitleIndex of every existing page
+    """
+    index = TitleIndex()
+    start_cursor = None
+
+    while True:
+        query = {"database_id": database_id, "page_size": page_size,
+                 "filter_properties": ["title"]}
+        if start_cursor:
+            query["start_cursor"] = start_cursor
+        results = notion_request(notion.databases.query, **query)
+
+        for page in results.get("results", []):
+            index.add(page_title(page), page["id"])
+
+        if not results.get("has_more"):
+            return index
+        start_cursor = results.get("next_cursor")
+
+
+def collect_tags(md_files: Iterable[JournalFile],
+                 manifest: Optional["ImportManifest"] = None) -> List[str]:
+    """
+    Read the tags of every file, from the frontmatter only.
+
+    Files the manifest lists as unchanged won't be imported and are left
+    out, and files that can't be read are left for the import to report.
+    """
+    tags: List[str] = []
+    for found in md_files:
+        try:
+            if manifest is not None and manifest.is_unchanged(found.path, found.stat()):
+                continue
+            tags.extend(parse_tags(read_metadata(found.path).get('tags')))
+        except Exception:
+            pass
+    return tags
+
+
+def create_tag_options(database_id: str, tags: Iterable[str]) -> List[str]:
+    """
+    Add the options the tags need to the database in a single schema update,
+    instead of Notion creating them one page at a time.
+
+    Returns:
+        The option names that were added
+    """
+    missing = tag_registry.missing(tags)
+    if missing:
+        database = notion_request(notion.databases.update, database_id=database_id,
+                                  properties=tag_registry.schema_update(missing))
+        tag_registry.load_schema(database)
+    return missing
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Content-Hash Index
+# ─────────────────────────────────────────────────────────────────────────────
+
+# Notion rounds last_edited_time to the minute, so each refresh of the cached
+# page index looks back a little before the previous one started
+PAGE_INDEX_OVERLAP = timedelta(minutes=2)
+
+
+class ContentIndex:
+    """
+    Thread-safe maps from content hash and from source path to page ID.
+
+    Built from the Content Hash and Source Path properties of the pages in
+    the database (see load_content_index()) and kept up to date as pages
+    are created or synced, so a file is matched to its own page, or found
+    to be a copy of another file's, without a query per file.
+    """
+
+    def __init__(self):
+        self._by_hash: Dict[str, str] = {}
+        self._by_path: Dict[str, str] = {}
+        self._hash_of_page: Dict[str, str] = {}
+        self._path_of_page: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def __contains__(self, content_hash: str) -> bool:
+        with self._lock:
+            return content_hash in self._by_hash
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._by_hash)
+
+    def page_for_hash(self, content_hash: str) -> Optional[str]:
+        """ID of the page holding this content, or None if unknown."""
+        with self._lock:
+            return self._by_hash.get(content_hash)
+
+    def page_for_path(self, source_path: str) -> Optional[str]:
+        """ID of the page created from this file, or None if unknown."""
+        with self._lock:
+            return self._by_path.get(source_path)
+
+    def path_of_page(self, page_id: str) -> Optional[str]:
+        """Source path of a page, or None if unknown."""
+        with self._lock:
+            return self._path_of_page.get(page_id)
+
+    def add(self, content_hash: Optional[str], source_path: Optional[str], page_id: str) -> None:
+        """Record a page's content hash and source path."""
+        with self._lock:
+            # A synced page no longer holds its old content
+            previous = self._hash_of_page.get(page_id)
+            if previous and previous != content_hash and self._by_hash.get(previous) == page_id:
+                del self._by_hash[previous]
+            if content_hash:
+                self._hash_of_page[page_id] = content_hash
+                self._by_hash[content_hash] = page_id
+            if source_path:
+                self._by_path[source_path] = page_id
+                self._path_of_page[page_id] = source_path
+
+
+def source_path(file_path: Path) -> str:
+    """A file's Source Path value: its path relative to the journal root."""
+    return Path(os.path.relpath(file_path, JOURNAL_ROOT_PATH)).as_posix()
+
+
+def _rich_text(page: Dict[str, Any], property_name: str) -> str:
+    parts = page.get("properties", {}).get(property_name, {}).get("rich_text", [])
+    return "".join(part.get("plain_text", "") for part in parts)
+
+
+def add_dedupe_properties(database_id: str, database: Dict[str, Any]) -> tuple:
+    """
+    Add the Content Hash and Source Path text properties to the database,
+    if it doesn't have them yet, in one schema update.
+
+    Args:
+        database_id: Notion database ID
+        database: The databases.retrieve response
+
+    Returns:
+        (schema, names of the properties added), where schema is the
+        updated database if anything was added
+
+    Raises:
+        ValueError if a property of either name exists with another type
+    """
+    properties = database.get("properties", {})
+    missing = {}
+    for name in (CONTENT_HASH_PROPERTY, SOURCE_PATH_PROPERTY):
+        prop = properties.get(name)
+        if prop is None:
+            missing[name] = {"rich_text": {}}
+        elif prop.get("type", "rich_text") != "rich_text":
+            raise ValueError(f'"{name}" is a {prop["type"]} property, it must be text')
+    if missing:
+        database = notion_request(notion.databases.update, database_id=database_id,
+                                  properties=missing)
+    return database, list(missing)
+
+
+def fetch_page_keys(database_id: str, property_ids: List[str],
+                    since: Optional[str] = None, page_size: int = 100) -> List[tuple]:
+    """
+    Page through the database and read each page's dedupe keys.
+
+    Only the title, Content Hash and Source Path properties are requested.
+
+    Args:
+        database_id: Notion database ID
+        property_ids: IDs of those three properties, for filter_properties
+        since: Only pages edited on or after this ISO 8601 time
+        page_size: Pages per query (Notion maximum is 100)
+
+    Returns:
+        (page_id, title, content_hash, source_path) for each page, with
+        None for an empty hash or path
+    """
+    rows = []
+    start_cursor = None
+    while True:
+        query = {"database_id": database_id, "page_size": page_size,
+                 "filter_properties": property_ids}
+        if since:
+            query["filter"] = {"timestamp": "last_edited_time",
+                               "last_edited_time": {"on_or_after": since}}
+        if start_cursor:
+            query["start_cursor"] = start_cursor
+        results = notion_request(notion.databases.query, **query)
+
+        for page in results.get("results", []):
+            rows.append((page["id"], page_title(page),
+                         _rich_text(page, CONTENT_HASH_PROPERTY) or None,
+                         _rich_text(page, SOURCE_PATH_PROPERTY) or None))
+
+        if not results.get("has_more"):
+            return rows
+        start_cursor = results.get("next_cursor")
+
+
+def load_content_index(database_id: str, database: Dict[str, Any],
+                       manifest: Optional["ImportManifest"] = None) -> tuple:
+    """
+    Build the dedupe indexes for a run.
+
+    The manifest keeps a copy of every page's keys, so only the pages
+    edited since its last refresh are fetched. Without a manifest the whole
+    database is read. Pages imported before content hashes were stored are
+    indexed by title, so they are still recognised.
+
+    Args:
+        database_id: Notion database ID
+        database: The database schema, with the dedupe properties
+        manifest: Import manifest holding the cached page keys, if used
+
+    Returns:
+        (ContentIndex, TitleIndex of the pages without a hash, number of
+        pages fetched from Notion)
+    """
+    properties = database.get("properties", {})
+    property_ids = ["title"] + [properties.get(name, {}).get("id", name)
+                                for name in (CONTENT_HASH_PROPERTY, SOURCE_PATH_PROPERTY)]
+    since, rows = manifest.cached_pages() if manifest is not None else (None, [])
+    refresh_mark = _notion_time(datetime.now(timezone.utc) - PAGE_INDEX_OVERLAP)
+    fetched = fetch_page_keys(database_id, property_ids, since)
+    if manifest is not None:
+        manifest.save_pages(fetched, refresh_mark)
+
+    pages = {row[0]: row for row in rows}
+    pages.update((row[0], row) for row in fetched)
+    content_index, title_index = ContentIndex(), TitleIndex()
+    for page_id, title, content_hash, path in pages.values():
+        if content_hash:
+            content_index.add(content_hash, path, page_id)
+        else:
+            title_index.add(title, page_id)
+    return content_index, title_index, len(fetched)
+
+
+def _notion_time(moment: datetime) -> str:
+    return moment.isoformat(timespec="milliseconds").replace("+00:00", "Z")
+
+
+def _interrupt(signum, frame):
+    # SIGTERM unwinds like Ctrl+C, so the checkpoint and manifest get saved
+    raise KeyboardInterrupt
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Import Pipeline
+# ─────────────────────────────────────────────────────────────────────────────
+
+IMPORTED = "imported"
+UPDATED = "updated"
+SKIPPED = "skipped"
+FAILED = "failed"
+
+
+@dataclass
+class ImportJob:
+    """One Markdown file moving through the parse → dedupe → create pipeline."""
+    index: int
+    file_path: Path
+    title: Optional[str] = None
+    tags: List[str] = field(default_factory=list)
+    date: Optional[str] = None
+    content: str = ""
+    content_hash: Optional[str] = None
+    blocks: Optional[List[Dict]] = None
+    body_offset: Optional[int] = None  # set when the body is streamed from the file
+    stat: Optional[os.stat_result] = None
+    status: Optional[str] = None
+    unchanged: bool = False
+    page_id: Optional[str] = None
+    error: Optional[str] = None
+    log_lines: List[str] = field(default_factory=list)
+    timings: Dict[str, float] = field(default_factory=dict)  # seconds per stage
+    uploads: Dict[str, str] = field(default_factory=dict)  # upload key → upload ID
+    copy_of: Optional[Path] = None  # earlier file in the run with the same content
+    moved_from: Optional[str] = None  # old source path of the page a moved file takes over
+
+
+def prepare_job(job: ImportJob, pack: bool = False,
+                cache: Optional[ConversionCache] = None) -> ImportJob:
+    """
+    Parse a file and fill in the job's title, tags, date and content.
+
+    With a conversion cache, the blocks are filled in too: from the cache
+    if the file's content was converted before, else converted here and
+    stored. Sets job.status to FAILED if the file cannot be parsed.
+    """
+    if job.status is not None:
+        return job
+    return apply_entry(job, read_entry(job.file_path, stream_threshold=STREAM_THRESHOLD,
+                                       pack=pack, cache=cache))
+
+
+def apply_entry(job: ImportJob, entry: Dict[str, Any]) -> ImportJob:
+    """Fill in a job from a journal_entries.read_entry() result."""
+    for stage, seconds in entry.get('timings', {}).items():
+        metrics.observe(stage, seconds)
+        job.timings[stage] = job.timings.get(stage, 0.0) + seconds
+    if 'cached' in entry:
+        metrics.count("conversion_cache_total", result="hit" if entry['cached'] else "miss")
+        cache_hits.add(entry['cached'])
+    with capture_log(job.log_lines):
+        if 'error' in entry:
+            log(f"⚠️  Failed to parse {job.file_path}: {entry['error']}")
+            job.status = FAILED
+            job.error = f"Failed to parse: {entry['error']}"
+            return job
+
+        job.title = entry['title']
+        job.tags = tag_registry.canonical_tags(entry['tags'])
+        job.date = entry['date']
+        job.content = entry['content']
+        job.content_hash = entry['content_hash']
+        job.blocks = entry['blocks']
+        job.body_offset = entry['body_offset']
+
+        log(f"   Title: {job.title}")
+        log(f"   Tags: {', '.join(job.tags) if job.tags else 'None'}")
+        log(f"   Date: {job.date if job.date else 'None'}")
+    return job
+
+
+def import_job(job: ImportJob, check_remote: bool = True, sync: bool = False,
+               dedupe_keys: bool = False, pack: bool = False,
+               upload_files: bool = True) -> ImportJob:
+    """
+    Create the job's Notion page unless one with the same title exists.
+
+    Args:
+        job: Prepared job. job.page_id is set when the page is already
+            known from the manifest, a prefetched TitleIndex or the
+            ContentIndex.
+        check_remote: Query Notion for the title first. Not needed when the
+            titles were prefetched into a TitleIndex.
+        sync: Update an existing page in place instead of skipping it
+        dedupe_keys: Store the file's content hash and source path in the
+            page's Content Hash and Source Path properties
+        pack: Merge consecutive paragraphs into as few blocks as possible
+        upload_files: Upload the local images and files entries refer to
+    """
+    keys = {}
+    if dedupe_keys:
+        keys = {"content_hash": job.content_hash, "source_path": source_path(job.file_path)}
+    with capture_log(job.log_lines), metrics.collect(job.timings):
+        # Check if page already exists
+        if not job.page_id and check_remote:
+            try:
+                with metrics.time("dedupe"):
+                    job.page_id = check_if_page_exists(NOTION_JOURNAL_DB_ID, job.title)
+            except Exception as e:
+                log(f"   ❌ Failed to check for existing page: {e}")
+                job.status = FAILED
+                job.error = f"Failed to check for existing page: {e}"
+                job.content, job.blocks = "", None
+                log()
+                return job
+
+        if job.moved_from:
+            # Otherwise the next run takes a copy of the file for the one that moved
+            try:
+                notion_request(notion.pages.update, page_id=job.page_id,
+                               properties={SOURCE_PATH_PROPERTY: _rich_text_value(
+                                   source_path(job.file_path))})
+            except Exception as e:
+                log(f"   ❌ Failed to update the page's source path: {e}")
+                job.status = FAILED
+                job.error = f"Failed to update the page's source path: {e}"
+            else:
+                log(f"   ⏭️  Skipped (moved from {job.moved_from})")
+                job.status = SKIPPED
+            job.content, job.blocks = "", None
+            log()
+            return job
+
+        if job.page_id and sync:
+            blocks = job.blocks
+            if job.body_offset is not None:
+                # The diff needs every block at once, so large files aren't streamed here
+                blocks = list(_streamed_blocks(job, pack))
+            properties = build_page_properties(job.title, job.tags, job.date,
+                                               clear_missing=True, **keys)
+            changes = page_sync.sync_notion_page(job.page_id, properties, job.content,
+                                                 blocks=blocks, pack=pack,
+                                                 file_path=str(job.file_path),
+                                                 upload_files=upload_files,
+                                                 uploads=job.uploads, root=JOURNAL_ROOT_PATH)
+            if changes is None:
+                job.status = FAILED
+                job.error = _last_error(job.log_lines)
+            else:
+                log(f"   🔄 Updated in place ({changes} block change(s))")
+                job.status = UPDATED
+            job.content, job.blocks = "", None
+            log()
+            return job
+
+        if job.page_id:
+            log(f"   ⏭️  Skipped (already exists)")
+            job.status = SKIPPED
+            job.content, job.blocks = "", None
+            log()
+            return job
+
+        job.page_id = create_notion_page(
+            database_id=NOTION_JOURNAL_DB_ID,
+            title=job.title,
+            tags=job.tags,
+            date=job.date,
+            content=job.content,
+            file_path=str(job.file_path),
+            blocks=job.blocks if job.body_offset is None else _streamed_blocks(job, pack),
+            pack=pack,
+            upload_files=upload_files,
+            uploads=job.uploads,
+            **keys
+        )
+        if job.page_id:
+            log(f"   ✅ Imported successfully")
+            job.status = IMPORTED
+        else:
+            job.status = FAILED
+            job.error = _last_error(job.log_lines)
+        log()
+    # The body is no longer needed once the page has been sent
+    job.content, job.blocks = "", None
+    return job
+
+
+def _streamed_blocks(job: ImportJob, pack: bool = False) -> Iterator[Dict]:
+    """Blocks of a large file, converted as they are read, timed as "convert"."""
+    blocks = iter_body_blocks(job.file_path, job.body_offset, pack=pack)
+    spent = 0.0
+    try:
+        while True:
+            started = time.perf_counter()
+            block = next(blocks, None)
+            spent += time.perf_counter() - started
+            if block is None:
+                return
+            yield block
+    finally:
+        blocks.close()
+        metrics.observe("convert", spent)
+
+
+def _last_error(lines: List[str]) -> str:
+    # The page helpers log their error and return None
+    for line in reversed(lines):
+        if "❌" in line:
+            return line.replace("❌", "").strip()
+    return "Import failed"
+
+
+def _completed(job: ImportJob) -> "Future[ImportJob]":
+    future: "Future[ImportJob]" = Future()
+    future.set_result(job)
+    return future
+
+
+def _ordered_map(executor: ThreadPoolExecutor, fn: Callable[[ImportJob], ImportJob],
+                 jobs: Iterable[ImportJob], window: int) -> Iterator[ImportJob]:
+    """Like executor.map, but keeps at most `window` tasks in flight."""
+    pending: "deque[Future[ImportJob]]" = deque()
+    for job in jobs:
+        # Jobs that are already decided skip the thread hand-off
+        pending.append(executor.submit(fn, job) if job.status is None else _completed(job))
+        if len(pending) >= window:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+def _parse_in_processes(pool: Executor, jobs: Iterable[ImportJob],
+                        chunk_size: int, window: int, pack: bool = False,
+                        cache: Optional[ConversionCache] = None) -> Iterator[ImportJob]:
+    """
+    Like _ordered_map(pool, prepare_job, ...), but for a process pool.
+
+    Files are sent to the worker processes `chunk_size` at a time and come
+    back parsed and converted to blocks, ready to send. At most `window`
+    chunks are in flight, so only that many parsed files are held in memory.
+    """
+    pending: "deque[tuple]" = deque()  # (jobs, future of their entries)
+
+    def submit(chunk: List[ImportJob]) -> None:
+        paths = [job.file_path for job in chunk if job.status is None]
+        pending.append((chunk, pool.submit(read_entries, paths, STREAM_THRESHOLD, pack, cache)
+                            if paths else None))
+
+    def finished(chunk: List[ImportJob], future: Optional[Future]) -> List[ImportJob]:
+        entries = iter(future.result() if future is not None else ())
+        for job in chunk:
+            if job.status is None:
+                apply_entry(job, next(entries))
+        return chunk
+
+    chunk: List[ImportJob] = []
+    to_parse = 0
+    for job in jobs:
+        chunk.append(job)
+        # Jobs that are already decided only ride along to keep their place
+        to_parse += job.status is None
+        if to_parse >= chunk_size:
+            submit(chunk)
+            chunk, to_parse = [], 0
+            if len(pending) >= window:
+                yield from finished(*pending.popleft())
+    if chunk:
+        submit(chunk)
+    while pending:
+        yield from finished(*pending.popleft())
+
+
+def _new_jobs(md_files: Iterable[JournalFile],
+              manifest: Optional[ImportManifest]) -> Iterator[ImportJob]:
+    for i, found in enumerate(md_files, 1):
+        file_path = found.path
+        job = ImportJob(index=i, file_path=file_path)
+        if manifest is not None:
+            try:
+                job.stat = found.stat()
+            except OSError:
+                pass  # reported when the file fails to parse
+            else:
+                if manifest.is_unchanged(file_path, job.stat):
+                    job.status = SKIPPED
+                    job.unchanged = True
+        yield job
+
+
+# Files sent to a parse process at a time
+PARSE_CHUNK_SIZE = 16
+
+
+def run_import(md_files: Iterable[JournalFile], workers: int = 1,
+               title_index: Optional[TitleIndex] = None,
+               manifest: Optional[ImportManifest] = None,
+               sync: bool = False,
+               parse_processes: int = 0,
+               content_index: Optional[ContentIndex] = None,
+               pack: bool = False,
+               cache: Optional[ConversionCache] = None,
+               upload_files: bool = True,
+               order: str = "path",
+               leftover: Optional[List[ImportJob]] = None) -> Iterator[ImportJob]:
+    """
+    Import files across a pool of worker threads.
+
+    Parsing and the Notion round-trips run concurrently, but titles (or
+    content hashes) are claimed in import order on the calling thread and
+    jobs are yielded in import order, so the outcome matches a sequential
+    run. The import order is md_files' unless `order` says otherwise.
+
+    Args:
+        md_files: Files to import, from iter_markdown_files(). Read
+            lazily, so importing starts before the whole tree is listed.
+        workers: Number of worker threads
+        title_index: Prefetched titles. When given, duplicate checks are
+            answered from the index instead of one query per file.
+        manifest: Import manifest. Files it lists as unchanged are skipped
+            without being read and are yielded with job.unchanged set.
+        sync: Update changed files' existing pages instead of skipping them
+        parse_processes: Parse and convert files in this many worker
+            processes instead of the worker threads, so that YAML parsing
+            and block conversion aren't held back by the GIL
+        content_index: Dedupe by content hash and source path instead of
+            by title. title_index then only holds the pages that have no
+            content hash yet, and new pages get both properties set.
+        pack: Merge consecutive paragraphs into as few blocks as possible
+            (see journal_markdown.pack_blocks())
+        cache: Conversion cache. Files whose content was converted before
+            get their fields and blocks from it, without being parsed or
+            converted again.
+        upload_files: Upload the local images and files entries refer to
+            (see journal_uploads), instead of keeping them as text
+        order: "path" to import files in the order md_files has them, or
+            another of journal_schedule.ORDERS to reorder them (newest
+            first, smallest first or by `priority:` frontmatter) as they
+            are found
+        leftover: If the import is stopped early (the generator is closed,
+            or Ctrl+C interrupts it), the jobs whose requests were already
+            going out are finished and appended here instead of being
+            lost, so the caller can record them; see _drain()
+
+    Yields:
+        Finished ImportJob objects, in import order, numbered from 1
+    """
+    window = max(workers * 2, 2)
+    check_remote = title_index is None
+    claimed_titles = TitleIndex() if title_index is None else title_index
+    run_titles = set()  # titles owned by an earlier file in this run
+    in_flight: Dict[str, Future] = {}  # content hash → import of the first file with it
+    jobs = _new_jobs(md_files, manifest)
+    if order != "path":
+        jobs = _scheduled(jobs, order)
+    if content_index is not None:
+        record = lambda job: _record_content(content_index, job)
+    else:
+        record = lambda job: _record_page(claimed_titles, job)
+
+    with ThreadPoolExecutor(max_workers=workers) as executor, \
+            _parse_pool(parse_processes) as parse_pool:
+        if parse_pool is not None:
+            prepared = _parse_in_processes(parse_pool, jobs, PARSE_CHUNK_SIZE,
+                                           window=parse_processes * 2, pack=pack, cache=cache)
+        else:
+            prepared = _ordered_map(executor, lambda job: prepare_job(job, pack, cache),
+                                    jobs, window)
+
+        pending: "deque[Future[ImportJob]]" = deque()
+        try:
+            for job in prepared:
+                if (job.status is None and manifest is not None
+                        and manifest.has_content(job.file_path, job.content_hash)):
+                    # Touched since the last import, but the content is the same
+                    job.status = SKIPPED
+                    job.unchanged = True
+                if job.status is None:
+                    if manifest is not None:
+                        job.page_id = manifest.page_id(job.file_path)
+                    if content_index is not None:
+                        with metrics.time("dedupe"):
+                            _match_content(job, content_index, claimed_titles, sync)
+                    else:
+                        if not job.page_id:
+                            job.page_id = claimed_titles.get(job.title)
+                        if job.title in run_titles or (job.title in claimed_titles
+                                                       and not (sync and job.page_id)):
+                            job.log_lines.append(f"   ⏭️  Skipped (already exists)")
+                            job.log_lines.append("")
+                            job.status = SKIPPED
+                if job.status is None:
+                    import_args = (check_remote, sync, content_index is not None, pack,
+                                   upload_files)
+                    if content_index is None:
+                        run_titles.add(job.title)
+                        claimed_titles.add(job.title)
+                        future = executor.submit(import_job, job, *import_args)
+                    else:
+                        earlier = in_flight.get(job.content_hash)
+                        if earlier is None:
+                            future = executor.submit(import_job, job, *import_args)
+                        else:
+                            future = executor.submit(_import_copy, earlier, job, *import_args)
+                        in_flight[job.content_hash] = future
+                    pending.append(future)
+                else:
+                    pending.append(_completed(job))
+
+                while pending and (len(pending) > window or pending[0].done()):
+                    yield record(_landed(in_flight, pending.popleft()))
+
+            while pending:
+                yield record(_landed(in_flight, pending.popleft()))
+        finally:
+            finished = _drain(in_flight, pending)
+            if leftover is not None:
+                leftover.extend(record(job) for job in finished)
+
+
+def _drain(in_flight: Dict[str, Future],
+           pending: "deque[Future[ImportJob]]") -> List[ImportJob]:
+    """
+    The jobs an import stopped early still finishes. Those not started yet
+    are cancelled and those already running are waited for, up to the
+    first cancelled one, so that the files finished stay in import order
+    for the checkpoint.
+    """
+    for future in reversed(pending):
+        future.cancel()
+    finished = []
+    for future in pending:
+        if future.cancelled():
+            break
+        finished.append(_landed(in_flight, future))
+    return finished
+
+
+def _import_copy(earlier: "Future[ImportJob]", job: ImportJob, *import_args) -> ImportJob:
+    """
+    import_job() for a file with the same content as one that is still
+    being imported: skipped once that one has a page, imported if it failed.
+    """
+    first = earlier.result()  # submitted first, so it never waits on this thread
+    if first.status == FAILED:
+        return import_job(job, *import_args)
+    job.copy_of = first.copy_of or first.file_path
+    job.log_lines.append(f"   ⏭️  Skipped (same content as {source_path(job.copy_of)})")
+    job.log_lines.append("")
+    job.status = SKIPPED
+    return job
+
+
+def _landed(in_flight: Dict[str, Future], future: "Future[ImportJob]") -> ImportJob:
+    """
+    A finished job, no longer in flight. From here on its page is in the
+    ContentIndex, or, if it failed, the next copy of its content is
+    imported instead.
+    """
+    job = future.result()
+    if in_flight.get(job.content_hash) is future:
+        del in_flight[job.content_hash]
+    return job
+
+
+def _scheduled(jobs: Iterable[ImportJob], order: str) -> Iterator[ImportJob]:
+    """Jobs reordered by journal_schedule.schedule(), renumbered as they come out."""
+    def key(job: ImportJob) -> tuple:
+        if job.status is not None:
+            return ()  # unchanged, so nothing to read or send: hand it on first
+        try:
+            size = (job.stat or os.stat(job.file_path)).st_size
+            metadata = read_metadata(job.file_path)
+        except Exception:
+            size, metadata = 0, {}  # reported when the file is read for the import
+        return sort_key(order, source_path(job.file_path), size, metadata)
+
+    for index, job in enumerate(schedule(jobs, key), 1):
+        job.index = index
+        yield job
+
+
+@contextmanager
+def _parse_pool(processes: int):
+    if processes < 1:
+        yield None
+        return
+    # Don't fork: by now the process has worker and HTTP client threads
+    methods = multiprocessing.get_all_start_methods()
+    context = multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+    with ProcessPoolExecutor(max_workers=processes, mp_context=context) as pool:
+        yield pool
+
+
+def _record_page(title_index: TitleIndex, job: ImportJob) -> ImportJob:
+    if job.page_id:
+        title_index.add(job.title, job.page_id)
+    elif job.status == SKIPPED and job.title:
+        job.page_id = title_index.get(job.title)
+    return job
+
+
+def _match_content(job: ImportJob, content_index: ContentIndex,
+                   legacy_titles: TitleIndex, sync: bool) -> None:
+    """
+    Find the page a file already has: by its content hash, then by its
+    source path, then by title among the pages that have no hash yet.
+
+    A file with the same content as another file's page is skipped. If
+    that other file no longer exists, the file was moved and takes the
+    page over: it is claimed here, so that a copy later in the run is
+    skipped as a copy, and import_job() points the page's Source Path at
+    the new file. Sets job.status to SKIPPED when there is nothing to send.
+    """
+    path = source_path(job.file_path)
+    if job.content_hash in content_index:
+        owner = content_index.page_for_hash(job.content_hash)
+        owner_path = content_index.path_of_page(owner) if owner else None
+        if owner and (owner == job.page_id or owner_path == path):
+            note = "already exists"
+        elif owner_path and not os.path.exists(os.path.join(JOURNAL_ROOT_PATH, owner_path)):
+            job.page_id = owner
+            job.moved_from = owner_path
+            content_index.add(job.content_hash, path, owner)
+            return
+        else:
+            job.page_id = None  # its own page, if any, stays as it was
+            note = f"same content as {owner_path or 'another file'}"
+        job.log_lines.append(f"   ⏭️  Skipped ({note})")
+        job.log_lines.append("")
+        job.status = SKIPPED
+        return
+
+    if not job.page_id:
+        job.page_id = content_index.page_for_path(path)
+    if not job.page_id:
+        job.page_id = legacy_titles.get(job.title)
+        if job.page_id:
+            # Only one file takes over each page from before content hashes
+            legacy_titles.discard(job.title)
+    if job.page_id and not sync:
+        job.log_lines.append(f"   ⏭️  Skipped (already exists)")
+        job.log_lines.append("")
+        job.status = SKIPPED
+
+
+def _record_content(content_index: ContentIndex, job: ImportJob) -> ImportJob:
+    if job.page_id and job.status != FAILED:
+        content_index.add(job.content_hash, source_path(job.file_path), job.page_id)
+    return job
+
+
+@dataclass
+class ImportTotals:
+    """Files per outcome, for the summary and the "end" event."""
+    imported: int = 0
+    updated: int = 0
+    skipped: int = 0
+    unchanged: int = 0
+    failed: int = 0
+    total: int = 0
+
+    def add(self, job: ImportJob) -> None:
+        self.total += 1
+        if job.unchanged:
+            self.skipped += 1
+            self.unchanged += 1
+        elif job.status == IMPORTED:
+            self.imported += 1
+        elif job.status == UPDATED:
+            self.updated += 1
+        elif job.status == SKIPPED:
+            self.skipped += 1
+        else:
+            self.failed += 1
+
+    def merge(self, other: "ImportTotals") -> None:
+        for name, value in other.as_dict().items():
+            setattr(self, name, getattr(self, name) + value)
+
+    def as_dict(self) -> Dict[str, int]:
+        return dict(self.__dict__)
+
+
+def _finish_job(job: ImportJob, totals: ImportTotals, manifest: Optional[ImportManifest],
+                dead_letter: DeadLetterFile, checkpoint: Optional[ImportCheckpoint],
+                events: Optional[EventLog], verbose: bool) -> bool:
+    """
+    Record a finished job in the dead-letter file, manifest, checkpoint,
+    metrics and event stream, count it, and print its section.
+
+    Returns:
+        True when it is time to flush the checkpoint
+    """
+    if job.status == FAILED:
+        dead_letter.add(job.file_path, job.error or "Import failed")
+    else:
+        dead_letter.resolve(job.file_path)
+
+    if job.unchanged:
+        if job.content_hash:
+            manifest.record(job.file_path, job.stat, job.content_hash, None)
+    elif manifest is not None and job.status != FAILED and job.stat:
+        # An edit skipped because the file's page exists hasn't reached Notion:
+        # the content that did stays on record, so that --sync still sends it
+        edit_skipped = (job.status == SKIPPED and manifest.page_id(job.file_path) is not None
+                        and not manifest.has_content(job.file_path, job.content_hash))
+        if not edit_skipped:
+            manifest.record(job.file_path, job.stat, job.content_hash, job.page_id)
+    if job.uploads:
+        if job.status == FAILED:
+            # Uploads that no page was made with expire; send them again next time
+            file_uploader.forget(job.uploads)
+            if manifest is not None:
+                manifest.forget_uploads(job.uploads)
+        elif manifest is not None:
+            manifest.record_uploads(job.uploads)
+    flush = checkpoint is not None and checkpoint.record(job.file_path, job.status, job.page_id)
+    metrics.count("files_total", status="unchanged" if job.unchanged else job.status)
+    if events:
+        events.emit("file", index=job.index, path=str(job.file_path),
+                    status=job.status, unchanged=job.unchanged, title=job.title,
+                    page_id=job.page_id, error=job.error,
+                    timings={stage: round(seconds, 6)
+                             for stage, seconds in job.timings.items()})
+
+    totals.add(job)
+    # Unchanged files are only counted, not listed
+    if verbose and not job.unchanged:
+        print(f"[{job.index}] Processing: {job.file_path.name}")
+        for line in job.log_lines:
+            print(line)
+    return flush
+
+
+_counted = {"blocks_written_total": 0, "api_retries_total": 0}
+
+
+def _count_running_totals() -> None:
+    """Bring the blocks-written and retries counters up to date."""
+    for name, running in (("blocks_written_total", blocks_written),
+                          ("api_retries_total", retries_made)):
+        total = running.total
+        metrics.count(name, total - _counted[name])
+        _counted[name] = total
+
+
+def conversion_cache(args: argparse.Namespace) -> Optional[ConversionCache]:
+    """The run's conversion cache, or None with --no-cache."""
+    if args.no_cache:
+        return None
+    return ConversionCache(args.cache, int(JOURNAL_CACHE_SIZE_MB * 1024 * 1024))
+
+
+def close_cache(cache: Optional[ConversionCache]) -> None:
+    """Bring the conversion cache back under JOURNAL_CACHE_SIZE_MB and close it."""
+    if cache is None:
+        return
+    removed, freed = cache.prune()
+    cache.close()
+    if removed:
+        print(f"🧹 Removed {removed} old entries ({freed / 1024 / 1024:.1f} MB) "
+              f"from the conversion cache")
+
+
+def _since_arg(value: str) -> tuple:
+    try:
+        return parse_since(value)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    paths = default_paths()
+    parser = argparse.ArgumentParser(
+        description="Bulk import Markdown journal entries into a Notion database."
+    )
+    parser.add_argument(
+        "--workers", type=int, default=1, metavar="N",
+        help="number of files processed concurrently (default: 1). API calls "
+             "still share the NOTION_REQUESTS_PER_SECOND limit."
+    )
+    parser.add_argument(
+        "--dedupe", choices=("title", "hash"), default="title",
+        help="how files are matched to existing pages: by title, or by the "
+             "Content Hash and Source Path properties, which are added to the "
+             "database if needed (default: %(default)s)"
+    )
+    parser.add_argument(
+        "--prefetch-titles", action="store_true",
+        help="with --dedupe title: load every existing title from the "
+             "database once at startup instead of querying Notion for each file"
+    )
+    parser.add_argument(
+        "--create-tags", action="store_true",
+        help="read every file's tags first and add the missing Tags options "
+             "to the database in one schema update"
+    )
+    parser.add_argument(
+        "--manifest", default=paths["manifest"], metavar="PATH",
+        help="import manifest used to skip unchanged files "
+             "(default: %(default)s)"
+    )
+    parser.add_argument(
+        "--no-manifest", action="store_true",
+        help="re-check every file instead of skipping unchanged ones"
+    )
+    parser.add_argument(
+        "--sync", action="store_true",
+        help="update pages of edited files in place (only the changed blocks "
+             "are sent) instead of skipping them"
+    )
+    parser.add_argument(
+        "--parse-processes", type=int, nargs="?", default=0,
+        const=os.cpu_count() or 1, metavar="N",
+        help="parse frontmatter and convert Markdown in N worker processes "
+             "(default without N: one per CPU) instead of on the worker threads"
+    )
+    parser.add_argument(
+        "--pack", action="store_true",
+        help="merge consecutive paragraphs into as few blocks as Notion "
+             "allows, cutting long text on sentence or word boundaries, so "
+             "entries take fewer blocks and requests"
+    )
+    parser.add_argument(
+        "--cache", default=paths["cache"], metavar="PATH",
+        help="cache of converted entries, so files whose content was read "
+             "before aren't parsed and converted again (default: %(default)s)"
+    )
+    parser.add_argument(
+        "--no-cache", action="store_true",
+        help="parse and convert every file, without reading or filling the cache"
+    )
+    parser.add_argument(
+        "--no-uploads", action="store_true",
+        help="keep images and links to local files as Markdown text instead "
+             "of uploading the files to Notion"
+    )
+    parser.add_argument(
+        "--order", choices=ORDERS, default="path",
+        help="import order: path (default), newest (by frontmatter or path "
+             "date), smallest (by file size) or priority (by the priority "
+             "frontmatter, which comes first in the other orders too)"
+    )
+    parser.add_argument(
+        "--dead-letter", default=paths["dead_letter"], metavar="PATH",
+        help="where files that fail are listed (default: %(default)s)"
+    )
+    parser.add_argument(
+        "--retry-failed", action="store_true",
+        help="only import the files listed in the dead-letter file"
+    )
+    parser.add_argument(
+        "--checkpoint", default=paths["checkpoint"], metavar="PATH",
+        help="progress journal of the current run (default: %(default)s)"
+    )
+    parser.add_argument(
+        "--resume", action="store_true",
+        help="continue an interrupted run after the last file it finished"
+    )
+    parser.add_argument(
+        "--quiet", action="store_true",
+        help="don't print a section per file, only the totals"
+    )
+    parser.add_argument(
+        "--metrics", metavar="PATH",
+        help="write per-stage timings and counters here at the end of the run"
+    )
+    parser.add_argument(
+        "--metrics-format", choices=("json", "prometheus"),
+        help="format of --metrics (default: prometheus for *.prom, else json)"
+    )
+    parser.add_argument(
+        "--events", metavar="PATH",
+        help="write one JSON line per file to PATH ('-' for stdout) instead "
+             "of the per-file output"
+    )
+    parser.add_argument(
+        "--watch", action="store_true",
+        help="after the import, keep running and import new and edited files "
+             "within seconds of them being saved (implies --sync)"
+    )
+    parser.add_argument(
+        "--debounce", type=float, default=2.0, metavar="SECONDS",
+        help="with --watch: wait until files have been quiet this long, then "
+             "import everything that changed as one batch (default: %(default)s)"
+    )
+    parser.add_argument(
+        "--serve", action="store_true",
+        help="run as a worker: read import requests as JSON lines on stdin "
+             "and answer each with a JSON line on stdout (see journal_service.py)"
+    )
+    parser.add_argument(
+        "--since", type=_since_arg, metavar="YYYY-MM",
+        help="skip year and month folders (e.g. 2023/ or 2024/05/) from "
+             "before this month without listing them"
+    )
+    args = parser.parse_args(argv)
+    if args.workers < 1:
+        parser.error("--workers must be at least 1")
+    if args.parse_processes < 0:
+        parser.error("--parse-processes must not be negative")
+    if args.resume and args.retry_failed:
+        parser.error("--resume can't be combined with --retry-failed")
+    if args.watch and args.retry_failed:
+        parser.error("--watch can't be combined with --retry-failed")
+    if args.debounce < 0:
+        parser.error("--debounce must not be negative")
+    if args.serve and (args.watch or args.retry_failed or args.resume):
+        parser.error("--serve can't be combined with --watch, --retry-failed or --resume")
+    if args.serve and args.events == "-":
+        parser.error("--serve answers on stdout, write --events to a file instead")
+    if args.watch:
+        args.sync = True
+    return args
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Main Function
+# ─────────────────────────────────────────────────────────────────────────────
+
+def prepare_database(args: argparse.Namespace, manifest: Optional[ImportManifest]) -> tuple:
+    """
+    Read the database schema and load the index that files are matched to
+    pages with, printing progress.
+
+    With --dedupe hash, the Content Hash and Source Path properties are
+    added to the database if it doesn't have them yet. If the schema can't
+    be read or updated (a read-only integration, say) or the index can't
+    be loaded, files are matched by title instead, with a warning.
+
+    Returns:
+        (database, title_index, content_index): the databases.retrieve
+        response, and the TitleIndex and ContentIndex to pass to
+        run_import() (None when not used)
+
+    Raises:
+        RuntimeError: The import can't go ahead; the message says why
+    """
+    schema_error = None
+    try:
+        database = notion_request(notion.databases.retrieve, database_id=NOTION_JOURNAL_DB_ID)
+    except Exception as e:
+        print(f"⚠️  Couldn't load the Tags options, tags are sent as written: {e}\n")
+        database = {}
+        schema_error = e
+
+    title_index = None
+    content_index = None
+    if args.dedupe == "hash":
+        print("🔎 Loading the content-hash index...")
+        try:
+            if schema_error is not None:
+                raise schema_error
+            database, added = add_dedupe_properties(NOTION_JOURNAL_DB_ID, database)
+            if added:
+                print(f"🧾 Added the {' and '.join(added)} properties to the database "
+                      f"(hide them from your views if you like)")
+            with metrics.time("dedupe"):
+                content_index, title_index, fetched = load_content_index(
+                    NOTION_JOURNAL_DB_ID, database, manifest)
+        except Exception as e:
+            print(f"⚠️  Failed to load the content-hash index, matching pages by "
+                  f"title instead: {e}\n")
+            content_index = title_index = None
+        else:
+            print(f"✅ {len(content_index)} page(s) indexed by content hash, "
+                  f"{len(title_index)} older page(s) by title ({fetched} fetched)\n")
+    if content_index is None and args.prefetch_titles:
+        print("🔎 Loading existing titles from Notion...")
+        try:
+            with metrics.time("dedupe"):
+                title_index = fetch_existing_titles(NOTION_JOURNAL_DB_ID)
+        except Exception as e:
+            raise RuntimeError(f"Failed to load existing titles: {e}") from e
+        print(f"✅ Found {len(title_index)} existing page(s)\n")
+    return database, title_index, content_index
+
+
+def _journal_files(args: argparse.Namespace,
+                   checkpoint: ImportCheckpoint) -> Iterator[JournalFile]:
+    """Walk the journal, leaving out what --since and --resume skip."""
+    if not args.resume:
+        return iter_markdown_files(JOURNAL_ROOT_PATH, since=args.since)
+    found = iter_markdown_files(JOURNAL_ROOT_PATH, since=args.since,
+                                after=checkpoint.resume_after)
+    return checkpoint.remaining(found)
+
+
+def _timed_discovery(md_files: Iterable[JournalFile]) -> Iterator[JournalFile]:
+    # Files are listed lazily, so listing time is spent in next()
+    files = iter(md_files)
+    while True:
+        with metrics.time("discover"):
+            found = next(files, None)
+        if found is None:
+            return
+        yield found
+
+
+def watch_journal(args: argparse.Namespace, events: Optional[EventLog], verbose: bool,
+                  title_index: Optional[TitleIndex] = None,
+                  content_index: Optional[ContentIndex] = None) -> None:
+    """
+    Import Markdown files as they are saved, until Ctrl+C or SIGTERM.
+
+    Saves are debounced and each batch goes through run_import() with the
+    dedupe indexes and Notion client of the initial run, so a batch costs
+    requests for the changed files only, sent over connections that are
+    already open.
+    """
+    manifest = None if args.no_manifest else ImportManifest(args.manifest, JOURNAL_ROOT_PATH)
+    if manifest is not None:
+        file_uploader.remember(manifest.uploads())
+    dead_letter = DeadLetterFile(args.dead_letter, JOURNAL_ROOT_PATH)
+    cache = conversion_cache(args)
+    debouncer = Debouncer(quiet=args.debounce)
+    totals = ImportTotals()
+    started = time.monotonic()
+    interrupted = False
+    previous_sigterm = signal.signal(signal.SIGTERM, _interrupt)
+    try:
+        with open_watcher(JOURNAL_ROOT_PATH) as watcher:
+            print(f"👀 Watching {JOURNAL_ROOT_PATH} for changes ({watcher.kind}), "
+                  f"press Ctrl+C to stop\n")
+            if events:
+                events.emit("watch", root=JOURNAL_ROOT_PATH, watcher=watcher.kind)
+            while True:
+                debouncer.add(watcher.read(debouncer.timeout()))
+                if watcher.overflowed:
+                    # Changes were lost: check every file, the manifest skips the unchanged
+                    watcher.overflowed = False
+                    paths = None
+                else:
+                    paths = debouncer.ready()
+                    if not paths:
+                        continue
+                batch = import_batch(args, paths, manifest, dead_letter, events, verbose,
+                                     title_index, content_index, cache)
+                totals.merge(batch)
+    except KeyboardInterrupt:
+        interrupted = True
+        print("\n⏹️  Stopped watching.")
+    finally:
+        signal.signal(signal.SIGTERM, previous_sigterm)
+        if manifest is not None:
+            manifest.close()
+        dead_letter.close()
+        close_cache(cache)
+        file_uploader.close()
+        if events:
+            events.emit("end", interrupted=interrupted,
+                        elapsed_seconds=round(time.monotonic() - started, 3),
+                        **totals.as_dict())
+    print(f"   {totals.imported} imported, {totals.updated} updated, "
+          f"{totals.failed} failed while watching")
+
+
+def import_batch(args: argparse.Namespace, paths: Optional[List[str]],
+                 manifest: Optional[ImportManifest], dead_letter: DeadLetterFile,
+                 events: Optional[EventLog], verbose: bool,
+                 title_index: Optional[TitleIndex],
+                 content_index: Optional[ContentIndex],
+                 cache: Optional[ConversionCache],
+                 finished: Optional[List[ImportJob]] = None) -> ImportTotals:
+    """
+    Import one batch of changed files (None for the whole journal), with
+    the conversion cache the caller keeps open between batches. Finished
+    jobs are also appended to `finished`, if given.
+    """
+    if paths is None:
+        md_files: Iterable[JournalFile] = iter_markdown_files(JOURNAL_ROOT_PATH)
+    else:
+        # Editors' temporary files may be gone already
+        md_files = [JournalFile(Path(path)) for path in paths if os.path.isfile(path)]
+    batch = ImportTotals()
+    started = time.monotonic()
+    leftover: List[ImportJob] = []
+    jobs = run_import(md_files, workers=args.workers, title_index=title_index,
+                      manifest=manifest, sync=args.sync, content_index=content_index,
+                      pack=args.pack, cache=cache, upload_files=not args.no_uploads,
+                      order=args.order, leftover=leftover)
+    try:
+        for job in jobs:
+            _finish_job(job, batch, manifest, dead_letter, None, events, verbose)
+            if finished is not None:
+                finished.append(job)
+    finally:
+        jobs.close()
+        for job in leftover:
+            _finish_job(job, batch, manifest, dead_letter, None, events, verbose)
+            if finished is not None:
+                finished.append(job)
+        if manifest is not None:
+            manifest.commit()
+        _count_running_totals()
+        if args.metrics:
+            metrics.write(args.metrics, args.metrics_format)
+    changed = batch.total - batch.unchanged
+    if changed:
+        print(f"🔄 {datetime.now():%H:%M:%S} {changed} changed file(s): "
+              f"{batch.imported} imported, {batch.updated} updated, "
+              f"{batch.skipped - batch.unchanged} skipped, {batch.failed} failed "
+              f"({time.monotonic() - started:.1f}s)\n")
+    return batch
+
+
+def main(argv: Optional[List[str]] = None):
+    args = parse_args(argv)
+    missing = missing_settings()
+    if missing:
+        print(f"❌ Missing required environment variable: {missing[0]}")
+        print("\nPlease set this in your .env file:")
+        print("  NOTION_TOKEN=secret_..." if missing[0] == "NOTION_TOKEN"
+              else "  NOTION_JOURNAL_DB_ID=your-database-id")
+        sys.exit(1)
+    if args.serve:
+        # Imported here, as journal_service builds on this module
+        from journal_service import JournalImporter, serve
+        with JournalImporter(sys.argv[1:] if argv is None else argv) as importer:
+            return serve(importer, sys.stdin, sys.stdout)
+
+    events = EventLog(args.events) if args.events else None
+    try:
+        if args.events == "-":
+            # stdout carries the events; everything else goes to stderr
+            with redirect_stdout(sys.stderr):
+                return _main(args, events)
+        return _main(args, events)
+    finally:
+        if events:
+            events.close()
+
+
+def _main(args: argparse.Namespace, events: Optional[EventLog]):
+    print("╔════════════════════════════════════════════════════════╗")
+    print("║     📓 Bulk Import Journal Entries to Notion 📓        ║")
+    print("╚════════════════════════════════════════════════════════╝")
+    print()
+    
+    # Check if journal root path exists
+    if not os.path.exists(JOURNAL_ROOT_PATH):
+        print(f"❌ Journal root path not found: {JOURNAL_ROOT_PATH}")
+        print("\nPlease set the correct path in your .env file:")
+        print("  JOURNAL_ROOT_PATH=./Journal")
+        return
+    
+    dead_letter = DeadLetterFile(args.dead_letter, JOURNAL_ROOT_PATH)
+    checkpoint = ImportCheckpoint(args.checkpoint, JOURNAL_ROOT_PATH)
+    if args.retry_failed:
+        md_files = dead_letter.files()
+        print(f"📮 Retrying {len(md_files)} failed file(s) from: {args.dead_letter}")
+        if not md_files:
+            print("\nℹ️  No failed files to retry.")
+            return
+    else:
+        print(f"📁 Searching for Markdown files in: {JOURNAL_ROOT_PATH}")
+        if args.since:
+            print(f"📅 Skipping folders from before {args.since[0]}-{args.since[1]:02d}")
+        if args.resume and checkpoint.resume_after:
+            print(f"⏩ Resuming after {checkpoint.last_path} "
+                  f"({checkpoint.completed} file(s) already done)")
+        elif args.resume and checkpoint.last_path:
+            print(f"⏩ Resuming, skipping the {checkpoint.completed} file(s) already done")
+        elif args.resume:
+            print(f"ℹ️  No interrupted run to resume, starting from the beginning")
+        elif checkpoint.last_path:
+            print(f"ℹ️  Starting over; use --resume to continue the interrupted run instead")
+
+        # Files are found as the import goes, starting with the first one
+        md_files = _journal_files(args, checkpoint)
+    if args.workers > 1:
+        print(f"⚡ Using {args.workers} workers at {NOTION_REQUESTS_PER_SECOND:g} requests/second")
+    if args.parse_processes:
+        print(f"🧮 Parsing in {args.parse_processes} process(es)")
+    if args.pack:
+        print("📦 Packing paragraphs into as few blocks as possible")
+    if args.order != "path":
+        print("🔢 Importing " + {"newest": "the newest entries first",
+                                "smallest": "the smallest entries first",
+                                "priority": "entries by their priority"}[args.order])
+    print()
+
+    manifest = None
+    if not args.no_manifest:
+        manifest = ImportManifest(args.manifest, JOURNAL_ROOT_PATH)
+        file_uploader.remember(manifest.uploads())
+        print(f"🗂️  Manifest: {args.manifest} ({len(manifest)} file(s) recorded)\n")
+
+    try:
+        database, title_index, content_index = prepare_database(args, manifest)
+    except RuntimeError as e:
+        print(f"❌ {e}")
+        return
+
+    # Tags are sent with the spelling of the option they match
+    has_tags = tag_registry.load_schema(database)
+    if args.create_tags:
+        if not has_tags:
+            print("⚠️  The database has no Tags multi-select property, not creating tags\n")
+        else:
+            print("🏷️  Reading tags...")
+            if args.retry_failed:
+                tag_files = md_files
+            else:
+                # A second walk: the import's own walk starts when it does
+                tag_files = _journal_files(args, checkpoint)
+            try:
+                created = create_tag_options(NOTION_JOURNAL_DB_ID, collect_tags(tag_files, manifest))
+            except Exception as e:
+                print(f"❌ Failed to create tag options: {e}")
+                return
+            print(f"✅ Added {len(created)} tag option(s), {len(tag_registry)} in total\n")
+    
+    # Process each file
+    totals = ImportTotals()
+    started = time.monotonic()
+    interrupted = False
+    verbose = not (args.quiet or events)
+    if not args.retry_failed:
+        checkpoint.start(resume=args.resume)
+    if events:
+        events.emit("start", root=JOURNAL_ROOT_PATH, workers=args.workers,
+                    parse_processes=args.parse_processes, sync=args.sync, order=args.order,
+                    resume_after=checkpoint.last_path if args.resume else None)
+    previous_sigterm = signal.signal(signal.SIGTERM, _interrupt)
+    cache = conversion_cache(args)
+    leftover: List[ImportJob] = []
+    jobs = run_import(_timed_discovery(md_files), workers=args.workers, title_index=title_index,
+                      manifest=manifest, sync=args.sync,
+                      parse_processes=args.parse_processes, content_index=content_index,
+                      pack=args.pack, cache=cache, upload_files=not args.no_uploads,
+                      order=args.order, leftover=leftover)
+    try:
+        for job in jobs:
+            if _finish_job(job, totals, manifest, dead_letter, checkpoint, events, verbose):
+                # Never let the checkpoint get ahead of the manifest
+                if manifest is not None:
+                    manifest.commit()
+                checkpoint.flush()
+    except KeyboardInterrupt:
+        interrupted = True
+        print("\n⏸️  Interrupted, saving progress...\n")
+    finally:
+        jobs.close()  # waits for requests already in flight
+        # Their pages exist now, so they go in the manifest and checkpoint too
+        for job in leftover:
+            _finish_job(job, totals, manifest, dead_letter, checkpoint, events, verbose)
+        signal.signal(signal.SIGTERM, previous_sigterm)
+        if manifest is not None:
+            manifest.close()
+        dead_letter.close()
+        checkpoint.close(finished=not interrupted)
+        close_cache(cache)
+        file_uploader.close()
+        _count_running_totals()
+        if args.metrics:
+            metrics.write(args.metrics, args.metrics_format)
+        if events and (interrupted or not args.watch):
+            events.emit("end", interrupted=interrupted,
+                        elapsed_seconds=round(time.monotonic() - started, 3),
+                        **totals.as_dict())
+    elapsed = time.monotonic() - started
+
+    if interrupted:
+        print(f"⏸️  Stopped after {totals.total} file(s) "
+              f"({totals.imported} imported, {totals.failed} failed).")
+        print("   Run again with --resume to continue from there.")
+        return
+
+    if not totals.total:
+        print(f"⚠️  No Markdown files found in {JOURNAL_ROOT_PATH}")
+    else:
+        _print_summary(args, totals, elapsed)
+    if args.watch:
+        watch_journal(args, events, verbose, title_index, content_index)
+
+
+def _print_summary(args: argparse.Namespace, totals: "ImportTotals", elapsed: float) -> None:
+    print("═" * 56)
+    print("📊 Import Summary")
+    print(f"   ✅ Imported: {totals.imported}")
+    if args.sync:
+        print(f"   🔄 Updated: {totals.updated}")
+    if totals.unchanged:
+        print(f"   ⏭️  Skipped: {totals.skipped} ({totals.unchanged} unchanged)")
+    else:
+        print(f"   ⏭️  Skipped: {totals.skipped}")
+    print(f"   ❌ Failed: {totals.failed}")
+    print(f"   📝 Total: {totals.total}")
+    print(f"   ⏱️  Elapsed: {elapsed:.1f}s ({totals.total / max(elapsed, 1e-9):.1f} files/s)")
+    if blocks_written.total:
+        print(f"   🧱 Blocks written: {blocks_written.total} "
+              f"({blocks_written.total / max(elapsed, 1e-9):.1f}/s)")
+    if retries_made.total:
+        print(f"   🔁 Retried requests: {retries_made.total}")
+    if cache_hits.total:
+        print(f"   💾 Read from the conversion cache: {cache_hits.total}")
+    if file_uploader.sent or file_uploader.reused:
+        print(f"   📎 Files uploaded: {file_uploader.sent} "
+              f"({file_uploader.sent_bytes / 1024 / 1024:.1f} MB), "
+              f"{file_uploader.reused} reference(s) reused an upload")
+    print("═" * 56)
+    print()
+
+    if args.metrics:
+        print(f"📈 Metrics written to {args.metrics}")
+    if totals.failed:
+        print(f"📮 Failed files are listed in {args.dead_letter}")
+        print("   Run again with --retry-failed to import just those files.\n")
+    
+    if totals.imported > 0 or totals.updated > 0:
+        print("🎉 Import completed successfully!")
+    elif totals.skipped == totals.total:
+        print("ℹ️  All entries already exist in Notion.")
+    else:
+        print("⚠️  Import completed with some issues.")
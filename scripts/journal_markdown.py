@@ -0,0 +1,813 @@
+"""
+Markdown → Notion block conversion for the journal import scripts.
+
+The converter makes a single pass over the text, one line at a time, and
+yields blocks as soon as they are complete, so callers can start sending
+the first blocks of a large entry before the rest has been read.
+
+Supported Markdown:
+    - Headings (# to ######; levels 4-6 become heading_3)
+    - Paragraphs (consecutive lines, split into 2000-character blocks)
+    - Bullet (-, *, +) and numbered (1. or 1)) lists, nested by indentation
+    - Block quotes (>)
+    - Fenced code blocks (``` or ~~~) with an optional language
+    - Horizontal rules (---, ***, ___)
+    - Images (![caption](photo.jpg)) and links to local files
+      ([receipt](scans/receipt.pdf)) on a line of their own, as image and
+      file blocks. Web images become external images; local files become
+      placeholders that journal_uploads.py uploads before the page is sent.
+
+With pack=True, consecutive paragraphs are merged into as few blocks as
+Notion allows (see pack_blocks()), so entries made of many short
+paragraphs take fewer blocks and fewer requests.
+
+notion_blocks_to_markdown() goes the other way, for the export script.
+"""
+
+import re
+import sys
+import posixpath
+from urllib.parse import unquote, urlsplit
+from typing import Dict, Iterable, Iterator, List, Optional, TextIO, Tuple
+
+# Notion limit for a single rich_text run
+MAX_TEXT_LENGTH = 2000
+
+# Notion allows two levels of nested children in one request
+MAX_NESTING_DEPTH = 2
+
+# Notion accepts at most 100 children per pages.create / blocks.children.append
+MAX_BLOCKS_PER_REQUEST = 100
+
+# Longest text pack_blocks() puts in one block. Notion would take 100 runs
+# of 2000 characters, but blocks that size are unwieldy to edit.
+MAX_PACKED_LENGTH = 10 * MAX_TEXT_LENGTH
+
+_HEADING = re.compile(r'^ {0,3}(#{1,6})[ \t]+(.*?)(?:[ \t]+#+)?[ \t]*$')
+_FENCE = re.compile(r'^ {0,3}(`{3,}|~{3,})[ \t]*([^`\s]*)')
+_QUOTE = re.compile(r'^ {0,3}>[ ]?(.*)$')
+_BULLET = re.compile(r'^([ \t]*)[-*+][ \t]+(.*)$')
+_NUMBERED = re.compile(r'^([ \t]*)[0-9]{1,9}[.)][ \t]+(.*)$')
+_RULE = re.compile(r'^ {0,3}([-*_])(?:[ \t]*\1){2,}[ \t]*$')
+# ![caption](target "title") or [caption](target); <...> allows spaces in the target
+_MEDIA = re.compile(r'^ {0,3}(!?)\[([^\]]*)\]\([ \t]*(?:<([^>]+)>|(\S+?))'
+                    r'(?:[ \t]+"[^"]*")?[ \t]*\)[ \t]*$')
+_URL_SCHEME = re.compile(r'^[A-Za-z][A-Za-z0-9+.-]*:')
+
+# Image formats Notion shows inline; other files get a file block
+IMAGE_SUFFIXES = frozenset(('.bmp', '.gif', '.heic', '.jpeg', '.jpg', '.png', '.svg',
+                            '.tif', '.tiff', '.webp'))
+
+# Links to these stay text: they point at other entries, not attachments
+_PAGE_SUFFIXES = frozenset(('', '.md', '.markdown', '.htm', '.html'))
+
+# Fence info strings → Notion code block languages
+_CODE_LANGUAGES = {
+    "bash": "bash", "sh": "shell", "shell": "shell", "zsh": "shell",
+    "c": "c", "cpp": "c++", "c++": "c++", "csharp": "c#", "cs": "c#",
+    "css": "css", "diff": "diff", "docker": "docker", "dockerfile": "docker",
+    "go": "go", "graphql": "graphql", "html": "html", "java": "java",
+    "javascript": "javascript", "js": "javascript", "json": "json",
+    "kotlin": "kotlin", "latex": "latex", "lua": "lua", "makefile": "makefile",
+    "markdown": "markdown", "md": "markdown", "mermaid": "mermaid",
+    "php": "php", "powershell": "powershell", "python": "python", "py": "python",
+    "r": "r", "ruby": "ruby", "rb": "ruby", "rust": "rust", "rs": "rust",
+    "scala": "scala", "sql": "sql", "swift": "swift", "toml": "toml",
+    "typescript": "typescript", "ts": "typescript", "xml": "xml",
+    "yaml": "yaml", "yml": "yaml",
+}
+
+
+def rich_text(text: str) -> List[Dict]:
+    """Split text into rich_text runs of at most 2000 characters."""
+    if len(text) <= MAX_TEXT_LENGTH:
+        return [{"type": "text", "text": {"content": text}}]
+    return [
+        {"type": "text", "text": {"content": text[i:i + MAX_TEXT_LENGTH]}}
+        for i in range(0, len(text), MAX_TEXT_LENGTH)
+    ]
+
+
+def text_block(block_type: str, text: str) -> Dict:
+    """Build a block whose only content is rich text."""
+    if len(text) <= MAX_TEXT_LENGTH:
+        runs = [{"type": "text", "text": {"content": text}}]
+    else:
+        runs = rich_text(text)
+    return {"object": "block", "type": block_type, block_type: {"rich_text": runs}}
+
+
+def media_block(line: str) -> Optional[Dict]:
+    """
+    The image or file block for a line that is only an image or a link to
+    a local file, or None if the line is text.
+
+    A web image becomes an external image. A local file becomes a block
+    whose file_upload holds the path as written (see local_file()), to be
+    uploaded and swapped for the upload's ID before the block is sent.
+    Links to web pages and to other entries stay text.
+    """
+    match = _MEDIA.match(line)
+    if match is None:
+        return None
+    is_image, caption = match.group(1), match.group(2).strip()
+    target = match.group(3) or match.group(4)
+    if _URL_SCHEME.match(target):
+        if not is_image or not target.startswith(('http://', 'https://')):
+            return None
+        return {"object": "block", "type": "image", "image": {
+            "type": "external", "external": {"url": target},
+            "caption": rich_text(caption) if caption else []}}
+    if target.startswith('#'):
+        return None
+    path = unquote(target)
+    suffix = posixpath.splitext(path)[1].lower()
+    if not is_image and suffix in _PAGE_SUFFIXES:
+        return None
+    block_type = "image" if is_image and suffix in IMAGE_SUFFIXES else "file"
+    return {"object": "block", "type": block_type, block_type: {
+        "type": "file_upload", "file_upload": {"path": path},
+        "caption": rich_text(caption) if caption else []}}
+
+
+def local_file(block: Dict) -> Optional[str]:
+    """The path of the local file a block from media_block() refers to, if any."""
+    data = block.get(block.get("type"))
+    if not data or data.get("type") != "file_upload":
+        return None
+    return data["file_upload"].get("path")
+
+
+def media_source(data: Dict) -> Optional[str]:
+    """
+    What an image or file block shows, comparable between a block from
+    media_block() and the same block read back from Notion: the URL of an
+    external file, else the file's name (Notion's file URLs end with it).
+    """
+    kind = data.get("type")
+    if kind == "external":
+        return data["external"].get("url")
+    if kind == "file_upload":
+        path = data["file_upload"].get("path")
+        return posixpath.basename(path.replace('\\', '/')) if path else None
+    if kind == "file":
+        return unquote(posixpath.basename(urlsplit(data["file"].get("url", "")).path))
+    return None
+
+
+def iter_lines(content: str) -> Iterator[str]:
+    """Yield the lines of a string without building a list of all of them."""
+    find = content.find
+    start = 0
+    length = len(content)
+    while start < length:
+        end = find('\n', start)
+        if end == -1:
+            end = length
+        yield content[start:end]
+        start = end + 1
+
+
+def _paragraph_blocks(text: str, max_block_size: int) -> List[Dict]:
+    if len(text) <= max_block_size:
+        return [{"object": "block", "type": "paragraph",
+                 "paragraph": {"rich_text": [{"type": "text", "text": {"content": text}}]}}]
+    return [text_block("paragraph", text[i:i + max_block_size])
+            for i in range(0, len(text), max_block_size)]
+
+
+# First characters that can start something other than plain text
+_MARKERS = frozenset('#`~>-*_+0123456789![')
+
+# A line break that is not followed by a letter or that follows whitespace;
+# a chunk without one is a paragraph that needs no per-line stripping
+_UNTIDY_LINE_BREAK = re.compile(r'\n(?:(?<=[^\S\n]\n)|(?![^\W\d_]))')
+
+# First characters of a chunk that may be a flat list
+_LIST_STARTS = frozenset('-*+0123456789')
+
+
+def _flat_list_blocks(lines: List[str]) -> Optional[List[Dict]]:
+    """
+    Blocks for a chunk made only of unindented items of one list type, or
+    None if the chunk is anything else (nesting, continuation lines, rules...).
+    """
+    blocks = []
+    append = blocks.append
+    first = lines[0][:1]
+    if first in '-*+':
+        block_type = "bulleted_list_item"
+        marker = first + ' '
+        for line in lines:
+            if not line.startswith(marker):
+                return None
+            text = line[2:].strip()
+            if not text or text[0] == first:
+                return None  # maybe a rule such as "- - -"
+            if len(text) > MAX_TEXT_LENGTH:
+                append(text_block(block_type, text))
+            else:
+                append({"object": "block", "type": block_type,
+                        block_type: {"rich_text": [{"type": "text", "text": {"content": text}}]}})
+    else:
+        block_type = "numbered_list_item"
+        for line in lines:
+            # "12. text" without a regex; anything unusual takes the slow path
+            dot = line.find('. ', 1, 11)
+            if dot == -1 or not (line[:dot].isascii() and line[:dot].isdigit()):
+                return None
+            text = line[dot + 2:].strip()
+            if len(text) > MAX_TEXT_LENGTH:
+                append(text_block(block_type, text))
+            else:
+                append({"object": "block", "type": block_type,
+                        block_type: {"rich_text": [{"type": "text", "text": {"content": text}}]}})
+    return blocks
+
+
+class _BlockBuilder:
+    """
+    Line-at-a-time Markdown state machine.
+
+    feed() appends every block completed by a line to `out`. Blocks are
+    only held back while they can still grow: an open paragraph, quote,
+    code fence, or a top-level list item that may get more children.
+    """
+
+    __slots__ = ("max_block_size", "paragraph", "quote", "items", "fence",
+                 "code", "language")
+
+    def __init__(self, max_block_size: int):
+        self.max_block_size = max_block_size
+        self.paragraph: List[str] = []
+        self.quote: List[str] = []
+        # Open list items as (indent, block); the first one is top level
+        self.items: List[tuple] = []
+        self.fence: Optional[str] = None
+        self.code: List[str] = []
+        self.language = "plain text"
+
+    @property
+    def idle(self) -> bool:
+        """True when nothing is open, i.e. right after a blank line."""
+        return (self.fence is None and not self.paragraph and not self.quote
+                and not self.items)
+
+    def flush(self, out: List[Dict]) -> None:
+        """Close the open paragraph, quote and list."""
+        if self.paragraph:
+            out.extend(_paragraph_blocks('\n'.join(self.paragraph), self.max_block_size))
+            self.paragraph = []
+        if self.quote:
+            out.append(text_block("quote", '\n'.join(self.quote)))
+            self.quote = []
+        if self.items:
+            out.append(self.items[0][1])
+            self.items = []
+
+    def finish(self, out: List[Dict]) -> None:
+        """Close everything at the end of the document."""
+        if self.fence is not None:
+            # Unclosed fence: keep the text rather than dropping it
+            out.append(self._code_block())
+            self.fence = None
+        self.flush(out)
+
+    def _code_block(self) -> Dict:
+        block = text_block("code", '\n'.join(self.code))
+        block["code"]["language"] = self.language
+        self.code = []
+        return block
+
+    def feed(self, line: str, out: List[Dict]) -> None:
+        # Inside a fenced code block everything is literal
+        if self.fence is not None:
+            stripped = line.strip()
+            if stripped.startswith(self.fence) and not stripped.strip(self.fence[0]):
+                out.append(self._code_block())
+                self.fence = None
+            else:
+                self.code.append(line.rstrip('\r\n'))
+            return
+
+        stripped = line.strip()
+        if not stripped:
+            self.flush(out)
+            return
+
+        first = stripped[0]
+        if first in _MARKERS:
+            if first in '-*+' and stripped[1:2] in (' ', '\t'):
+                if first != '+' and not stripped.strip(first + ' \t'):
+                    self._standalone({"object": "block", "type": "divider", "divider": {}}, out)
+                    return
+                # Bullet item; checked without a regex since lists are common
+                prefix = line[:len(line) - len(line.lstrip())]
+                self._list_item("bulleted_list_item", prefix, stripped[2:].strip(), out)
+                return
+
+            if first == '#':
+                match = _HEADING.match(line)
+                if match:
+                    heading_type = f"heading_{min(len(match.group(1)), 3)}"
+                    self._standalone(text_block(heading_type, match.group(2)), out)
+                    return
+            elif first == '`' or first == '~':
+                match = _FENCE.match(line)
+                if match:
+                    self.flush(out)
+                    self.fence = match.group(1)
+                    self.language = _CODE_LANGUAGES.get(match.group(2).lower(), "plain text")
+                    return
+            elif first == '>':
+                match = _QUOTE.match(line)
+                if match:
+                    if self.paragraph or self.items:
+                        quote, self.quote = self.quote, []
+                        self.flush(out)
+                        self.quote = quote
+                    self.quote.append(match.group(1).rstrip())
+                    return
+            elif first in '-*_':
+                if _RULE.match(line):
+                    self._standalone({"object": "block", "type": "divider", "divider": {}}, out)
+                    return
+            elif first == '!' or first == '[':
+                block = media_block(line)
+                if block is not None:
+                    self._standalone(block, out)
+                    return
+            else:
+                match = _NUMBERED.match(line)
+                if match:
+                    self._list_item("numbered_list_item", match.group(1),
+                                    match.group(2).strip(), out)
+                    return
+
+        if self.items:
+            # Continuation line of the current list item
+            last = self.items[-1][1]
+            runs = last[last["type"]]["rich_text"]
+            text = ''.join(run["text"]["content"] for run in runs) + '\n' + stripped
+            last[last["type"]]["rich_text"] = rich_text(text)
+        elif self.quote:
+            # Lazy continuation of a block quote
+            self.quote.append(stripped)
+        else:
+            self.paragraph.append(stripped)
+
+    def _standalone(self, block: Dict, out: List[Dict]) -> None:
+        """Emit a block that can't continue onto the next line (heading, rule, image)."""
+        self.flush(out)
+        out.append(block)
+
+    def _list_item(self, list_type: str, prefix: str, text: str, out: List[Dict]) -> None:
+        if self.paragraph or self.quote:
+            items, self.items = self.items, []
+            self.flush(out)
+            self.items = items
+        indent = len(prefix.expandtabs(4)) if '\t' in prefix else len(prefix)
+        block = text_block(list_type, text)
+        items = self.items
+
+        if items and indent <= items[0][0]:
+            out.append(items[0][1])  # new top-level item
+            items.clear()
+        if not items:
+            items.append((indent, block))
+            return
+        while items[-1][0] >= indent:
+            items.pop()
+
+        # Attach to the deepest open item Notion allows, keeping the item
+        # open so its own sub-items can follow
+        depth = min(len(items), MAX_NESTING_DEPTH)
+        parent = items[depth - 1][1]
+        parent[parent["type"]].setdefault("children", []).append(block)
+        if depth == len(items):
+            items.append((indent, block))
+
+
+def iter_notion_blocks(lines: Iterable[str], max_block_size: int = MAX_TEXT_LENGTH) -> Iterator[Dict]:
+    """
+    Convert Markdown lines to Notion blocks in a single pass.
+
+    Args:
+        lines: Markdown lines, with or without trailing newlines
+        max_block_size: Maximum characters per paragraph block
+
+    Yields:
+        Notion block objects, in document order
+    """
+    builder = _BlockBuilder(max_block_size)
+    out: List[Dict] = []
+    for line in lines:
+        builder.feed(line, out)
+        if out:
+            yield from out
+            out.clear()
+    builder.finish(out)
+    yield from out
+
+
+_HEADING_TYPES = (None, "heading_1", "heading_2", "heading_3", "heading_3",
+                  "heading_3", "heading_3")
+
+# Characters of content split into chunks at a time
+_SLAB_SIZE = 64 * 1024
+
+
+# A stretch of streamed text this long without a blank line is cut at a line
+# break instead, so a slab never grows without bound
+_MAX_SLAB_SIZE = 4 * _SLAB_SIZE
+
+
+def _string_slabs(content: str) -> Iterator[Tuple[str, bool]]:
+    """
+    Split a Markdown string into slabs of about 64 KB, each ending where a
+    blank line starts. Yields (text, blank line follows) pairs.
+    """
+    find = content.find
+    start = 0
+    length = len(content)
+    while start < length:
+        stop = find('\n\n', start + _SLAB_SIZE)
+        if stop == -1:
+            yield content[start:], False
+            return
+        yield content[start:stop], True
+        start = stop + 2
+
+
+def _stream_slabs(stream: TextIO) -> Iterator[Tuple[str, bool]]:
+    """
+    Like _string_slabs(), for Markdown read from a text stream opened with
+    newline=''. Line endings are normalized to \\n and the text is stripped,
+    as read_frontmatter() does with the body of an entry.
+    """
+    buffer = ''
+    started = False
+    while True:
+        piece = stream.read(_SLAB_SIZE)
+        if not piece:
+            break
+        if piece[-1] == '\r':
+            piece += stream.read(1)  # don't split a \r\n
+        piece = piece.replace('\r\n', '\n')
+        if not started:
+            piece = piece.lstrip()
+            started = bool(piece)
+        buffer += piece
+        # Only cut where more text follows; trailing whitespace may be the end
+        end = len(buffer.rstrip())
+        cut = buffer.rfind('\n\n', 0, end)
+        if cut != -1:
+            yield buffer[:cut], True
+            buffer = buffer[cut + 2:]
+        elif end >= _MAX_SLAB_SIZE:
+            cut = buffer.rfind('\n', 0, end)
+            if cut == -1:
+                yield buffer[:end], False  # one enormous line: cut it anywhere
+                buffer = buffer[end:]
+            else:
+                yield buffer[:cut], False
+                buffer = buffer[cut + 1:]
+    yield buffer.rstrip(), False
+
+
+def _iter_block_batches(content: str, max_block_size: int,
+                        batch_size: int = 100) -> Iterator[List[Dict]]:
+    """
+    Convert a Markdown string chunk by chunk (chunks are separated by blank
+    lines), yielding blocks in batches of at least `batch_size`.
+
+    The content is split a slab of about 64 KB at a time, so only that much
+    of it is ever copied.
+    """
+    return _iter_slab_batches(_string_slabs(content), max_block_size, batch_size)
+
+
+def _iter_slab_batches(slabs: Iterable[Tuple[str, bool]], max_block_size: int,
+                       batch_size: int = 100) -> Iterator[List[Dict]]:
+    """
+    Convert Markdown slabs from _string_slabs() or _stream_slabs() to
+    blocks, yielding them in batches of at least `batch_size`.
+
+    A chunk that is plain paragraph text, a heading or a flat list is turned
+    into blocks directly, without running the line parser on each line. The
+    last chunk of a slab that isn't followed by a blank line is fed to the
+    line parser without one, so it carries on into the next slab.
+    """
+    builder = _BlockBuilder(max_block_size)
+    out: List[Dict] = []
+    idle = True  # builder has nothing open
+
+    for text, blank_after in slabs:
+        chunks = text.split('\n\n')
+        tail = '' if blank_after else chunks.pop()
+
+        for chunk in chunks:
+            if idle:
+                if chunk[:1].isalpha():
+                    if '\n' not in chunk or not _UNTIDY_LINE_BREAK.search(chunk):
+                        text = chunk.rstrip()
+                    else:
+                        lines = chunk.split('\n')
+                        text = None
+                        firsts = ''.join([line[:1] for line in lines])
+                        if len(firsts) == len(lines) and firsts.isalpha():
+                            text = '\n'.join(map(str.strip, lines))
+                    if text is not None:
+                        # Every line starts with a letter: one plain paragraph
+                        if len(text) <= max_block_size:
+                            out.append({"object": "block", "type": "paragraph", "paragraph": {
+                                "rich_text": [{"type": "text", "text": {"content": text}}]}})
+                        else:
+                            out.extend(_paragraph_blocks(text, max_block_size))
+                        continue
+                elif chunk[:1] == '#' and '\n' not in chunk:
+                    level = len(chunk) - len(chunk.lstrip('#'))
+                    text = chunk[level:].strip(' \t')
+                    if level <= 6 and chunk[level:level + 1] in (' ', '\t') and text[-1:] != '#':
+                        # "## Title" without a regex; closing #s take the slow path
+                        out.append(text_block(_HEADING_TYPES[level], text))
+                        continue
+                elif chunk[:1] in _LIST_STARTS:
+                    blocks = _flat_list_blocks(chunk.split('\n'))
+                    if blocks is not None:
+                        out.extend(blocks)
+                        continue
+
+            for line in chunk.split('\n'):
+                builder.feed(line, out)
+            builder.feed('', out)  # the blank line after the chunk
+            idle = builder.idle
+
+        if tail:
+            lines = tail.split('\n')
+            if tail.endswith('\n'):
+                lines.pop()  # a final newline doesn't start another line
+            for line in lines:
+                builder.feed(line, out)
+            idle = builder.idle
+
+        if len(out) >= batch_size:
+            yield out
+            out = []
+
+    builder.finish(out)
+    yield out
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Packing
+# ─────────────────────────────────────────────────────────────────────────────
+
+# The end of a sentence: punctuation, maybe closing quotes or brackets,
+# then the whitespace that split_text() cuts after (none after CJK full stops)
+_SENTENCE_END = re.compile(r'[.!?…]["\'’”»)\]]*[ \t]+|[。！？]["\'’”」』)\]]*')
+
+# Paragraph size that keeps every paragraph in one block, for pack_blocks()
+# to cut where it sees fit
+_WHOLE_PARAGRAPHS = sys.maxsize
+
+
+def split_text(text: str, limit: int = MAX_TEXT_LENGTH) -> List[str]:
+    """
+    Split text into pieces of at most `limit` characters that join back
+    into the same text.
+
+    Each piece ends after the last line break, sentence or word in its
+    second half, in that order of preference. Only text with no whitespace
+    there is cut mid-word.
+    """
+    pieces = []
+    start = 0
+    length = len(text)
+    while length - start > limit:
+        end = start + limit
+        low = start + limit // 2
+        cut = text.rfind('\n', low, end) + 1
+        if cut <= low:
+            for match in _SENTENCE_END.finditer(text, low, end):
+                cut = match.end()
+        if cut <= low:
+            cut = max(text.rfind(' ', low, end), text.rfind('\t', low, end)) + 1
+        if cut <= low:
+            cut = end
+        pieces.append(text[start:cut])
+        start = cut
+    pieces.append(text[start:])
+    return pieces
+
+
+def _packed_paragraph(text: str) -> Dict:
+    runs = [{"type": "text", "text": {"content": piece}} for piece in split_text(text)]
+    return {"object": "block", "type": "paragraph", "paragraph": {"rich_text": runs}}
+
+
+def pack_blocks(blocks: Iterable[Dict], max_length: int = MAX_PACKED_LENGTH) -> Iterator[Dict]:
+    """
+    Merge consecutive paragraphs into as few blocks as possible.
+
+    Paragraphs are joined with a blank line, as they are in the Markdown,
+    so the page reads the same. The text is cut on line, sentence or word
+    boundaries (see split_text()) into runs of at most 2000 characters and
+    blocks of at most `max_length`. A longer paragraph is spread over
+    several blocks the same way, where the converter would cut it every
+    2000 characters, even mid-word. Other blocks pass through unchanged.
+
+    Lazy: only the paragraphs of the block being filled are held back.
+    """
+    texts: List[str] = []
+    size = 0
+    for block in blocks:
+        data = block[block["type"]]
+        if block["type"] != "paragraph" or "children" in data:
+            if texts:
+                yield _packed_paragraph('\n\n'.join(texts))
+                texts, size = [], 0
+            yield block
+            continue
+
+        runs = data["rich_text"]
+        text = runs[0]["text"]["content"] if len(runs) == 1 else \
+            ''.join(run["text"]["content"] for run in runs)
+        if texts and size + 2 + len(text) > max_length:
+            yield _packed_paragraph('\n\n'.join(texts))
+            texts, size = [], 0
+        if len(text) > max_length:
+            # The last piece may still share its block with what follows
+            *full, text = split_text(text, max_length)
+            for piece in full:
+                yield _packed_paragraph(piece)
+        texts.append(text)
+        size += len(text) + 2 * (len(texts) > 1)
+    if texts:
+        yield _packed_paragraph('\n\n'.join(texts))
+
+
+def iter_content_blocks(content: str, max_block_size: int = MAX_TEXT_LENGTH,
+                        pack: bool = False) -> Iterator[Dict]:
+    """
+    Convert a Markdown string to Notion blocks, lazily.
+
+    Same output as iter_notion_blocks(iter_lines(content)), but faster.
+    With pack=True, paragraphs are merged by pack_blocks() and
+    max_block_size doesn't apply.
+    """
+    if pack:
+        yield from pack_blocks(iter_content_blocks(content, _WHOLE_PARAGRAPHS))
+        return
+    for blocks in _iter_block_batches(content, max_block_size):
+        yield from blocks
+
+
+def iter_stream_blocks(stream: TextIO, max_block_size: int = MAX_TEXT_LENGTH,
+                       pack: bool = False) -> Iterator[Dict]:
+    """
+    Convert Markdown read from a text stream to Notion blocks, lazily.
+
+    Gives the same blocks as content_to_notion_blocks() on the stripped
+    text, but reads the stream about 64 KB at a time, so memory use doesn't
+    grow with its length. Open files with newline=''.
+    """
+    if pack:
+        yield from pack_blocks(iter_stream_blocks(stream, _WHOLE_PARAGRAPHS))
+        return
+    for blocks in _iter_slab_batches(_stream_slabs(stream), max_block_size):
+        yield from blocks
+
+
+def content_to_notion_blocks(content: str, max_block_size: int = MAX_TEXT_LENGTH,
+                             pack: bool = False) -> List[Dict]:
+    """
+    Convert Markdown content to Notion blocks.
+
+    Args:
+        content: Markdown content string
+        max_block_size: Maximum characters per block (Notion limit is 2000)
+        pack: Merge consecutive paragraphs with pack_blocks(); paragraphs
+            are then cut on word boundaries and max_block_size doesn't apply
+
+    Returns:
+        List of Notion block objects
+    """
+    blocks: List[Dict] = []
+    if content and pack:
+        blocks.extend(iter_content_blocks(content, pack=True))
+    elif content:
+        for batch in _iter_block_batches(content, max_block_size):
+            blocks.extend(batch)
+    return blocks
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Notion → Markdown
+# ─────────────────────────────────────────────────────────────────────────────
+
+# Notion code block languages → fence info strings
+_FENCE_LANGUAGES = {"plain text": "", "c++": "cpp", "c#": "csharp"}
+
+_LIST_TYPES = frozenset(("bulleted_list_item", "numbered_list_item", "to_do", "toggle"))
+
+
+def plain_text(rich_text_runs: List[Dict]) -> str:
+    """Text of a rich_text array, from the API or from this module."""
+    return "".join(run.get("plain_text") or run.get("text", {}).get("content", "")
+                   for run in rich_text_runs)
+
+
+def notion_blocks_to_markdown(blocks: List[Dict]) -> str:
+    """
+    Convert Notion blocks back to Markdown in the format the importer reads.
+
+    Handles the block types content_to_notion_blocks() creates, so an
+    exported entry imports back to the same blocks, plus to-dos, toggles
+    (as list items), callouts (as quotes) and media links. Text formatting
+    is dropped, as on import. Children go in block[type]["children"], as
+    returned by a recursive fetch.
+
+    Args:
+        blocks: Top-level blocks of a page
+
+    Returns:
+        Markdown text, without frontmatter
+    """
+    parts: List[str] = []
+    previous = None
+    for block in blocks:
+        block_type = block.get("type")
+        lines = _block_markdown(block, numbered=1)
+        if lines is None:
+            continue
+        # Consecutive items of one list stay together; numbering continues
+        if block_type in _LIST_TYPES and previous == block_type:
+            if block_type == "numbered_list_item":
+                lines = _block_markdown(block, numbered=_next_number(parts[-1]))
+            parts[-1] += "\n" + "\n".join(lines)
+        else:
+            parts.append("\n".join(lines))
+        previous = block_type
+    return "\n\n".join(parts) + "\n" if parts else ""
+
+
+def _next_number(previous_part: str) -> int:
+    # Top-level items start at column 0; nested ones are indented
+    last = [line for line in previous_part.split("\n") if line[:1].isdigit()][-1]
+    return int(last.split(".", 1)[0]) + 1
+
+
+def _block_markdown(block: Dict, numbered: int) -> Optional[List[str]]:
+    block_type = block.get("type")
+    data = block.get(block_type) or {}
+    text = plain_text(data.get("rich_text", []))
+
+    if block_type == "paragraph":
+        return text.split("\n") if text else None
+    if block_type in ("heading_1", "heading_2", "heading_3"):
+        return [f"{'#' * int(block_type[-1])} {text.replace(chr(10), ' ')}"]
+    if block_type in _LIST_TYPES:
+        if block_type == "numbered_list_item":
+            marker = f"{numbered}. "
+        elif block_type == "to_do":
+            marker = "- [x] " if data.get("checked") else "- [ ] "
+        else:
+            marker = "- "
+        lines = _list_item_lines(marker, text, data.get("children", []))
+        return lines
+    if block_type in ("quote", "callout"):
+        return ["> " + line if line else ">" for line in text.split("\n")]
+    if block_type == "code":
+        fence = "```"
+        while fence in text:
+            fence += "`"
+        language = data.get("language", "plain text")
+        return [fence + _FENCE_LANGUAGES.get(language, language), *text.split("\n"), fence]
+    if block_type == "divider":
+        return ["---"]
+    if block_type in ("image", "video", "file", "pdf", "bookmark", "embed", "link_preview"):
+        url = data.get("url") or (data.get("external") or data.get("file") or {}).get("url")
+        if not url:
+            return None
+        caption = plain_text(data.get("caption", [])) or block_type
+        return [f"{'!' if block_type == 'image' else ''}[{caption}]({url})"]
+    return None  # child pages, databases, columns... have no Markdown form
+
+
+def _list_item_lines(marker: str, text: str, children: List[Dict]) -> List[str]:
+    indent = " " * (len(marker) if marker[0].isdigit() else 2)
+    text_lines = text.split("\n")
+    lines = [marker + text_lines[0]]
+    lines.extend(indent + line for line in text_lines[1:])
+    number = 1
+    previous = None
+    for child in children:
+        child_type = child.get("type")
+        if child_type == "numbered_list_item":
+            number = number + 1 if previous == child_type else 1
+        child_lines = _block_markdown(child, numbered=number)
+        previous = child_type
+        if child_lines:
+            lines.extend(indent + line if line else line for line in child_lines)
+    return lines
@@ -0,0 +1,252 @@
+"""
+Timing and counters for the Notion import scripts.
+
+Each file passes through the stages in STAGES. Time spent in each stage is
+kept in a histogram, and the run's counters (files by status, API requests
+by endpoint...) next to them. At the end of a run the lot can be written
+as JSON or as a Prometheus textfile-collector file, and an EventLog can
+stream one JSON line per file instead of the human-readable output.
+"""
+
+import os
+import sys
+import json
+import time
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Dict, IO, Iterator, List, Optional, Tuple
+
+# discover: listing the journal, read: file I/O, parse: frontmatter (or the
+# conversion cache lookup), convert: Markdown → blocks, dedupe: existing-page checks,
+# upload: local images and files, create: pages.create, append: blocks.children.append
+STAGES = ("discover", "read", "parse", "convert", "dedupe", "upload", "create", "append")
+
+# Histogram bucket upper bounds, in seconds
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+                   0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+class Histogram:
+    """Cumulative-bucket histogram, as Prometheus expects them."""
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)  # per bucket, not cumulative
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float) -> None:
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+    def cumulative(self) -> List[Tuple[float, int]]:
+        """(upper bound, observations at or below it) for each bucket."""
+        total, out = 0, []
+        for bound, count in zip(self.buckets, self.counts):
+            total += count
+            out.append((bound, total))
+        return out
+
+    def quantile(self, q: float) -> float:
+        """Upper bound of the bucket holding the q-th quantile (0 < q ≤ 1)."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        for bound, seen in self.cumulative():
+            if seen >= rank:
+                return min(bound, self.max)
+        return self.max
+
+
+class Metrics:
+    """
+    Thread-safe stage histograms and labelled counters for one run.
+
+    Stage times are also added to the timings dict of the file being worked
+    on by the current thread, if one was registered with collect().
+    """
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.stages: Dict[str, Histogram] = {}
+        self.counters: Dict[str, Dict[Labels, float]] = {}
+        self.gauges: Dict[str, float] = {}
+        self.started_at = datetime.now()
+        self._started = time.monotonic()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def observe(self, stage: str, seconds: float) -> None:
+        """Record time spent in a stage."""
+        with self._lock:
+            histogram = self.stages.get(stage)
+            if histogram is None:
+                histogram = self.stages[stage] = Histogram(self.buckets)
+            histogram.observe(seconds)
+        timings = getattr(self._local, "timings", None)
+        if timings is not None:
+            timings[stage] = timings.get(stage, 0.0) + seconds
+
+    @contextmanager
+    def time(self, stage: str) -> Iterator[None]:
+        """Time the body of a with block as one observation of `stage`."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - started)
+
+    @contextmanager
+    def collect(self, timings: Dict[str, float]) -> Iterator[Dict[str, float]]:
+        """Also add the current thread's stage times to `timings`."""
+        previous = getattr(self._local, "timings", None)
+        self._local.timings = timings
+        try:
+            yield timings
+        finally:
+            self._local.timings = previous
+
+    def count(self, name: str, amount: float = 1, **labels: str) -> None:
+        """Add to a counter, e.g. count("api_requests_total", endpoint="pages.create")."""
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self.counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + amount
+
+    def set(self, name: str, value: float) -> None:
+        """Set a gauge."""
+        with self._lock:
+            self.gauges[name] = value
+
+    @property
+    def elapsed(self) -> float:
+        return time.monotonic() - self._started
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Everything recorded so far, as JSON-friendly data."""
+        with self._lock:
+            stages = {
+                stage: {
+                    "count": histogram.count,
+                    "sum_seconds": round(histogram.sum, 6),
+                    "mean_seconds": round(histogram.sum / histogram.count, 6),
+                    "p50_seconds": histogram.quantile(0.5),
+                    "p99_seconds": histogram.quantile(0.99),
+                    "max_seconds": round(histogram.max, 6),
+                    "buckets": {str(bound): seen for bound, seen in histogram.cumulative()},
+                }
+                for stage, histogram in _in_stage_order(self.stages)
+            }
+            counters = {
+                name: {_label_text(key) or "total": value for key, value in series.items()}
+                for name, series in self.counters.items()
+            }
+            gauges = dict(self.gauges)
+        return {
+            "started_at": self.started_at.isoformat(timespec="seconds"),
+            "elapsed_seconds": round(self.elapsed, 3),
+            "stages": stages,
+            "counters": counters,
+            "gauges": gauges,
+        }
+
+    def to_prometheus(self, prefix: str = "journal_import") -> str:
+        """The metrics in the Prometheus text exposition format."""
+        lines = []
+        with self._lock:
+            name = f"{prefix}_stage_seconds"
+            lines.append(f"# HELP {name} Time spent in each import stage.")
+            lines.append(f"# TYPE {name} histogram")
+            for stage, histogram in _in_stage_order(self.stages):
+                for bound, seen in histogram.cumulative():
+                    lines.append(f'{name}_bucket{{stage="{stage}",le="{bound:g}"}} {seen}')
+                lines.append(f'{name}_bucket{{stage="{stage}",le="+Inf"}} {histogram.count}')
+                lines.append(f'{name}_sum{{stage="{stage}"}} {histogram.sum:.6f}')
+                lines.append(f'{name}_count{{stage="{stage}"}} {histogram.count}')
+            for counter, series in sorted(self.counters.items()):
+                lines.append(f"# TYPE {prefix}_{counter} counter")
+                for key, value in sorted(series.items()):
+                    labels = ",".join(f'{k}="{_escape(v)}"' for k, v in key)
+                    lines.append(f"{prefix}_{counter}{{{labels}}} {value:g}"
+                                 if labels else f"{prefix}_{counter} {value:g}")
+            gauges = dict(self.gauges, duration_seconds=round(self.elapsed, 3),
+                          last_run_timestamp_seconds=int(self.started_at.timestamp()))
+            for gauge, value in sorted(gauges.items()):
+                lines.append(f"# TYPE {prefix}_{gauge} gauge")
+                lines.append(f"{prefix}_{gauge} {value:g}")
+        return "\n".join(lines) + "\n"
+
+    def write(self, path: str, fmt: Optional[str] = None) -> None:
+        """
+        Write a report, replacing the file atomically (as the Prometheus
+        textfile collector requires).
+
+        Args:
+            path: Report file
+            fmt: "json" or "prometheus"; by default Prometheus for *.prom
+                files and JSON otherwise
+        """
+        if fmt is None:
+            fmt = "prometheus" if path.endswith(".prom") else "json"
+        if fmt == "prometheus":
+            text = self.to_prometheus()
+        else:
+            text = json.dumps(self.snapshot(), indent=2, ensure_ascii=False) + "\n"
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        temp_path = path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(temp_path, path)
+
+
+def _in_stage_order(stages: Dict[str, Histogram]) -> List[Tuple[str, Histogram]]:
+    order = {stage: i for i, stage in enumerate(STAGES)}
+    return sorted(stages.items(), key=lambda item: (order.get(item[0], len(order)), item[0]))
+
+
+def _label_text(key: Labels) -> str:
+    return ",".join(f"{k}={v}" for k, v in key)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class EventLog:
+    """
+    JSON-lines event stream: one object per line with an "event" name and a
+    "ts" timestamp. Written to a file, or to stdout for "-", where each line
+    is flushed as it is written so a consumer sees progress live.
+    """
+
+    def __init__(self, path: str, stream: Optional[IO[str]] = None):
+        self.path = path
+        if path == "-":
+            self._file = stream or sys.stdout
+            self._owned = False
+        else:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            self._file = open(path, "w", encoding="utf-8")
+            self._owned = True
+
+    def emit(self, event: str, **fields: Any) -> None:
+        record = {"event": event, "ts": round(time.time(), 3)}
+        record.update(fields)
+        self._file.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+        if not self._owned:
+            self._file.flush()
+
+    def close(self) -> None:
+        if self._owned:
+            self._file.close()
+        else:
+            self._file.flush()
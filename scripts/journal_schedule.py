@@ -0,0 +1,165 @@
+"""
+The order journal entries are imported in.
+
+iter_markdown_files() lists a journal in path order, which for a tree of
+year and month folders puts the oldest entries first: on a backfill that
+takes hours, the entries people look for are the last to reach Notion.
+schedule() takes the files as they are found and hands them on by a
+priority instead:
+
+    newest    latest first, by the frontmatter date or else a date in the
+              path ("2024/06/14.md", "2024-06/notes.md"); undated entries
+              go last
+    smallest  fewest bytes first, as an estimate of the blocks an entry
+              takes, so the many short entries are in before the few
+              long ones
+    priority  only by the frontmatter `priority:`
+
+In every order a higher `priority:` number goes first (the default is 0),
+and entries that tie stay in path order.
+
+The walk and the frontmatter reads run on a thread of their own that feeds
+a heap, and the import takes the best entry found so far, once LOOKAHEAD
+entries beyond those it has taken have been read (or the walk is done). A
+journal smaller than that comes out in exactly the order asked for. In a
+bigger one the order is best-effort: an entry found late can't overtake
+those already handed out. Listing folders and reading headers is much
+faster than sending pages, so in practice the heap holds the whole tree
+long before the import has caught up, without waiting for the walk to
+finish first.
+"""
+
+import re
+import heapq
+import threading
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional, Tuple, TypeVar
+
+from journal_entries import parse_date
+
+ORDERS = ("path", "newest", "smallest", "priority")
+
+# Entries read ahead of the import before it takes the best one
+LOOKAHEAD = 1000
+
+T = TypeVar("T")
+
+# A full date, with or without separators: "2024-06-14", "2024/06/14", "20240614".
+# Matched as a lookahead, so that a run like "2023/2024-01-02" that isn't a
+# date from its first digit doesn't hide the one that starts further in.
+_PATH_DATE = re.compile(r'(?<!\d)(?=(\d{4})[-_./]?(\d{2})[-_./]?(\d{2})(?!\d))')
+
+# A year and month: "2024-06", "2024/6"
+_PATH_MONTH = re.compile(r'(?<!\d)(\d{4})[-_/](\d{1,2})(?!\d)')
+
+_PATH_YEAR = re.compile(r'(?<!\d)(\d{4})(?!\d)')
+
+
+def path_date(path: str) -> Optional[Tuple[int, int, int]]:
+    """
+    The date a file's path gives it, as (year, month, day), with 0 for a
+    month or day the path doesn't name. The last date in the path wins, so
+    a file's own name counts before its folders.
+
+    Args:
+        path: Path relative to the journal root, with "/" separators
+    """
+    for pattern in (_PATH_DATE, _PATH_MONTH, _PATH_YEAR):
+        for match in reversed(list(pattern.finditer(path))):
+            parts = [int(part) for part in match.groups()] + [0, 0]
+            year, month, day = parts[:3]
+            if 1900 <= year <= 2100 and month <= 12 and day <= 31 \
+                    and (pattern is _PATH_YEAR or month >= 1) \
+                    and (pattern is not _PATH_DATE or day >= 1):
+                return year, month, day
+    return None
+
+
+def entry_priority(metadata: Dict[str, Any]) -> float:
+    """The frontmatter `priority:` as a number; 0 if missing or not a number."""
+    value = metadata.get('priority')
+    if isinstance(value, bool):
+        return 0
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return 0
+
+
+def sort_key(order: str, path: str, size: int, metadata: Dict[str, Any]) -> Tuple:
+    """
+    Where an entry goes in an order other than "path": entries with a
+    smaller key are imported first.
+
+    Args:
+        order: One of ORDERS
+        path: Path relative to the journal root, with "/" separators
+        size: File size in bytes
+        metadata: The entry's frontmatter, or {} if it can't be read
+    """
+    rank = -entry_priority(metadata)
+    if order == "newest":
+        iso = parse_date(metadata.get('date'))
+        found = tuple(int(part) for part in iso.split('-')) if iso else path_date(path)
+        if found is None:
+            return rank, 1
+        return (rank, 0) + tuple(-part for part in found)
+    if order == "smallest":
+        return rank, size
+    return (rank,)
+
+
+def schedule(items: Iterable[T], key: Callable[[T], Any],
+             lookahead: int = LOOKAHEAD) -> Iterator[T]:
+    """
+    Yield items smallest key first, while they are still coming in.
+
+    `items` is read, and `key` called, on a background thread that pushes
+    onto a heap. Each item handed out is the best one read so far, taken
+    once `lookahead` items more than were handed out have been read, or
+    all of them. Items with equal keys come out in the order they were read.
+
+    Raises:
+        Whatever reading `items` or calling `key` raised, once the items
+        read before it are handed out
+    """
+    heap: list = []
+    ready = threading.Condition()
+    stop = threading.Event()
+    state = {"done": False, "error": None, "read": 0}
+
+    def feed() -> None:
+        try:
+            for seq, item in enumerate(items):
+                if stop.is_set():
+                    return
+                entry = (key(item), seq, item)
+                with ready:
+                    heapq.heappush(heap, entry)
+                    state["read"] += 1
+                    ready.notify()
+        except BaseException as e:
+            state["error"] = e
+        finally:
+            with ready:
+                state["done"] = True
+                ready.notify()
+
+    thread = threading.Thread(target=feed, name="schedule", daemon=True)
+    thread.start()
+    handed_out = 0
+    try:
+        while True:
+            with ready:
+                while not state["done"] and (not heap or
+                                             state["read"] < handed_out + lookahead):
+                    ready.wait()
+                if not heap:
+                    break
+                item = heapq.heappop(heap)[2]
+            handed_out += 1
+            yield item
+        if state["error"] is not None:
+            raise state["error"]
+    finally:
+        stop.set()
+        thread.join()
@@ -0,0 +1,243 @@
+"""
+Journal imports on request, for Python code and for other tools.
+
+JournalImporter runs imports the way import-journal-to-notion.py does, but
+keeps the database schema, dedupe index, manifest and client connections
+warm between calls, so each import only costs requests for its own files:
+
+    from journal_service import JournalImporter
+
+    with JournalImporter(["--sync"]) as importer:
+        result = importer.import_file("Journal/2024/05/2024-05-01.md")
+
+`import-journal-to-notion.py --serve` runs one as a long-lived worker
+(see serve()) that reads import requests as JSON lines on stdin and
+answers each one with a JSON line on stdout, so other tools can push many
+imports through one warm process:
+
+    → {"id": 1, "paths": ["Journal/2024/05/2024-05-01.md"]}
+    ← {"id": 1, "ok": true, "results": [{"path": ..., "status": "imported",
+       "page_id": ..., ...}], "totals": {...}, "elapsed_seconds": 0.4}
+"""
+
+import os
+import sys
+import json
+import time
+from contextlib import redirect_stdout
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+import journal_importer
+from journal_cache import ConversionCache
+from journal_importer import FAILED, ContentIndex, ImportJob, ImportTotals, TitleIndex, \
+    configure, conversion_cache, file_uploader, import_batch, missing_settings, notion, \
+    parse_args, prepare_database, tag_registry
+from journal_metrics import EventLog
+from journal_state import DeadLetterFile, ImportManifest
+
+
+class JournalImporter:
+    """
+    Imports journal files on request, keeping everything warm in between.
+
+    The database schema and dedupe index are loaded, and the manifest and
+    dead-letter file opened, on the first import; later imports reuse them
+    and the client's open connections, so each one costs requests for its
+    own files only. Progress is printed as on the command line.
+
+    The client, rate limiter, retry budget and metrics belong to
+    journal_importer and are shared by every importer in the process, so
+    use one importer per process. Not thread-safe: make one call at a time.
+    """
+
+    def __init__(self, options: Optional[List[str]] = None, token: Optional[str] = None,
+                 database_id: Optional[str] = None, root_path: Optional[str] = None,
+                 base_url: Optional[str] = None):
+        """
+        Args:
+            options: Command-line options, e.g. ["--sync", "--workers", "4"].
+                --watch, --retry-failed and --resume don't apply here.
+            token, database_id, root_path, base_url: Settings to use
+                instead of the environment's (see configure())
+
+        Raises:
+            ValueError: A required setting is missing, or the options are invalid
+        """
+        configure(token, database_id, root_path, base_url)
+        missing = missing_settings()
+        if missing:
+            raise ValueError(f"Missing required setting(s): {', '.join(missing)}")
+        options = list(options or ())
+        try:
+            self.args = parse_args(options)
+        except SystemExit:
+            raise ValueError(f"Invalid importer options: {' '.join(options)}") from None
+        if self.args.watch or self.args.retry_failed or self.args.resume:
+            raise ValueError("--watch, --retry-failed and --resume are only for the command line")
+        self.totals = ImportTotals()
+        self._ready = False
+        self._manifest: Optional[ImportManifest] = None
+        self._dead_letter: Optional[DeadLetterFile] = None
+        self._title_index: Optional[TitleIndex] = None
+        self._content_index: Optional[ContentIndex] = None
+        self._cache: Optional[ConversionCache] = None
+        self._events = EventLog(self.args.events) if self.args.events else None
+
+    def _prepare(self) -> None:
+        """Load the database and open the import's files, once."""
+        if self._ready:
+            return
+        root_path = journal_importer.JOURNAL_ROOT_PATH  # as configure() left it
+        if not os.path.isdir(root_path):
+            raise FileNotFoundError(f"Journal root path not found: {root_path}")
+        manifest = None if self.args.no_manifest else ImportManifest(self.args.manifest,
+                                                                     root_path)
+        try:
+            database, self._title_index, self._content_index = prepare_database(self.args,
+                                                                                manifest)
+        except Exception:
+            if manifest is not None:
+                manifest.close()
+            raise
+        tag_registry.load_schema(database)
+        if manifest is not None:
+            file_uploader.remember(manifest.uploads())
+        self._manifest = manifest
+        self._dead_letter = DeadLetterFile(self.args.dead_letter, root_path)
+        self._cache = conversion_cache(self.args)
+        self._ready = True
+
+    def import_files(self, paths: Optional[Iterable[str]] = None) -> List[Dict[str, Any]]:
+        """
+        Import some files, or every file under the journal root.
+
+        Args:
+            paths: Markdown files to import, or None for the whole journal
+                (the manifest skips files that haven't changed)
+
+        Returns:
+            One result per file, in order: dicts with 'path', 'status'
+            (imported, updated, skipped or failed), 'unchanged', 'title'
+            (None for unchanged files, which aren't read), 'page_id' and
+            'error'. Paths that don't exist fail with "File not found".
+
+        Raises:
+            RuntimeError: The database or its dedupe index couldn't be loaded
+        """
+        self._prepare()
+        requested = None if paths is None else list(dict.fromkeys(str(path) for path in paths))
+        finished: List[ImportJob] = []
+        batch = import_batch(self.args, requested, self._manifest, self._dead_letter,
+                              self._events, not (self.args.quiet or self._events),
+                              self._title_index, self._content_index, self._cache, finished)
+        self.totals.merge(batch)
+        results = {}
+        for job in finished:
+            if job.unchanged and not job.page_id and self._manifest is not None:
+                # Unchanged files aren't read; their page is the one on record
+                job.page_id = self._manifest.page_id(job.file_path)
+            results[str(job.file_path)] = _job_result(job)
+        if requested is None:
+            return list(results.values())
+        return [results.get(str(Path(path))) or {
+            "path": path, "status": FAILED, "unchanged": False, "title": None,
+            "page_id": None, "error": "File not found",
+        } for path in requested]
+
+    def import_file(self, path: str) -> Dict[str, Any]:
+        """Import one file; see import_files() for the result."""
+        return self.import_files([path])[0]
+
+    def close(self) -> None:
+        """
+        Save the manifest, trim the conversion cache and close the files
+        and the client's connections.
+        """
+        if self._cache is not None:
+            self._cache.prune()  # quietly: stdout may be a --serve channel
+            self._cache.close()
+        if self._manifest is not None:
+            self._manifest.close()
+        if self._dead_letter is not None:
+            self._dead_letter.close()
+        if self._events:
+            self._events.close()
+        self._manifest = self._dead_letter = self._cache = self._events = None
+        self._ready = False
+        file_uploader.close()
+        notion.close()
+
+    def __enter__(self) -> "JournalImporter":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def _job_result(job: ImportJob) -> Dict[str, Any]:
+    return {"path": str(job.file_path), "status": job.status, "unchanged": job.unchanged,
+            "title": job.title, "page_id": job.page_id, "error": job.error}
+
+
+def serve(importer: JournalImporter, requests, responses) -> int:
+    """
+    Answer import requests, one JSON object per line, until the input ends
+    or a shutdown request comes.
+
+    Requests:
+        {"id": 1, "paths": ["a.md", "b.md"]}  import these files ("path"
+                                              for one, neither for the
+                                              whole journal)
+        {"id": 2, "op": "ping"}               check the worker is alive
+        {"id": 3, "op": "shutdown"}           stop after answering
+
+    Each request gets one line back with its "id" and "ok". An import
+    answer has "results" (see JournalImporter.import_files()), "totals"
+    (files per status) and "elapsed_seconds"; a failed request has "error"
+    instead. Everything else the importer prints goes to stderr.
+    """
+    def respond(request_id: Any, **fields) -> None:
+        responses.write(json.dumps({"id": request_id, **fields}, ensure_ascii=False) + "\n")
+        responses.flush()
+
+    with redirect_stdout(sys.stderr):
+        print(f"🛠️  Serving import requests for {journal_importer.JOURNAL_ROOT_PATH}, "
+              f"one JSON object per line")
+        try:
+            for line in iter(requests.readline, ""):
+                if not line.strip():
+                    continue
+                request_id = None
+                try:
+                    request = json.loads(line)
+                    if not isinstance(request, dict):
+                        raise ValueError("a request must be a JSON object")
+                    request_id = request.get("id")
+                    op = request.get("op", "import")
+                    if op == "shutdown":
+                        respond(request_id, ok=True)
+                        break
+                    if op == "ping":
+                        respond(request_id, ok=True)
+                        continue
+                    if op != "import":
+                        raise ValueError(f"unknown op: {op}")
+                    paths = [request["path"]] if "path" in request else request.get("paths")
+                    if paths is not None and (not isinstance(paths, list) or
+                                              not all(isinstance(path, str) for path in paths)):
+                        raise ValueError('"paths" must be a list of file paths')
+                    started = time.monotonic()
+                    results = importer.import_files(paths)
+                except Exception as e:
+                    respond(request_id, ok=False, error=str(e))
+                    continue
+                totals: Dict[str, int] = {}
+                for result in results:
+                    totals[result["status"]] = totals.get(result["status"], 0) + 1
+                respond(request_id, ok=True, results=results, totals=totals,
+                        elapsed_seconds=round(time.monotonic() - started, 3))
+        except KeyboardInterrupt:
+            pass
+        print("⏹️  Stopped serving.")
+    return 0
@@ -0,0 +1,390 @@
+"""
+The files an import keeps next to the journal between runs.
+
+    ImportManifest    SQLite record of every file that reached Notion, so
+                      unchanged files are skipped with one stat() call
+    DeadLetterFile    JSON lines of the files that failed, for --retry-failed
+    ImportCheckpoint  JSON lines of the files a run finished, for --resume
+
+Each one keys files by their path relative to the journal root, so a
+journal can be moved or synced to another machine without losing them.
+None of them talks to Notion.
+"""
+
+import os
+import json
+import time
+import sqlite3
+from pathlib import Path
+from datetime import datetime
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set
+
+from journal_files import JournalFile
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Import Manifest
+# ─────────────────────────────────────────────────────────────────────────────
+
+class ImportManifest:
+    """
+    On-disk record of every file that has reached Notion.
+
+    Maps each file (relative to the journal root) to the mtime, size and
+    content hash it had when it was imported, plus the page it ended up in.
+    A file whose mtime and size still match is skipped with one stat() call,
+    before it is read or any API request is made.
+
+    It also caches the dedupe keys (title, content hash, source path) of
+    every page in the database, with the time they were last refreshed,
+    for load_content_index(), and the file uploads that pages were created
+    with, so later runs reuse them (see journal_uploads).
+
+    The manifest is only touched from the main thread, apart from
+    is_unchanged(), which --order also calls on the scheduler's thread.
+    Rows are loaded into memory once and new rows are written in batched
+    transactions.
+    """
+
+    COMMIT_EVERY = 100
+
+    def __init__(self, path: str, root_path: str):
+        self.path = path
+        self.root_path = root_path
+        self._conn = sqlite3.connect(path)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS files (
+                path TEXT PRIMARY KEY,
+                mtime_ns INTEGER NOT NULL,
+                size INTEGER NOT NULL,
+                content_hash TEXT NOT NULL,
+                page_id TEXT,
+                imported_at TEXT NOT NULL
+            )
+            """
+        )
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS pages (
+                page_id TEXT PRIMARY KEY,
+                title TEXT,
+                content_hash TEXT,
+                source_path TEXT
+            )
+            """
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS settings (key TEXT PRIMARY KEY, value TEXT)"
+        )
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS uploads (
+                upload_key TEXT PRIMARY KEY,
+                upload_id TEXT NOT NULL,
+                uploaded_at TEXT NOT NULL
+            )
+            """
+        )
+        self._rows: Dict[str, tuple] = {
+            row[0]: row[1:] for row in self._conn.execute(
+                "SELECT path, mtime_ns, size, content_hash, page_id FROM files"
+            )
+        }
+        self._pending: List[tuple] = []
+        self._pending_uploads: Dict[str, tuple] = {}
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def key(self, file_path: Path) -> str:
+        """Manifest key for a file: its path relative to the journal root."""
+        return os.path.relpath(file_path, self.root_path)
+
+    def is_unchanged(self, file_path: Path, stat: os.stat_result) -> bool:
+        """True if the file has the same mtime and size as when imported."""
+        row = self._rows.get(self.key(file_path))
+        return row is not None and row[0] == stat.st_mtime_ns and row[1] == stat.st_size
+
+    def has_content(self, file_path: Path, content_hash: str) -> bool:
+        """True if the file was touched but its content was already imported."""
+        row = self._rows.get(self.key(file_path))
+        return row is not None and row[2] == content_hash
+
+    def page_id(self, file_path: Path) -> Optional[str]:
+        """ID of the Notion page created from the file, if known."""
+        row = self._rows.get(self.key(file_path))
+        return row[3] if row else None
+
+    def record(self, file_path: Path, stat: os.stat_result, content_hash: str,
+               page_id: Optional[str]) -> None:
+        """Remember a file that is now in Notion."""
+        key = self.key(file_path)
+        page_id = page_id or self.page_id(file_path)
+        self._rows[key] = (stat.st_mtime_ns, stat.st_size, content_hash, page_id)
+        self._pending.append((key, stat.st_mtime_ns, stat.st_size, content_hash,
+                              page_id, datetime.now().isoformat(timespec='seconds')))
+        if len(self._pending) >= self.COMMIT_EVERY:
+            self.commit()
+
+    def uploads(self) -> Dict[str, str]:
+        """Upload key → ID of the file uploads pages were created with."""
+        return dict(self._conn.execute("SELECT upload_key, upload_id FROM uploads"))
+
+    def record_uploads(self, uploads: Dict[str, str]) -> None:
+        """Remember file uploads that are now part of a page."""
+        now = datetime.now().isoformat(timespec='seconds')
+        for key, upload_id in uploads.items():
+            self._pending_uploads[key] = (key, upload_id, now)
+
+    def forget_uploads(self, keys: Iterable[str]) -> None:
+        """Drop file uploads that may no longer be usable."""
+        rows = [(key,) for key in keys]
+        for (key,) in rows:
+            self._pending_uploads.pop(key, None)
+        with self._conn:
+            self._conn.executemany("DELETE FROM uploads WHERE upload_key = ?", rows)
+
+    def cached_pages(self) -> tuple:
+        """
+        The cached page keys and when they were refreshed.
+
+        Returns:
+            (refresh time to query from, or None if never refreshed,
+             list of (page_id, title, content_hash, source_path))
+        """
+        row = self._conn.execute(
+            "SELECT value FROM settings WHERE key = 'pages_refreshed_at'"
+        ).fetchone()
+        if row is None:
+            return None, []
+        pages = self._conn.execute(
+            "SELECT page_id, title, content_hash, source_path FROM pages"
+        ).fetchall()
+        return row[0], pages
+
+    def save_pages(self, rows: List[tuple], refreshed_at: str) -> None:
+        """Cache page keys fetched from Notion, replacing older copies."""
+        with self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO pages (page_id, title, content_hash, source_path) "
+                "VALUES (?, ?, ?, ?)",
+                rows
+            )
+            self._conn.execute(
+                "INSERT OR REPLACE INTO settings (key, value) VALUES ('pages_refreshed_at', ?)",
+                (refreshed_at,)
+            )
+
+    def commit(self) -> None:
+        """Write buffered rows to disk."""
+        if not self._pending and not self._pending_uploads:
+            return
+        with self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO files "
+                "(path, mtime_ns, size, content_hash, page_id, imported_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                self._pending
+            )
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO uploads (upload_key, upload_id, uploaded_at) "
+                "VALUES (?, ?, ?)",
+                self._pending_uploads.values()
+            )
+        self._pending = []
+        self._pending_uploads = {}
+
+    def close(self) -> None:
+        self.commit()
+        self._conn.close()
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Dead-Letter File
+# ─────────────────────────────────────────────────────────────────────────────
+
+class DeadLetterFile:
+    """
+    JSON-lines list of files whose import failed, for --retry-failed.
+
+    Each line holds a file's path (relative to the journal root), the error
+    and when it happened. Failures are appended and flushed as they occur,
+    so the list survives a crash. Files that import cleanly later are
+    dropped from it when the run ends, and the file is deleted once empty.
+
+    Only touched from the main thread.
+    """
+
+    def __init__(self, path: str, root_path: str):
+        self.path = path
+        self.root_path = root_path
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._resolved = False
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue  # a line cut short by a crash
+                    self._entries[entry["path"]] = entry
+        self._file = None
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def key(self, file_path: Path) -> str:
+        return os.path.relpath(file_path, self.root_path)
+
+    def files(self) -> List[JournalFile]:
+        """The listed files that still exist, in path order."""
+        found = []
+        for key in sorted(self._entries):
+            file_path = Path(self.root_path, key)
+            if file_path.is_file():
+                found.append(JournalFile(file_path))
+        return found
+
+    def add(self, file_path: Path, error: str) -> None:
+        entry = {
+            "path": self.key(file_path),
+            "error": error,
+            "failed_at": datetime.now().isoformat(timespec='seconds'),
+        }
+        self._entries[entry["path"]] = entry
+        if self._file is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            self._file = open(self.path, "a", encoding="utf-8")
+        self._file.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        self._file.flush()
+
+    def resolve(self, file_path: Path) -> None:
+        """Forget a file that has now been imported (or skipped) cleanly."""
+        if self._entries.pop(self.key(file_path), None) is not None:
+            self._resolved = True
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        if not self._resolved:
+            return
+        if not self._entries:
+            os.remove(self.path)
+            return
+        # Rewrite without the resolved files, replacing the old list atomically
+        temp_path = self.path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            for entry in self._entries.values():
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        os.replace(temp_path, self.path)
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Checkpoint
+# ─────────────────────────────────────────────────────────────────────────────
+
+class ImportCheckpoint:
+    """
+    Append-only journal of the files a run has finished, for --resume.
+
+    Each line holds a file's path (relative to the journal root), how it
+    ended and its page ID. Files finish in walk order unless --order says
+    otherwise, so the last line is usually where an interrupted run stopped
+    and --resume carries on from there without listing the folders before
+    it or querying Notion again. Otherwise --resume skips the files listed.
+
+    Lines are buffered and written in batches; flush() fsyncs them, and is
+    called at the points where the manifest has been committed too. The
+    journal is deleted when a run gets to the end.
+
+    Only touched from the main thread.
+    """
+
+    FLUSH_EVERY = 100
+    FLUSH_SECONDS = 5.0
+
+    def __init__(self, path: str, root_path: str):
+        self.path = path
+        self.root_path = root_path
+        self.last_path: Optional[str] = None  # last file the previous run finished
+        self.finished: Set[str] = set()       # every file it finished
+        self.in_path_order = True             # and whether they were in walk order
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue  # a line cut short by a crash
+                    if self.last_path is not None and entry["path"] <= self.last_path:
+                        self.in_path_order = False
+                    self.last_path = entry["path"]
+                    self.finished.add(entry["path"])
+        self._pending: List[str] = []
+        self._flushed_at = time.monotonic()
+        self._file = None
+
+    def start(self, resume: bool) -> None:
+        """Open the journal, continuing it or starting a new one."""
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self._file = open(self.path, "a" if resume else "w", encoding="utf-8")
+        if not resume:
+            self.last_path, self.finished, self.in_path_order = None, set(), True
+
+    @property
+    def completed(self) -> int:
+        """Files the previous run finished."""
+        return len(self.finished)
+
+    @property
+    def resume_after(self) -> Optional[str]:
+        """
+        The file a resumed walk can start after: the last one finished, if
+        the files were finished in walk order.
+        """
+        return self.last_path if self.in_path_order else None
+
+    def remaining(self, md_files: Iterable[JournalFile]) -> Iterator[JournalFile]:
+        """The files the previous run didn't finish."""
+        for found in md_files:
+            if os.path.relpath(found.path, self.root_path) not in self.finished:
+                yield found
+
+    def record(self, file_path: Path, status: str, page_id: Optional[str]) -> bool:
+        """Add a finished file. Returns True when it is time to flush()."""
+        if self._file is None:
+            return False
+        entry = {
+            "path": os.path.relpath(file_path, self.root_path),
+            "status": status,
+            "page_id": page_id,
+        }
+        self._pending.append(json.dumps(entry, ensure_ascii=False) + "\n")
+        return (len(self._pending) >= self.FLUSH_EVERY
+                or time.monotonic() - self._flushed_at >= self.FLUSH_SECONDS)
+
+    def flush(self) -> None:
+        """Write buffered lines and fsync them."""
+        self._flushed_at = time.monotonic()
+        if not self._pending or self._file is None:
+            return
+        self._file.writelines(self._pending)
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._pending = []
+
+    def close(self, finished: bool) -> None:
+        """Flush and close; a finished run has nothing left to resume."""
+        if self._file is None:
+            return
+        self.flush()
+        self._file.close()
+        self._file = None
+        if finished:
+            os.remove(self.path)
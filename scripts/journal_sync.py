@@ -0,0 +1,254 @@
+"""
+Updating journal pages in place, for --sync.
+
+An entry that already has a page is brought in line with its file by
+diffing blocks rather than by deleting the page and creating it again.
+block_signature() sums a block up by its type, plain text and children, in
+the same way for blocks read from Notion and blocks converted from
+Markdown, and plan_block_changes() matches the two lists up with difflib.
+Blocks that stayed are left alone, blocks that changed text but not type
+are updated where they are, and the rest are deleted or inserted, so an
+edit to one paragraph of a long entry costs a request or two.
+
+PageSync sends the planned changes through the importer's client, rate
+limiter and file uploader, which it is given rather than importing, so the
+planning functions here don't need a Notion client at all.
+"""
+
+import os
+import difflib
+from contextlib import nullcontext
+from typing import Any, Callable, Dict, List, Optional
+
+from journal_markdown import content_to_notion_blocks, media_source, plain_text
+from journal_uploads import FileUploader, keep_as_text, resolve_files
+
+
+def block_signature(block: Dict) -> tuple:
+    """
+    Comparable summary of a block: its type, plain text and nested children.
+    Images and files are compared by caption and file name or URL.
+
+    Works for both blocks returned by the API and blocks built by
+    content_to_notion_blocks(), which lack ids, colors and plain_text.
+    """
+    block_type = block.get("type")
+    data = block.get(block_type, {})
+    if data.get("type") in ("external", "file", "file_upload"):
+        return (block_type, plain_text(data["caption"]), media_source(data), ())
+    text = plain_text(data.get("rich_text", []))
+    children = tuple(block_signature(child) for child in data.get("children", ()))
+    return (block_type, text, data.get("language"), children)
+
+
+def _has_children(block: Dict) -> bool:
+    return bool(block.get("has_children") or block.get(block["type"], {}).get("children"))
+
+
+def plan_block_changes(old_blocks: List[Dict], new_blocks: List[Dict]) -> List[tuple]:
+    """
+    Work out the smallest set of block operations that turns the page's
+    current children into `new_blocks`.
+
+    Returns a list of operations, applied in order:
+        ("update", block_id, new_block)       – same type, new text
+        ("delete", block_id, None)
+        ("insert", after, [new_block, ...])
+    `after` is the ID of a block that survives the sync, None for "at the
+    start of the page", or ("op", n) for the last block created by
+    operation n.
+    """
+    old_sigs = [block_signature(b) for b in old_blocks]
+    new_sigs = [block_signature(b) for b in new_blocks]
+    matcher = difflib.SequenceMatcher(None, old_sigs, new_sigs, autojunk=False)
+
+    operations = []
+    anchor = None  # last block that will still exist after the sync
+
+    # Non-equal opcodes are always separated by an "equal" one, so each
+    # changed region is handled on its own
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == "equal":
+            anchor = old_blocks[i2 - 1]["id"]
+            continue
+
+        old_slice = old_blocks[i1:i2]
+        new_slice = new_blocks[j1:j2]
+        paired = 0
+        # Rewrite blocks in place while the types line up
+        # (blocks.update can't change children, so nested blocks are replaced)
+        while (paired < len(old_slice) and paired < len(new_slice)
+               and old_slice[paired]["type"] == new_slice[paired]["type"]
+               and not _has_children(old_slice[paired])
+               and not _has_children(new_slice[paired])):
+            operations.append(("update", old_slice[paired]["id"], new_slice[paired]))
+            anchor = old_slice[paired]["id"]
+            paired += 1
+        for block in old_slice[paired:]:
+            operations.append(("delete", block["id"], None))
+        if new_slice[paired:]:
+            operations.append(("insert", anchor, new_slice[paired:]))
+
+    return _rewrite_leading_insert(operations, old_blocks, new_blocks)
+
+
+def _rewrite_leading_insert(operations: List[tuple], old_blocks: List[Dict],
+                            new_blocks: List[Dict]) -> List[tuple]:
+    """
+    Notion can only append after an existing block, not before the first
+    one. An insert at the start of a page is turned into an in-place update
+    of the first surviving block, which then gets its old content back in a
+    new block right after the inserted ones. When the block types don't
+    allow that, the page is rewritten.
+    """
+    leading = [n for n, op in enumerate(operations) if op[0] == "insert" and op[1] is None]
+    if not leading:
+        return operations
+
+    deleted = {op[1] for op in operations if op[0] == "delete"}
+    survivors = [b for b in old_blocks if b["id"] not in deleted]
+    if not survivors:
+        return operations  # nothing left on the page, so appending is fine
+
+    n = leading[0]
+    first = survivors[0]
+    inserted = operations[n][2]
+    if (inserted[0]["type"] != first["type"] or _has_children(first)
+            or _has_children(inserted[0]) or "rich_text" not in first[first["type"]]):
+        return ([("delete", b["id"], None) for b in old_blocks]
+                + [("insert", None, new_blocks)])
+
+    block_type = first["type"]
+    moved = {"object": "block", "type": block_type,
+             block_type: {key: value for key, value in first[block_type].items()
+                          if key in ("rich_text", "language")}}
+    rewritten = (operations[:n]
+                 + [("update", first["id"], inserted[0]),
+                    ("insert", first["id"], inserted[1:] + [moved])])
+    # Later inserts that followed the first survivor now follow its copy
+    moved_ref = ("op", len(rewritten) - 1)
+    for op, target, payload in operations[n + 1:]:
+        if op == "insert" and target == first["id"]:
+            target = moved_ref
+        rewritten.append((op, target, payload))
+    return rewritten
+
+
+class PageSync:
+    """
+    Sends the changes plan_block_changes() finds to Notion. Thread-safe, as
+    long as each page is synced by one thread at a time.
+
+    Args:
+        client: Notion client, e.g. notion_api.LazyClient
+        request: Calls an endpoint with the shared rate limit and retries,
+            like journal_importer.notion_request()
+        append: Appends blocks to a page after a given block and returns the
+            ID of the last one, like journal_importer.append_blocks()
+        uploader: Uploads the local files in the blocks that are sent
+        metrics: journal_metrics.Metrics to time the "convert" stage in
+        blocks_written: notion_api.RunningTotal of the blocks sent
+        log: Where progress and errors go
+    """
+
+    def __init__(self, client: Any, request: Callable[..., Any],
+                 append: Callable[..., Optional[str]], uploader: Optional[FileUploader] = None,
+                 metrics: Any = None, blocks_written: Any = None,
+                 log: Callable[[str], None] = print):
+        self.client = client
+        self.request = request
+        self.append = append
+        self.uploader = uploader
+        self.metrics = metrics
+        self.blocks_written = blocks_written
+        self.log = log
+
+    def fetch_block_children(self, block_id: str, recursive: bool = False) -> List[Dict]:
+        """
+        Return every child block of a page or block, following pagination.
+
+        With recursive=True, nested children are fetched too and stored under
+        block[type]["children"], the same shape content_to_notion_blocks() uses.
+        """
+        children = []
+        start_cursor = None
+        while True:
+            query = {"block_id": block_id, "page_size": 100}
+            if start_cursor:
+                query["start_cursor"] = start_cursor
+            results = self.request(self.client.blocks.children.list, **query)
+            children.extend(results.get("results", []))
+            if not results.get("has_more"):
+                break
+            start_cursor = results.get("next_cursor")
+
+        if recursive:
+            for block in children:
+                if block.get("has_children"):
+                    block[block["type"]]["children"] = self.fetch_block_children(block["id"],
+                                                                                 True)
+        return children
+
+    def sync_notion_page(self, page_id: str, properties: Dict[str, Any], content: str,
+                         blocks: Optional[List[Dict]] = None, pack: bool = False,
+                         file_path: Optional[str] = None, upload_files: bool = True,
+                         uploads: Optional[Dict[str, str]] = None,
+                         root: Optional[str] = None) -> Optional[int]:
+        """
+        Bring an existing page in line with its Markdown file.
+
+        Updates the page properties, then diffs the page's blocks against
+        content_to_notion_blocks() output and sends only the block updates,
+        deletes and appends needed. Local images and files are only uploaded
+        for the blocks that are sent.
+
+        Args:
+            page_id: ID of the page to update
+            properties: New property values, with empty Tags and Date values
+                for those deleted from the file
+            content: Page content
+            blocks: content already converted to Notion blocks, if available
+            pack: Merge consecutive paragraphs when converting the content
+            file_path: The Markdown file, which local files are relative to
+            upload_files: Upload the local images and files the content refers
+                to, instead of keeping them as text
+            uploads: Filled in with upload key → upload ID of the files uploaded
+            root: The journal root, which local files may also be under
+
+        Returns:
+            Number of block operations sent, or None if the sync failed
+        """
+        try:
+            self.request(self.client.pages.update, page_id=page_id, properties=properties)
+
+            old_blocks = self.fetch_block_children(page_id, recursive=True)
+            if blocks is None:
+                timer = self.metrics.time("convert") if self.metrics is not None else nullcontext()
+                with timer:
+                    blocks = content_to_notion_blocks(content, pack=pack)
+            base_dir = os.path.dirname(file_path) if file_path else "."
+            new_blocks = keep_as_text(blocks, base_dir, upload_files, warn=self.log, root=root)
+            operations = plan_block_changes(old_blocks, new_blocks)
+
+            created: Dict[int, str] = {}  # operation index -> last block it created
+            for n, (op, target, payload) in enumerate(operations):
+                if op != "delete":
+                    resolved = list(resolve_files(payload if op == "insert" else [payload],
+                                                  base_dir, self.uploader, uploads,
+                                                  warn=self.log, root=root))
+                    payload = resolved if op == "insert" else resolved[0]
+                if op == "update":
+                    self.request(self.client.blocks.update, block_id=target,
+                                 **{payload["type"]: payload[payload["type"]]})
+                    if self.blocks_written is not None:
+                        self.blocks_written.add(1)
+                elif op == "delete":
+                    self.request(self.client.blocks.delete, block_id=target)
+                else:
+                    after = created[target[1]] if isinstance(target, tuple) else target
+                    created[n] = self.append(page_id, payload, after=after)
+            return len(operations)
+
+        except Exception as e:
+            self.log(f"   ❌ Failed to update page: {e}")
+            return None
@@ -0,0 +1,119 @@
+"""
+Tags for the Notion import scripts.
+
+Notion creates a multi-select option for every tag name it hasn't seen, so
+"Travel", "travel" and "travel " become three options. Tags are normalised
+here (Unicode NFC, runs of whitespace collapsed, no commas) and matched to the
+database's existing options without regard to case, and the importer can
+add the options a run needs in one schema update before it starts.
+"""
+
+import sys
+import threading
+import unicodedata
+from typing import Any, Dict, Iterable, List
+
+
+def normalize_tag(tag: Any) -> str:
+    """
+    A tag as it should be sent: NFC, trimmed, inner whitespace collapsed.
+    Commas become spaces, as Notion doesn't allow them in option names.
+    """
+    return " ".join(unicodedata.normalize("NFC", str(tag)).replace(",", " ").split())
+
+
+def tag_key(tag: str) -> str:
+    """What two spellings of the same tag have in common."""
+    return normalize_tag(tag).casefold()
+
+
+class TagRegistry:
+    """
+    The database's multi-select options for one property, plus every tag
+    seen during the run.
+
+    Each tag name is interned and maps to one shared {"name": ...} dict, so
+    thousands of pages with the same tags share their payload fragments
+    instead of each building its own. Thread-safe.
+    """
+
+    def __init__(self, property_name: str = "Tags"):
+        self.property_name = property_name
+        self.options: Dict[str, Dict[str, Any]] = {}  # tag_key → option in the schema
+        self._names: Dict[str, str] = {}              # tag_key → name to send
+        self._fragments: Dict[str, Dict[str, str]] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.options)
+
+    def load_schema(self, database: Dict[str, Any]) -> bool:
+        """
+        Learn the options from a databases.retrieve (or update) response.
+
+        Option names from Notion win over the spellings seen so far.
+
+        Returns:
+            False if the database has no multi-select property of that name
+        """
+        prop = database.get("properties", {}).get(self.property_name, {})
+        if prop.get("type", "multi_select") != "multi_select" or "multi_select" not in prop:
+            return False
+        with self._lock:
+            for option in prop["multi_select"].get("options", []):
+                key = tag_key(option["name"])
+                self.options[key] = option
+                self._names[key] = sys.intern(option["name"])
+        return True
+
+    def canonical(self, tag: str) -> str:
+        """The spelling to send for a tag: the existing option's, or the first one seen."""
+        key = tag_key(tag)
+        name = self._names.get(key)
+        if name is None:
+            with self._lock:
+                name = self._names.setdefault(key, sys.intern(normalize_tag(tag)))
+        return name
+
+    def canonical_tags(self, tags: Iterable[str]) -> List[str]:
+        """canonical() for each tag, dropping duplicates and empty tags."""
+        result: List[str] = []
+        for tag in tags:
+            name = self.canonical(tag)
+            if name and name not in result:
+                result.append(name)
+        return result
+
+    def missing(self, tags: Iterable[str]) -> List[str]:
+        """The tags (canonical, in first-seen order) with no option in the database yet."""
+        missing: Dict[str, None] = {}
+        for tag in tags:
+            name = self.canonical(tag)
+            if name and tag_key(name) not in self.options:
+                missing[name] = None
+        return list(missing)
+
+    def schema_update(self, new_names: Iterable[str]) -> Dict[str, Any]:
+        """
+        The `properties` for one databases.update call that adds options.
+
+        Existing options are sent back as they are, so none is renamed,
+        recoloured or dropped.
+        """
+        with self._lock:
+            options = [{key: option[key] for key in ("id", "name", "color") if key in option}
+                       for option in self.options.values()]
+        options.extend({"name": name} for name in new_names)
+        return {self.property_name: {"multi_select": {"options": options}}}
+
+    def multi_select(self, tags: Iterable[str]) -> Dict[str, Any]:
+        """The property value for a page's tags, built from shared fragments."""
+        values = []
+        for tag in tags:
+            name = self.canonical(tag)
+            fragment = self._fragments.get(name)
+            if fragment is None:
+                with self._lock:
+                    fragment = self._fragments.setdefault(name, {"name": name})
+            values.append(fragment)
+        return {"multi_select": values}
@@ -0,0 +1,389 @@
+"""
+Uploading the local images and files that journal entries refer to.
+
+journal_markdown turns a line like `![Field 3](photos/field-3.jpg)` or
+`[Receipt](scans/receipt.pdf)` into an image or file block that holds the
+path as written. Before the blocks are sent, resolve_files() finds each
+file relative to its entry, uploads it through Notion's file upload
+endpoints and puts the upload's ID in the block. A file that isn't there
+stays in the page as the Markdown it was written as, and so does one
+outside the entry's folder and the journal, so that an entry can't send
+`~/.ssh/id_rsa` or `/etc/passwd` to Notion.
+
+Uploads are keyed by the SHA-256 of the file's content and its name, so a
+photo shared by many entries (or copied into several folders) is sent once
+per run, and only once ever when the import manifest remembers the uploads
+that pages were created with. The name is part of the key because Notion
+shows it, and because a sync compares file blocks by name.
+
+The files of a page are uploaded concurrently, up to FileUploader.workers
+at a time across all pages, and are streamed from disk: each one is read
+in chunks as its request goes out, and files over 20 MB are sent in 10 MB
+parts.
+"""
+
+import os
+import hashlib
+import mimetypes
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import nullcontext
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from journal_markdown import local_file, plain_text, text_block
+
+# Notion takes files up to this size in a single request...
+SINGLE_PART_LIMIT = 20 * 1024 * 1024
+
+# ...and bigger ones in parts of this size (5-20 MB each, bar the last)
+PART_SIZE = 10 * 1024 * 1024
+
+# Blocks resolved at a time: the uploads of one window run concurrently,
+# and a generator of blocks is only read one window ahead
+WINDOW = 100
+
+# Files uploaded at once, across every page
+DEFAULT_WORKERS = 4
+
+_READ_SIZE = 1024 * 1024
+
+
+class UploadError(Exception):
+    """A file couldn't be uploaded; the message names it."""
+
+
+def hash_file(path: str) -> str:
+    """SHA-256 of a file's content, read in chunks."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(_READ_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class _FilePart:
+    """
+    A slice of an open file that reads like a file of its own, so httpx
+    streams one part of a multi-part upload without loading it. Has no
+    fileno(), which httpx would take the size of the whole file from.
+    """
+
+    def __init__(self, file, start: int, length: int):
+        self._file = file
+        self._start = start
+        self._length = length
+        self._position = 0
+
+    def read(self, size: int = -1) -> bytes:
+        remaining = self._length - self._position
+        if size is None or size < 0 or size > remaining:
+            size = remaining
+        self._file.seek(self._start + self._position)
+        data = self._file.read(size)
+        self._position += len(data)
+        return data
+
+    def seek(self, offset: int, whence: int = os.SEEK_SET) -> int:
+        base = (0, self._position, self._length)[whence]
+        self._position = min(max(base + offset, 0), self._length)
+        return self._position
+
+    def tell(self) -> int:
+        return self._position
+
+
+class _Upload:
+    """One file's upload, which other callers with the same content wait for."""
+
+    __slots__ = ("done", "upload_id", "error")
+
+    def __init__(self, upload_id: Optional[str] = None):
+        self.done = threading.Event()
+        self.upload_id = upload_id
+        self.error: Optional[Exception] = None
+        if upload_id is not None:
+            self.done.set()
+
+
+class FileUploader:
+    """
+    Uploads files to Notion, each distinct file (content and name) once.
+    Thread-safe.
+
+    Args:
+        endpoint: notion_api.FileUploadsEndpoint
+        request: Calls an endpoint with the shared rate limit and retries,
+            like journal_importer.notion_request()
+        workers: Files uploaded at once
+        metrics: journal_metrics.Metrics to time the "upload" stage and
+            count files in
+    """
+
+    def __init__(self, endpoint: Any, request: Callable[..., Any],
+                 workers: int = DEFAULT_WORKERS, metrics: Any = None):
+        self.endpoint = endpoint
+        self.request = request
+        self.workers = workers
+        self.metrics = metrics
+        self.sent = 0         # files uploaded
+        self.sent_bytes = 0
+        self.reused = 0       # references answered with an earlier upload
+        self._uploads: Dict[str, _Upload] = {}  # upload key → upload
+        self._hashes: Dict[tuple, str] = {}     # (path, mtime, size) → content hash
+        self._lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def remember(self, uploads: Dict[str, str]) -> None:
+        """Reuse uploads that pages were created with before (upload key → upload ID)."""
+        with self._lock:
+            for key, upload_id in uploads.items():
+                self._uploads.setdefault(key, _Upload(upload_id))
+
+    def forget(self, keys: Iterable[str]) -> None:
+        """
+        Drop finished uploads, e.g. those of a page that couldn't be
+        created (Notion may have let them expire), so they are sent again.
+        """
+        with self._lock:
+            for key in keys:
+                upload = self._uploads.get(key)
+                if upload is not None and upload.done.is_set():
+                    del self._uploads[key]
+
+    def upload(self, path: str) -> Tuple[str, str]:
+        """
+        Upload a file, unless a file with the same content and name was
+        uploaded before or is being uploaded now, in which case that upload
+        is used.
+
+        Returns:
+            (upload key, upload ID); the key is "<content hash>/<name>"
+
+        Raises:
+            UploadError: The file couldn't be read or uploaded
+        """
+        try:
+            key = f"{self._content_hash(path)}/{os.path.basename(path)}"
+        except OSError as e:
+            raise UploadError(f"Failed to read {path}: {e}") from e
+
+        with self._lock:
+            upload = self._uploads.get(key)
+            owner = upload is None
+            if owner:
+                upload = self._uploads[key] = _Upload()
+            else:
+                self.reused += 1
+        if owner:
+            try:
+                upload.upload_id = self._send(path)
+            except Exception as e:
+                upload.error = UploadError(f"Failed to upload {path}: {e}")
+                with self._lock:
+                    del self._uploads[key]  # the next reference tries again
+            upload.done.set()
+        else:
+            upload.done.wait()
+        if self.metrics is not None:
+            self.metrics.count("file_uploads_total", result="sent" if owner else "reused")
+        if upload.error is not None:
+            raise upload.error
+        return key, upload.upload_id
+
+    def submit(self, path: str) -> "Future[Tuple[str, str]]":
+        """upload() on one of the uploader's threads."""
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers,
+                                                    thread_name_prefix="upload")
+            executor = self._executor
+        return executor.submit(self.upload, path)
+
+    def close(self) -> None:
+        """Stop the upload threads; uploads already made are kept."""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+    def _content_hash(self, path: str) -> str:
+        # Entries in one folder often share photos: hash each file once a run
+        stat = os.stat(path)
+        key = (os.path.realpath(path), stat.st_mtime_ns, stat.st_size)
+        content_hash = self._hashes.get(key)
+        if content_hash is None:
+            content_hash = self._hashes[key] = hash_file(path)
+        return content_hash
+
+    def _send(self, path: str) -> str:
+        """Upload a file, in parts if it is too big for one request; return the upload's ID."""
+        name = os.path.basename(path)
+        content_type = mimetypes.guess_type(name)[0] or "application/octet-stream"
+        with open(path, 'rb') as f:
+            size = os.fstat(f.fileno()).st_size
+            if size <= SINGLE_PART_LIMIT:
+                upload = self.request(self.endpoint.create, mode="single_part",
+                                      filename=name, content_type=content_type)
+                self.request(self.endpoint.send, file_upload_id=upload["id"],
+                             file=(name, f, content_type))
+            else:
+                parts = -(-size // PART_SIZE)
+                upload = self.request(self.endpoint.create, mode="multi_part",
+                                      number_of_parts=parts, filename=name,
+                                      content_type=content_type)
+                for number in range(parts):
+                    start = number * PART_SIZE
+                    part = _FilePart(f, start, min(PART_SIZE, size - start))
+                    self.request(self.endpoint.send, file_upload_id=upload["id"],
+                                 file=(name, part, content_type), part_number=number + 1)
+                self.request(self.endpoint.complete, file_upload_id=upload["id"])
+        with self._lock:
+            self.sent += 1
+            self.sent_bytes += size
+        return upload["id"]
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Blocks
+# ─────────────────────────────────────────────────────────────────────────────
+
+def _as_text(block: Dict, path: str) -> Dict:
+    """A local file's block back as the Markdown line it came from."""
+    block_type = block["type"]
+    caption = plain_text(block[block_type].get("caption", []))
+    target = f"<{path}>" if any(c.isspace() for c in path) else path
+    return text_block("paragraph", f"{'!' if block_type == 'image' else ''}[{caption}]({target})")
+
+
+def _with_upload(block: Dict, upload_id: str) -> Dict:
+    block_type = block["type"]
+    return {"object": "block", "type": block_type, block_type: {
+        "type": "file_upload", "file_upload": {"id": upload_id},
+        "caption": block[block_type].get("caption", [])}}
+
+
+def _within(path: str, folder: str) -> bool:
+    return os.path.commonpath((path, folder)) == folder
+
+
+def find_local_file(path: str, base_dir: str, root: Optional[str] = None) -> Optional[str]:
+    """
+    Where a file an entry refers to is: `path` taken relative to the
+    entry's folder. None if it is outside both that folder and the journal
+    root once links and ".." are resolved; "~" isn't expanded.
+
+    Args:
+        path: The path as written in the entry
+        base_dir: Folder of the entry
+        root: Journal root, or None to only allow the entry's folder
+    """
+    full_path = os.path.normpath(os.path.join(base_dir, path))
+    resolved = os.path.realpath(full_path)
+    for folder in (base_dir, root):
+        if folder is not None and _within(resolved, os.path.realpath(folder)):
+            return full_path
+    return None
+
+
+def _local_path(block: Dict, base_dir: str, upload: bool, warn: Callable[[str], None],
+                root: Optional[str]) -> Tuple[Optional[str], Dict]:
+    """
+    (file to upload, None) for a block with a local file that can be
+    uploaded; (None, block) otherwise, with the file's block turned back
+    into text.
+    """
+    path = local_file(block)
+    if path is None:
+        return None, block
+    if not upload:
+        return None, _as_text(block, path)
+    full_path = find_local_file(path, base_dir, root)
+    if full_path is None:
+        warn(f"   ⚠️  File outside the journal, kept as text: {path}")
+        return None, _as_text(block, path)
+    if not os.path.isfile(full_path):
+        warn(f"   ⚠️  File not found, kept as text: {path}")
+        return None, _as_text(block, path)
+    return full_path, None
+
+
+def keep_as_text(blocks: List[Dict], base_dir: str, upload: bool = True,
+                 warn: Callable[[str], None] = print,
+                 root: Optional[str] = None) -> List[Dict]:
+    """
+    Turn the local files that won't be uploaded (all of them if `upload`
+    is False, else the ones that aren't found or are outside the journal)
+    back into text, leaving the rest for resolve_files(). For a sync,
+    which compares blocks before deciding which ones to send.
+    """
+    out = []
+    for block in blocks:
+        full_path, kept = _local_path(block, base_dir, upload, warn, root)
+        out.append(block if full_path else kept)
+    return out
+
+
+def resolve_files(blocks: Iterable[Dict], base_dir: str, uploader: Optional[FileUploader],
+                  used: Optional[Dict[str, str]] = None,
+                  warn: Callable[[str], None] = print,
+                  root: Optional[str] = None) -> Iterator[Dict]:
+    """
+    Upload the local files in converted blocks and point the blocks at the
+    uploads, WINDOW blocks at a time.
+
+    Args:
+        blocks: Blocks from the converter (a list or a generator)
+        base_dir: Folder of the entry, which relative paths start from
+        uploader: FileUploader, or None to keep every local file as text
+        used: Filled in with upload key → upload ID for the files the
+            blocks refer to, also when an upload fails part way
+        warn: Called with a line for each file that isn't found or is
+            outside the journal
+        root: Journal root. Only files below it or the entry's folder are
+            uploaded (see find_local_file()).
+
+    Yields:
+        The blocks, with local files uploaded or turned into text
+
+    Raises:
+        UploadError: A file couldn't be uploaded
+    """
+    window: List[Dict] = []
+    for block in blocks:
+        window.append(block)
+        if len(window) >= WINDOW:
+            yield from _resolve_window(window, base_dir, uploader, used, warn, root)
+            window = []
+    if window:
+        yield from _resolve_window(window, base_dir, uploader, used, warn, root)
+
+
+def _resolve_window(window: List[Dict], base_dir: str, uploader: Optional[FileUploader],
+                    used: Optional[Dict[str, str]], warn: Callable[[str], None],
+                    root: Optional[str]) -> List[Dict]:
+    pending = []
+    for n, block in enumerate(window):
+        full_path, kept = _local_path(block, base_dir, uploader is not None, warn, root)
+        if full_path is None:
+            window[n] = kept
+        else:
+            pending.append((n, uploader.submit(full_path)))
+    if not pending:
+        return window
+
+    error = None
+    timer = uploader.metrics.time("upload") if uploader.metrics is not None else nullcontext()
+    with timer:
+        for n, future in pending:
+            try:
+                key, upload_id = future.result()
+            except UploadError as e:
+                error = error or e
+                continue
+            if used is not None:
+                used[key] = upload_id
+            window[n] = _with_upload(window[n], upload_id)
+    if error is not None:
+        raise error
+    return window
+
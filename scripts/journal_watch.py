@@ -0,0 +1,273 @@
+"""
+Watching the journal folder for the importer's --watch mode.
+
+On Linux, changes come from inotify (through ctypes, so no extra package is
+needed): every folder below the root is watched, and folders created or
+moved in later are watched as they appear. Elsewhere, or when inotify isn't
+available, the tree is re-scanned every few seconds and files are compared
+by modification time and size.
+
+Changes are debounced. A file is handed out once the folder has been quiet
+for a moment, so an editor's burst of saves becomes one upload, and files
+that change together are handed out together as one batch.
+"""
+
+import os
+import sys
+import time
+import errno
+import select
+import struct
+import ctypes
+import ctypes.util
+from typing import Callable, Dict, List, Optional, Tuple
+
+from journal_files import iter_markdown_files
+
+# Seconds between scans of the tree when inotify isn't available
+POLL_INTERVAL = 2.0
+
+# A batch is handed out at the latest this long after its first change,
+# even if files keep changing
+MAX_BATCH_WAIT = 30.0
+
+# ─────────────────────────────────────────────────────────────────────────────
+# inotify
+# ─────────────────────────────────────────────────────────────────────────────
+
+# From <sys/inotify.h>
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+
+# A file that was written and closed, or renamed into place (as editors
+# that save atomically do); a folder created or moved in
+_WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+
+# struct inotify_event: wd, mask, cookie, len, then `len` bytes of name
+_EVENT = struct.Struct("iIII")
+
+
+def _libc() -> ctypes.CDLL:
+    return ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+
+
+class InotifyWatcher:
+    """
+    Markdown files written below a folder, from inotify events.
+
+    Hidden files and folders are ignored, as iter_markdown_files() ignores
+    them. If the kernel's event queue overflows, `overflowed` is set and
+    the caller should re-check the whole tree.
+    """
+
+    kind = "inotify"
+
+    def __init__(self, root_path: str):
+        self.root_path = root_path
+        self.overflowed = False
+        self._libc = _libc()
+        self._fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self._dirs: Dict[int, str] = {}  # watch descriptor → folder
+        try:
+            self._watch_tree(root_path)
+        except OSError:
+            self.close()
+            raise
+
+    def _watch_tree(self, path: str) -> List[str]:
+        """Watch a folder and every folder below it; return the .md files found."""
+        found = []
+        for folder, dirs, files in os.walk(path):
+            dirs[:] = sorted(d for d in dirs if not d.startswith("."))
+            wd = self._libc.inotify_add_watch(self._fd, os.fsencode(folder), _WATCH_MASK)
+            if wd < 0:
+                error = ctypes.get_errno()
+                if error == errno.ENOSPC:
+                    raise OSError(error, "inotify watch limit reached "
+                                         "(raise fs.inotify.max_user_watches)")
+                dirs[:] = []  # gone again, or unreadable
+                continue
+            # A folder moved within the tree keeps its descriptor
+            self._dirs[wd] = folder
+            found.extend(os.path.join(folder, name) for name in sorted(files)
+                         if name.endswith(".md") and not name.startswith("."))
+        return found
+
+    def read(self, timeout: Optional[float] = None) -> List[str]:
+        """
+        Wait up to `timeout` seconds (forever if None) for changes.
+
+        Returns:
+            Paths of the Markdown files written or moved in since the last
+            call, possibly empty
+        """
+        ready, _, _ = select.select([self._fd], [], [], timeout)
+        if not ready:
+            return []
+        changed: List[str] = []
+        while True:
+            try:
+                data = os.read(self._fd, 64 * 1024)
+            except BlockingIOError:
+                return changed
+            changed.extend(self._parse(data))
+
+    def _parse(self, data: bytes) -> List[str]:
+        changed = []
+        offset = 0
+        while offset < len(data):
+            wd, mask, _cookie, length = _EVENT.unpack_from(data, offset)
+            name = os.fsdecode(data[offset + _EVENT.size:offset + _EVENT.size + length].rstrip(b"\0"))
+            offset += _EVENT.size + length
+
+            if mask & IN_Q_OVERFLOW:
+                self.overflowed = True
+                continue
+            if mask & IN_IGNORED:
+                self._dirs.pop(wd, None)  # the folder was removed
+                continue
+            folder = self._dirs.get(wd)
+            if folder is None or not name or name.startswith("."):
+                continue
+            path = os.path.join(folder, name)
+            if mask & IN_ISDIR:
+                # Files may land in a new folder before it is watched
+                changed.extend(self._watch_tree(path))
+            elif name.endswith(".md") and mask & (IN_CLOSE_WRITE | IN_MOVED_TO):
+                changed.append(path)
+        return changed
+
+    def close(self) -> None:
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+    def __enter__(self) -> "InotifyWatcher":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Polling
+# ─────────────────────────────────────────────────────────────────────────────
+
+class PollingWatcher:
+    """
+    Markdown files changed below a folder, found by scanning it every
+    `interval` seconds. Costs one stat() per file per scan, but no reads.
+    """
+
+    kind = "polling"
+
+    def __init__(self, root_path: str, interval: float = POLL_INTERVAL):
+        self.root_path = root_path
+        self.interval = interval
+        self.overflowed = False
+        self._seen = self._scan()
+        self._next_scan = time.monotonic() + interval
+
+    def _scan(self) -> Dict[str, Tuple[int, int]]:
+        seen = {}
+        for found in iter_markdown_files(self.root_path):
+            try:
+                stat = found.stat()
+            except OSError:
+                continue
+            seen[str(found.path)] = (stat.st_mtime_ns, stat.st_size)
+        return seen
+
+    def read(self, timeout: Optional[float] = None) -> List[str]:
+        """Like InotifyWatcher.read(), at most once per interval."""
+        wait = max(0.0, self._next_scan - time.monotonic())
+        if timeout is not None and timeout < wait:
+            time.sleep(timeout)
+            return []
+        time.sleep(wait)
+        self._next_scan = time.monotonic() + self.interval
+        current = self._scan()
+        changed = [path for path, signature in current.items()
+                   if self._seen.get(path) != signature]
+        self._seen = current
+        return changed
+
+    def close(self) -> None:
+        pass
+
+    def __enter__(self) -> "PollingWatcher":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def open_watcher(root_path: str, poll_interval: float = POLL_INTERVAL):
+    """
+    An InotifyWatcher on Linux, or a PollingWatcher where inotify isn't
+    available. Check the watcher's `kind` to see which one you got.
+    """
+    if sys.platform.startswith("linux"):
+        try:
+            return InotifyWatcher(root_path)
+        except (OSError, AttributeError):
+            pass  # no inotify in this libc, or out of watches
+    return PollingWatcher(root_path, poll_interval)
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Debouncing
+# ─────────────────────────────────────────────────────────────────────────────
+
+class Debouncer:
+    """
+    Collects changed paths and hands them out in batches.
+
+    A batch is ready once nothing has changed for `quiet` seconds, or
+    `max_wait` seconds after its first change, whichever comes first.
+    A path changed several times appears in the batch once.
+    """
+
+    def __init__(self, quiet: float = 2.0, max_wait: float = MAX_BATCH_WAIT,
+                 clock: Callable[[], float] = time.monotonic):
+        self.quiet = quiet
+        self.max_wait = max_wait
+        self._clock = clock
+        self._pending: Dict[str, None] = {}
+        self._first: Optional[float] = None
+        self._last: Optional[float] = None
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def add(self, paths: List[str]) -> None:
+        if not paths:
+            return
+        now = self._clock()
+        for path in paths:
+            self._pending[path] = None
+        if self._first is None:
+            self._first = now
+        self._last = now
+
+    def timeout(self) -> Optional[float]:
+        """Seconds until the pending batch is ready, or None if there is none."""
+        if not self._pending:
+            return None
+        deadline = min(self._last + self.quiet, self._first + self.max_wait)
+        return max(0.0, deadline - self._clock())
+
+    def ready(self) -> List[str]:
+        """The pending paths, sorted, if the batch is ready; else []."""
+        if not self._pending or self.timeout() > 0:
+            return []
+        batch = sorted(self._pending)
+        self._pending = {}
+        self._first = self._last = None
+        return batch
@@ -0,0 +1,340 @@
+"""
+Talking to the Notion API without tripping its limits.
+
+Shared by the journal import and export scripts: a token-bucket rate
+limiter shared by all worker threads, a run-wide retry budget, a retry
+loop that tells errors worth retrying (rate limits, outages, dropped
+connections) from the ones that will fail again, a client that is only
+created when the first request is made, and the file upload endpoints the
+client doesn't have.
+"""
+
+import re
+import time
+import random
+import threading
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import httpx
+from notion_client import Client
+from notion_client.errors import APIErrorCode, APIResponseError, HTTPResponseError, \
+    RequestTimeoutError, is_api_error_code
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Rate Limiting
+# ─────────────────────────────────────────────────────────────────────────────
+
+class TokenBucket:
+    """
+    Thread-safe token bucket rate limiter.
+
+    Tokens refill continuously at `rate` per second up to `capacity`. Every
+    Notion request takes one token, so all workers share a single budget.
+    """
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(rate, 1.0)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens: float = 1.0) -> None:
+        """Block until `tokens` are available, then take them."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                if now < self._paused_until:
+                    wait = self._paused_until - now
+                else:
+                    self._tokens = min(self.capacity,
+                                       self._tokens + (now - self._updated) * self.rate)
+                    self._updated = now
+                    if self._tokens >= tokens:
+                        self._tokens -= tokens
+                        return
+                    wait = (tokens - self._tokens) / self.rate
+            time.sleep(wait)
+
+    def pause(self, seconds: float) -> None:
+        """Hold every caller for `seconds`, e.g. after a 429 response."""
+        with self._lock:
+            resume = time.monotonic() + seconds
+            if resume > self._paused_until:
+                self._paused_until = resume
+                self._tokens = 0.0
+                self._updated = resume
+
+
+class RetryBudget:
+    """
+    Thread-safe cap on retries across the whole run.
+
+    Every request earns `ratio` of a retry, up to `reserve` saved retries,
+    and every retry spends one. A few failures are retried freely, but a
+    sustained outage can't multiply the load: once the budget is spent,
+    errors fail straight away instead of being retried.
+    """
+
+    def __init__(self, ratio: float = 0.2, reserve: float = 50.0):
+        self.ratio = ratio
+        self.reserve = reserve
+        self._balance = reserve
+        self._lock = threading.Lock()
+
+    def earn(self) -> None:
+        with self._lock:
+            self._balance = min(self.reserve, self._balance + self.ratio)
+
+    def spend(self) -> bool:
+        """Take one retry from the budget; False if there is none left."""
+        with self._lock:
+            if self._balance < 1.0:
+                return False
+            self._balance -= 1.0
+            return True
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Retries
+# ─────────────────────────────────────────────────────────────────────────────
+
+# Error classes for call_with_retries()
+RATE_LIMITED = "rate_limited"   # rejected before it was applied; wait and retry
+NOT_SENT = "not_sent"           # never reached Notion (connection failed)
+MAYBE_APPLIED = "maybe_applied"  # 5xx or timeout; Notion may have done it anyway
+
+_RETRYABLE_STATUSES = {500, 502, 503, 504}
+
+# Exponential backoff: 1s, 2s, 4s... up to a minute, with full jitter
+BACKOFF_BASE = 1.0
+BACKOFF_CAP = 60.0
+
+
+def classify_error(error: Exception) -> Tuple[Optional[str], Optional[float]]:
+    """
+    Decide whether a failed request is worth retrying.
+
+    Args:
+        error: Exception raised by a Notion client call
+
+    Returns:
+        (error class, Retry-After seconds) tuple. The class is None for
+        errors that will fail again, such as validation or permission
+        errors. Retry-After is None unless Notion sent one.
+    """
+    if isinstance(error, HTTPResponseError):
+        retry_after = None
+        try:
+            retry_after = float(error.headers.get("retry-after"))
+        except (TypeError, ValueError):
+            pass
+        code = getattr(error, "code", None)
+        if error.status == 429 or code == APIErrorCode.RateLimited:
+            return RATE_LIMITED, retry_after
+        if error.status == 409 or code == APIErrorCode.ConflictError:
+            # The transaction was rolled back, so it is safe to send again
+            return RATE_LIMITED, retry_after
+        if error.status in _RETRYABLE_STATUSES:
+            return MAYBE_APPLIED, retry_after
+        return None, None
+    if isinstance(error, (httpx.ConnectError, httpx.ConnectTimeout)):
+        return NOT_SENT, None
+    if isinstance(error, (RequestTimeoutError, httpx.TimeoutException, httpx.TransportError)):
+        return MAYBE_APPLIED, None
+    return None, None
+
+
+def backoff_delay(attempt: int) -> float:
+    """Seconds to wait before retry number `attempt` (0-based), jittered."""
+    return random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * 2 ** attempt))
+
+
+def call_with_retries(method: Callable[..., Any], kwargs: Dict[str, Any],
+                      rate_limiter: TokenBucket, retry_budget: RetryBudget,
+                      max_retries: int, idempotent: bool = True,
+                      retries: Optional["RunningTotal"] = None,
+                      metrics: Any = None) -> Any:
+    """
+    Call a Notion client endpoint once the rate limiter allows it, retrying
+    rate limits, conflicts, 5xx responses, timeouts and connection errors.
+
+    Waits for Notion's Retry-After when it sends one and a jittered
+    exponential backoff otherwise, as long as the retry budget lasts. A 429
+    also pauses the rate limiter, so the other workers back off too.
+
+    Args:
+        method: Bound client endpoint, e.g. notion.pages.create
+        kwargs: Arguments passed straight to the endpoint
+        rate_limiter: Limiter shared by every caller
+        retry_budget: Retry budget shared by every caller
+        max_retries: Retries per call
+        idempotent: False for calls that must not run twice (creating a
+            page, appending blocks). Those are only retried when Notion
+            can't have applied them: after a 429, a 409 or a failed connect.
+        retries: Running total to add each retry to
+        metrics: journal_metrics.Metrics to count requests and errors in
+
+    Returns:
+        The endpoint's response
+
+    Raises:
+        The last error, once it is not retryable or retries run out
+    """
+    attempt = 0
+    endpoint = endpoint_name(method)
+    while True:
+        rate_limiter.acquire()
+        retry_budget.earn()
+        if metrics is not None:
+            metrics.count("api_requests_total", endpoint=endpoint)
+        try:
+            return method(**kwargs)
+        except Exception as error:
+            kind, retry_after = classify_error(error)
+            if metrics is not None:
+                metrics.count("api_errors_total", endpoint=endpoint, kind=kind or "fatal")
+            if (kind is None or (kind == MAYBE_APPLIED and not idempotent)
+                    or attempt >= max_retries or not retry_budget.spend()):
+                raise
+            delay = retry_after if retry_after is not None else backoff_delay(attempt)
+            if kind == RATE_LIMITED:
+                rate_limiter.pause(delay)
+            else:
+                time.sleep(delay)
+            if retries is not None:
+                retries.add(1)
+            attempt += 1
+
+
+def endpoint_name(method: Callable[..., Any]) -> str:
+    """Name of a client endpoint for metrics, e.g. "blocks.children.append"."""
+    # notion.blocks.children.append is BlocksChildrenEndpoint.append
+    owner, _, name = getattr(method, "__qualname__", "").rpartition(".")
+    owner = re.sub(r"Endpoint$", "", owner)
+    owner = re.sub(r"(?<=[a-z])(?=[A-Z])", ".", owner).lower()
+    return f"{owner}.{name}" if owner else name or "unknown"
+
+
+class RunningTotal:
+    """Thread-safe running total, e.g. of blocks sent to Notion."""
+
+    def __init__(self):
+        self.total = 0
+        self._lock = threading.Lock()
+
+    def add(self, count: int) -> None:
+        with self._lock:
+            self.total += count
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Client
+# ─────────────────────────────────────────────────────────────────────────────
+
+class LazyClient:
+    """
+    A notion_client.Client that is created on first use.
+
+    Endpoints are reached as on the client itself (`notion.pages.create`),
+    so a module can keep one at module level without building a client, or
+    needing a token, just because it was imported. The client and its
+    connection pool are then kept for every later request. Thread-safe.
+    """
+
+    def __init__(self, **options):
+        self._options = options
+        self._client: Optional[Client] = None
+        self._lock = threading.Lock()
+
+    def configure(self, **options) -> None:
+        """Change the Client options; a client already created is closed and made again."""
+        with self._lock:
+            self._options.update(options)
+            if self._client is not None:
+                self._client.close()
+                self._client = None
+
+    @property
+    def client(self) -> Client:
+        client = self._client
+        if client is None:
+            with self._lock:
+                if self._client is None:
+                    self._client = Client(**self._options)
+                client = self._client
+        return client
+
+    def __getattr__(self, name: str) -> Any:
+        # Only called for names not found on the LazyClient itself
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return getattr(self.client, name)
+
+    def close(self) -> None:
+        """Close the client's connections, if it was ever created."""
+        with self._lock:
+            if self._client is not None:
+                self._client.close()
+                self._client = None
+
+
+class FileUploadsEndpoint:
+    """
+    Notion's file upload endpoints, which notion_client 2.2 doesn't have.
+
+    Called like the client's own endpoints (and so through
+    call_with_retries()), over the client's connection pool. Responses and
+    errors are the ones the client's endpoints give: the response body as
+    a dict, or APIResponseError / HTTPResponseError.
+    """
+
+    def __init__(self, notion: LazyClient):
+        self._notion = notion
+
+    def create(self, **body) -> Dict[str, Any]:
+        """Start an upload: mode, filename, content_type and, for "multi_part", number_of_parts."""
+        return self._notion.request(path="file_uploads", method="POST", body=body)
+
+    def send(self, file_upload_id: str, file: Tuple[str, Any, str],
+             part_number: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Send the file, or one part of it, as multipart form data.
+
+        Args:
+            file_upload_id: ID from create()
+            file: (filename, file object, content type). The file object is
+                read in chunks as the request goes out, and rewound first,
+                so a retry sends it again from the start.
+            part_number: 1-based part number of a "multi_part" upload
+        """
+        client = self._notion.client.client  # the httpx.Client behind notion_client
+        file[1].seek(0)
+        data = {"part_number": str(part_number)} if part_number is not None else None
+        request = client.build_request("POST", f"file_uploads/{file_upload_id}/send",
+                                       files={"file": file}, data=data)
+        try:
+            response = client.send(request)
+        except httpx.TimeoutException:
+            raise RequestTimeoutError()
+        return _parse_response(response)
+
+    def complete(self, file_upload_id: str) -> Dict[str, Any]:
+        """Finish a "multi_part" upload once every part has been sent."""
+        return self._notion.request(path=f"file_uploads/{file_upload_id}/complete",
+                                    method="POST", body={})
+
+
+def _parse_response(response: httpx.Response) -> Dict[str, Any]:
+    """The body of a response, or the error notion_client raises for it."""
+    if response.is_error:
+        try:
+            body = response.json()
+            code = body.get("code")
+        except ValueError:
+            code = None
+        if code and is_api_error_code(code):
+            raise APIResponseError(response, body["message"], code)
+        raise HTTPResponseError(response)
+    return response.json()
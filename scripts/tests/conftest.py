@@ -0,0 +1,162 @@
+"""
+Fixtures for the journal import tests.
+
+The importer is run the way people run it, as import-journal-to-notion.py
+in a subprocess, against a fake_notion_server.FakeNotionServer of the
+test's own. Each test gets a fresh server, journal folder and conversion
+cache, so nothing carries over between tests through the importer's
+module-level client, uploads or totals.
+
+    python -m pytest scripts/tests
+"""
+
+import os
+import sys
+import time
+import subprocess
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+import pytest
+
+SCRIPTS = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(SCRIPTS))
+
+from fake_notion_server import FakeNotionServer  # noqa: E402
+
+IMPORTER = SCRIPTS / "import-journal-to-notion.py"
+DATABASE_ID = "fake-journal-db"
+
+
+@pytest.fixture
+def server():
+    """A fake Notion API on a free local port, seeded so that throttling repeats."""
+    with FakeNotionServer(seed=1) as fake:
+        yield fake
+
+
+@pytest.fixture
+def journal(tmp_path) -> Path:
+    """An empty journal folder."""
+    root = tmp_path / "Journal"
+    root.mkdir()
+    return root
+
+
+@pytest.fixture
+def write_entry(journal) -> Callable[..., Path]:
+    """
+    Write a Markdown entry under the journal folder:
+    write_entry("2024/05/01.md", "Title", "Body", date="2024-05-01").
+    """
+    def write(relative_path: str, title: Optional[str], body: str = "",
+              **frontmatter: Any) -> Path:
+        lines = [f"title: {title}"] if title is not None else []
+        lines += [f"{key}: {value}" for key, value in frontmatter.items()]
+        path = journal / relative_path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        header = "---\n" + "".join(line + "\n" for line in lines) + "---\n" if lines else ""
+        path.write_text(header + body, encoding="utf-8")
+        return path
+    return write
+
+
+@pytest.fixture
+def importer_env(server, journal, tmp_path) -> Dict[str, str]:
+    """
+    Environment that points the importer at the fake server and the journal.
+    The files it keeps are put where they go by default, so that a .env
+    with other paths can't send them outside the test's folder.
+    """
+    return dict(os.environ,
+                NOTION_TOKEN="secret_fake",
+                NOTION_JOURNAL_DB_ID=DATABASE_ID,
+                NOTION_BASE_URL=server.url,
+                NOTION_REQUESTS_PER_SECOND="1000",
+                JOURNAL_ROOT_PATH=str(journal),
+                JOURNAL_MANIFEST_PATH=str(journal / ".notion-import.sqlite"),
+                JOURNAL_DEAD_LETTER_PATH=str(journal / ".notion-import-failed.jsonl"),
+                JOURNAL_CHECKPOINT_PATH=str(journal / ".notion-import.checkpoint.jsonl"),
+                JOURNAL_CACHE_PATH=str(tmp_path / "cache" / "conversions.sqlite"),
+                PYTHONIOENCODING="utf-8",
+                PYTHONUNBUFFERED="1")
+
+
+@pytest.fixture
+def run_importer(importer_env) -> Callable[..., subprocess.CompletedProcess]:
+    """Run import-journal-to-notion.py with some options and wait for it."""
+    def run(*options: str, timeout: float = 120) -> subprocess.CompletedProcess:
+        return subprocess.run([sys.executable, str(IMPORTER), *options], env=importer_env,
+                              capture_output=True, text=True, encoding="utf-8",
+                              timeout=timeout)
+    return run
+
+
+@pytest.fixture
+def start_importer(importer_env) -> Iterator[Callable[..., subprocess.Popen]]:
+    """
+    Start import-journal-to-notion.py without waiting for it, with pipes
+    for stdin and stdout. Processes still running at the end are killed.
+    """
+    started: List[subprocess.Popen] = []
+
+    def start(*options: str) -> subprocess.Popen:
+        process = subprocess.Popen([sys.executable, str(IMPORTER), *options], env=importer_env,
+                                   stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                   stderr=subprocess.PIPE, text=True, encoding="utf-8")
+        started.append(process)
+        return process
+
+    yield start
+    for process in started:
+        if process.poll() is None:
+            process.kill()
+        process.wait()
+        for stream in (process.stdin, process.stdout, process.stderr):
+            stream.close()
+
+
+@pytest.fixture
+def wait_for() -> Callable[..., Any]:
+    """Poll a condition until it returns something true, or fail after `timeout` seconds."""
+    def wait(condition: Callable[[], Any], timeout: float = 30) -> Any:
+        deadline = time.monotonic() + timeout
+        while True:
+            result = condition()
+            if result:
+                return result
+            if time.monotonic() > deadline:
+                pytest.fail(f"timed out after {timeout}s waiting for {condition.__name__}")
+            time.sleep(0.05)
+    return wait
+
+
+@pytest.fixture
+def pages(server) -> Callable[[], Dict[str, Dict]]:
+    """The live pages on the fake server, by title."""
+    def by_title() -> Dict[str, Dict]:
+        found = {}
+        for page in list(server.workspace.pages.values()):
+            if page["archived"]:
+                continue
+            title = "".join(part["plain_text"] for part in page["properties"]["Name"]["title"])
+            found[title] = page
+        return found
+    return by_title
+
+
+@pytest.fixture
+def page_blocks(server) -> Callable[[str], List[Dict]]:
+    """
+    A page's blocks on the fake server, with nested blocks under
+    block[type]["children"] as content_to_notion_blocks() puts them.
+    """
+    def blocks(block_id: str) -> List[Dict]:
+        found = []
+        for block in server.workspace.children.get(block_id, []):
+            if block.get("has_children"):
+                block = dict(block)
+                block[block["type"]] = dict(block[block["type"]], children=blocks(block["id"]))
+            found.append(block)
+        return found
+    return blocks
@@ -0,0 +1,93 @@
+"""The conversion cache: entries read again aren't converted again."""
+
+import importlib.util
+import json
+import shutil
+from pathlib import Path
+
+import pytest
+
+import journal_cache
+from journal_cache import ConversionCache
+
+
+def _stages(path):
+    return json.loads(path.read_text(encoding="utf-8"))["stages"]
+
+
+@pytest.mark.parametrize("options", [("--workers", "2"), ("--parse-processes", "2")])
+def test_second_run_converts_nothing(options, write_entry, run_importer, tmp_path, pages):
+    for n in range(3):
+        write_entry(f"2024/01/{n:02d}.md", f"Entry {n}", f"Body {n}\n\n- a list\n")
+    # Without the manifest every file is read again, from the cache this time
+    first, second = tmp_path / "first.json", tmp_path / "second.json"
+    result = run_importer("--no-manifest", "--metrics", str(first), *options)
+    assert result.returncode == 0, result.stdout + result.stderr
+    assert _stages(first)["convert"]["count"] == 3
+
+    result = run_importer("--no-manifest", "--metrics", str(second), *options)
+    assert result.returncode == 0, result.stdout + result.stderr
+    assert "convert" not in _stages(second)
+    assert "Read from the conversion cache: 3" in result.stdout
+    assert sorted(pages()) == ["Entry 0", "Entry 1", "Entry 2"]
+
+
+def test_edited_entry_is_converted_again(write_entry, run_importer, tmp_path):
+    write_entry("a.md", "A", "Before\n")
+    write_entry("b.md", "B", "Unchanged\n")
+    assert run_importer("--no-manifest").returncode == 0
+    write_entry("a.md", "A", "After\n")
+    metrics = tmp_path / "metrics.json"
+    assert run_importer("--no-manifest", "--metrics", str(metrics)).returncode == 0
+    assert _stages(metrics)["convert"]["count"] == 1
+
+
+ENTRY = {"title": "A", "tags": [], "date": None, "blocks": [{"type": "paragraph"}]}
+
+
+def test_converter_change_is_a_miss(tmp_path):
+    # A copy of the converter, so that its source can be edited
+    code = tmp_path / "code"
+    code.mkdir()
+    for name in ("journal_cache.py",) + journal_cache._CONVERTER_MODULES:
+        shutil.copy(Path(journal_cache.__file__).with_name(name), code / name)
+
+    def load():
+        spec = importlib.util.spec_from_file_location("journal_cache_copy",
+                                                      code / "journal_cache.py")
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        return module.ConversionCache(str(tmp_path / "cache.sqlite"))
+
+    cache = load()
+    cache.put("hash", False, 2000, ENTRY)
+    assert cache.get("hash", False, 2000) == ENTRY
+    assert cache.get("hash", True, 2000) is None  # --pack converts differently
+    cache.close()
+
+    assert load().get("hash", False, 2000) == ENTRY
+    with open(code / "journal_markdown.py", "a", encoding="utf-8") as f:
+        f.write("\n# changed\n")
+    assert load().get("hash", False, 2000) is None
+
+
+def test_prune_evicts_least_recently_used(tmp_path, monkeypatch):
+    cache = ConversionCache(str(tmp_path / "cache.sqlite"))
+    for day, content_hash in enumerate(("a", "b", "c"), 1):
+        monkeypatch.setattr(journal_cache, "_today", lambda day=day: day)
+        cache.put(content_hash, False, 2000, ENTRY)
+    monkeypatch.setattr(journal_cache, "_today", lambda: 4)
+    assert cache.get("a", False, 2000) == ENTRY  # "a" was used last now
+
+    entries, size = cache.usage()
+    assert entries == 3
+    cache.max_bytes = size
+    assert cache.prune() == (0, 0)  # not over the limit
+
+    cache.max_bytes = size * 5 // 6  # two entries' worth and a half
+    removed, freed = cache.prune()
+    assert (removed, freed) == (1, size // 3)
+    assert cache.get("b", False, 2000) is None
+    assert cache.get("a", False, 2000) == ENTRY
+    assert cache.get("c", False, 2000) == ENTRY
+    cache.close()
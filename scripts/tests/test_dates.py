@@ -0,0 +1,79 @@
+"""parse_date(): the same dates as the original strptime parser, from one regex match."""
+
+import importlib.util
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+
+import pytest
+
+from journal_entries import _parse_date_text, parse_date
+
+BENCHMARK = Path(__file__).resolve().parent.parent / "benchmark-journal-import.py"
+
+
+@pytest.fixture(scope="module")
+def legacy_parse_date():
+    """The original parser, as the benchmark keeps it."""
+    spec = importlib.util.spec_from_file_location("benchmark_journal_import", BENCHMARK)
+    benchmark = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(benchmark)
+    return benchmark.legacy_parse_date
+
+
+def _strings():
+    # Every separator and field order the old formats allowed, padded and not,
+    # with impossible days and months among them
+    for year in ("2024", "2023", "1999", "9999", "24", "99999"):
+        for month in ("1", "01", "2", "02", "12", "13", "0", "001"):
+            for day in ("5", "05", "28", "29", "30", "31", "32", "0"):
+                for sep, other in (("-", "/"), ("/", "-")):
+                    yield f"{year}{sep}{month}{sep}{day}"
+                    yield f"{day}{sep}{month}{sep}{year}"
+                    yield f"{year}{sep}{month}{other}{day}"  # mixed: neither accepts it
+
+
+STRINGS = list(_strings()) + [
+    "", "x", "2024", "2024-01", "2024-01-05x", "05.01.2024", "May 1, 2024", "1 May 2024",
+    "2024-01-05 extra", "2024--01-05", "2024-1-5-6",
+]
+
+
+def test_matches_the_original_parser(legacy_parse_date):
+    assert [parse_date(text) for text in STRINGS] == \
+        [legacy_parse_date(text) for text in STRINGS]
+
+
+@pytest.mark.parametrize("value", [None, 0, 20240105, ["2024-01-05"],
+                                   datetime(2024, 1, 5, 23, 30),
+                                   datetime(2024, 12, 31, 0, 0, tzinfo=timezone.utc)])
+def test_other_values_match_the_original_parser(value, legacy_parse_date):
+    assert parse_date(value) == legacy_parse_date(value)
+
+
+@pytest.mark.parametrize("value, expected", [
+    # The original parser dropped these
+    (date(2024, 1, 5), "2024-01-05"),
+    (" 2024-01-05\n", "2024-01-05"),
+    ("2024-01-05T09:30", "2024-01-05"),
+    ("2024-01-05 09:30:00", "2024-01-05"),
+    ("2024-01-05T23:30:00.123+01:00", "2024-01-05"),  # the day in its own timezone
+    ("2024-01-05T23:30:00Z", "2024-01-05"),
+    # And wrote years before 1000 unpadded, which isn't an ISO date
+    ("0024-01-05", "0024-01-05"),
+])
+def test_values_the_original_parser_dropped(value, expected, legacy_parse_date):
+    assert legacy_parse_date(value) != expected
+    assert parse_date(value) == expected
+
+
+def test_repeated_dates_come_from_the_cache(legacy_parse_date):
+    days = [(date(2020, 1, 1) + timedelta(days=n)).strftime("%d/%m/%Y") for n in range(400)]
+    _parse_date_text.cache_clear()
+    first = [parse_date(text) for text in days]
+    assert _parse_date_text.cache_info().misses == len(days)
+
+    again = [parse_date(text) for text in days + ["2024-02-30", "2024-02-30"]]
+    info = _parse_date_text.cache_info()
+    assert (info.hits, info.misses) == (len(days) + 1, len(days) + 1)
+    assert again == first + [None, None]  # misses are remembered as misses
+    assert first == [legacy_parse_date(text) for text in days]
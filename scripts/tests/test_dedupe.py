@@ -0,0 +1,103 @@
+"""--dedupe hash: files are matched to pages by content and path, not title."""
+
+import threading
+
+import pytest
+
+from fake_notion_server import NotionError
+
+
+def _text(page, name):
+    return "".join(part["plain_text"] for part in page["properties"][name]["rich_text"])
+
+
+def test_same_title_different_content(write_entry, run_importer, server, importer_env):
+    write_entry("2024/01/01.md", "Morning", "Coffee\n")
+    write_entry("2024/01/02.md", "Morning", "Tea\n")
+    result = run_importer("--dedupe", "hash", "--workers", "2")
+    assert result.returncode == 0, result.stdout + result.stderr
+
+    pages = list(server.workspace.pages.values())
+    assert sorted(_text(page, "Source Path") for page in pages) == ["2024/01/01.md",
+                                                                    "2024/01/02.md"]
+    assert len({_text(page, "Content Hash") for page in pages}) == 2
+    assert server.stats.calls["databases.update"] == 1  # the two properties, added once
+    schema = server.workspace.schemas[importer_env["NOTION_JOURNAL_DB_ID"]]
+    assert schema["Content Hash"]["type"] == schema["Source Path"]["type"] == "rich_text"
+
+
+def test_renamed_and_copied_files_are_skipped(journal, write_entry, run_importer, pages,
+                                              server):
+    write_entry("draft.md", "Trip", "Day one\n")
+    assert run_importer("--dedupe", "hash").returncode == 0
+    page = pages()["Trip"]
+
+    (journal / "draft.md").rename(journal / "2024-05-01 Trip.md")
+    result = run_importer("--dedupe", "hash")
+    assert result.returncode == 0, result.stdout + result.stderr
+    assert "Skipped (moved from draft.md)" in result.stdout
+    assert _text(pages()["Trip"], "Source Path") == "2024-05-01 Trip.md"
+
+    write_entry("copy.md", "Trip", "Day one\n")
+    result = run_importer("--dedupe", "hash")
+    assert result.returncode == 0, result.stdout + result.stderr
+    assert "Skipped (same content as 2024-05-01 Trip.md)" in result.stdout
+    assert list(server.workspace.pages) == [page["id"]]
+    assert server.stats.calls["pages.create"] == 1
+    assert server.stats.calls["pages.update"] == 1
+
+
+def test_moved_file_and_a_copy_in_one_run(journal, write_entry, run_importer, pages):
+    write_entry("draft.md", "Trip", "Day one\n")
+    assert run_importer("--dedupe", "hash").returncode == 0
+
+    (journal / "draft.md").rename(journal / "a.md")
+    write_entry("b.md", "Trip", "Day one\n")
+    result = run_importer("--dedupe", "hash", "--workers", "2")
+    assert result.returncode == 0, result.stdout + result.stderr
+    assert "Skipped (moved from draft.md)" in result.stdout
+    assert "Skipped (same content as a.md)" in result.stdout
+    assert _text(pages()["Trip"], "Source Path") == "a.md"
+
+
+def test_failed_copy_doesnt_block_the_next(journal, write_entry, run_importer, server,
+                                           monkeypatch):
+    create_page = server.workspace.create_page
+    failures = []
+    lock = threading.Lock()
+
+    def fail_once(body):
+        with lock:
+            if not failures:
+                failures.append(body)
+                raise NotionError(400, "validation_error", "Rejected for the test.")
+        return create_page(body)
+    monkeypatch.setattr(server.workspace, "create_page", fail_once)
+
+    for name in ("a.md", "b.md", "c.md"):
+        write_entry(name, "Same", "Same body\n")
+    result = run_importer("--dedupe", "hash", "--workers", "3")
+    assert result.returncode == 0, result.stdout + result.stderr
+
+    [page] = server.workspace.pages.values()
+    assert _text(page, "Source Path") == "b.md"  # a.md failed, b.md took its place
+    assert "Skipped (same content as b.md)" in result.stdout
+    failed = (journal / ".notion-import-failed.jsonl").read_text(encoding="utf-8")
+    assert '"a.md"' in failed and '"b.md"' not in failed
+
+
+@pytest.mark.parametrize("method", ["retrieve_database", "update_database"])
+def test_falls_back_to_titles(method, write_entry, run_importer, server, monkeypatch):
+    def restricted(*args):
+        raise NotionError(403, "restricted_resource",
+                          "Insufficient permissions for this endpoint.")
+    monkeypatch.setattr(server.workspace, method, restricted)
+
+    write_entry("a.md", "Same title", "One\n")
+    write_entry("b.md", "Same title", "Two\n")
+    result = run_importer("--dedupe", "hash")
+    assert result.returncode == 0, result.stdout + result.stderr
+    assert "matching pages by title instead" in result.stdout
+    assert "Imported: 1" in result.stdout
+    [page] = server.workspace.pages.values()
+    assert "Content Hash" not in page["properties"]
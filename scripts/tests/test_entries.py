@@ -0,0 +1,119 @@
+"""The fast frontmatter reader gives the same result as python-frontmatter."""
+
+import random
+
+import frontmatter
+import pytest
+
+import journal_entries
+from journal_entries import format_frontmatter, read_frontmatter
+
+# Headers the fast path reads itself
+FLAT = [
+    "---\ntitle: Morning Pages\ntags: work, travel\ndate: 2024-02-14\n---\nBody\n",
+    "---\ntitle: Hello world\ntags: [a, b]\n---\n\nBody\n---\nmore\n",
+    "---\ntitle: 'Quoted: yes'\ntags:\n  - one\n  - \"two\"\n---\nBody",
+    "---\ntitle: C# notes\ndate: 2024-02-29\nmood:\n---\n",
+    "---\n# a comment\ntitle: Über\ntags: []\n---\r\nWindows line endings\r\n",
+    "---\ntitle: it's fine\nnote: a:b\n_private: x\nkebab-key: y\n---\nBody",
+]
+
+# Headers that need PyYAML, which must still come out the same
+COMPLEX = [
+    "---\ntitle: yes\n---\nBody",
+    "---\ntitle: 12\npriority: 1.5\n---\nBody",
+    "---\ntitle: ~\n---\n",
+    "---\ntitle: \"escaped\\n\"\n---\n",
+    "---\ntitle: 'it''s'\n---\n",
+    "---\nmeta:\n  nested: 1\n---\n",
+    "---\ntitle: |\n  multi\n  line\n---\n",
+    "---\ndate: 2024-02-14 10:00\n---\n",
+    "---\ntags: [a, [b]]\n---\n",
+    "---\ntitle: &anchor x\nalias: *anchor\n---\n",
+    "No frontmatter at all\n",
+    "---\nnot closed\n",
+]
+
+
+def _loaded(text):
+    post = frontmatter.loads(text)
+    return dict(post.metadata), post.content
+
+
+def _same(expected, got):
+    assert got == expected
+    # Dates must stay dates and strings strings, not just compare equal
+    assert [type(value) for value in got[0].values()] == \
+        [type(value) for value in expected[0].values()]
+
+
+@pytest.mark.parametrize("text", FLAT + COMPLEX)
+def test_matches_python_frontmatter(text):
+    _same(_loaded(text.replace("\r\n", "\n")), read_frontmatter(text))
+
+
+@pytest.mark.parametrize("text", FLAT)
+def test_flat_headers_skip_pyyaml(text, monkeypatch):
+    def refuse(*args, **kwargs):
+        raise AssertionError("flat frontmatter went through python-frontmatter")
+    monkeypatch.setattr(journal_entries.frontmatter, "loads", refuse)
+    read_frontmatter(text)
+
+
+def test_impossible_dates_fail_as_in_pyyaml():
+    text = "---\ntitle: Leap\ndate: 2023-02-29\n---\n"
+    with pytest.raises(ValueError):
+        frontmatter.loads(text)
+    with pytest.raises(ValueError):
+        read_frontmatter(text)
+
+
+def test_formatted_frontmatter_reads_back():
+    metadata = {"title": "Trip: day 2", "tags": ["road trip", "yes", "C#"],
+                "date": "2024-06-14", "quote": 'He said "hi"'}
+    text = format_frontmatter(metadata) + "Body\n"
+    assert read_frontmatter(text)[0] == _loaded(text)[0]
+
+
+KEYS = ["title", "tags", "date", "_x", "a-b", "on", "Yes", "# c", "? k", "key "]
+VALUES = ["", "Hello", "Hello world", "C#", "a #c", "a: b", "Über", "yes", "NO", "null",
+          "~", "2024-02-14", "2024-02-30", "2024-2-14", "12", "1.5", ".inf", "'q'",
+          "'it''s'", '"d"', '"e\\n"', "'a", "[a, b]", "[a,b,]", "[]", "[a: b]", "['x]']",
+          "[2024-01-01, x]", "{a: 1}", "|", "> x", "&a x", "!!str 5", "x\t", "a:b",
+          "true story", "-x", "@x", "`x`", "it's"]
+ITEMS = ["  - a", "- b", "   - \"c\"", "- ", " - x: y", "-c", "  - 2024-01-01", "# comment",
+         "", "   "]
+
+
+def _random_header(rng):
+    lines = []
+    for _ in range(rng.randint(0, 5)):
+        if rng.random() < 0.2:
+            lines.append(rng.choice(ITEMS))
+        else:
+            lines.append(rng.choice(KEYS) + ":" + rng.choice(["", " ", "  "]) +
+                         rng.choice(VALUES))
+    opening = rng.choice(["---", "---  ", "----"])
+    closing = rng.choice(["---", "\n---", "---\r\n", ""])
+    body = rng.choice(["", "Body", "\n\nBody\n---\nmore\n"])
+    return opening + "\n" + "\n".join(lines) + "\n" + closing + "\n" + body
+
+
+def _outcome(read, text):
+    try:
+        return "ok", read(text)
+    except Exception as e:
+        return "error", type(e).__name__
+
+
+def test_random_headers_match_python_frontmatter():
+    rng = random.Random(8)
+    for _ in range(3000):
+        text = _random_header(rng)
+        expected = _outcome(_loaded, text.replace("\r\n", "\n"))
+        got = _outcome(read_frontmatter, text)
+        assert got[0] == expected[0], text
+        if got[0] == "ok":
+            _same(expected[1], got[1])
+        else:
+            assert got == expected, text
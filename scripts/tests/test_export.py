@@ -0,0 +1,72 @@
+"""export-journal-from-notion.py: the journal comes back out as Markdown."""
+
+import importlib.util
+import subprocess
+import sys
+from pathlib import Path
+
+import frontmatter
+import pytest
+
+EXPORTER = Path(__file__).resolve().parent.parent / "export-journal-from-notion.py"
+
+
+@pytest.fixture
+def run_exporter(importer_env, tmp_path):
+    """Run export-journal-from-notion.py into tmp_path/"export"."""
+    env = dict(importer_env, JOURNAL_EXPORT_PATH=str(tmp_path / "export"))
+
+    def run(*options: str) -> subprocess.CompletedProcess:
+        return subprocess.run([sys.executable, str(EXPORTER), *options], env=env,
+                              capture_output=True, text=True, encoding="utf-8", timeout=120)
+    return run
+
+
+def test_importable_without_settings(monkeypatch):
+    monkeypatch.delenv("NOTION_TOKEN", raising=False)
+    monkeypatch.delenv("NOTION_JOURNAL_DB_ID", raising=False)
+    spec = importlib.util.spec_from_file_location("export_journal", EXPORTER)
+    exporter = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(exporter)
+    assert exporter.missing_settings() == ["NOTION_TOKEN", "NOTION_JOURNAL_DB_ID"]
+    with pytest.raises(SystemExit):
+        exporter.main([])
+
+
+def test_round_trip(write_entry, run_importer, run_exporter, tmp_path, server):
+    write_entry("2024/05/01.md", "May Day", "A *walk* by the river.\n\n- bread\n- milk\n",
+                date="2024-05-01", tags="[walks, food]")
+    write_entry("2024/05/02.md", "Second", "Just one line.\n", date="2024-05-02")
+    write_entry("ideas.md", "Undated idea", "## Heading\n\nText.\n")
+    assert run_importer().returncode == 0
+
+    result = run_exporter()
+    assert result.returncode == 0, result.stdout + result.stderr
+    assert "Exported: 3" in result.stdout
+    export = tmp_path / "export"
+    files = sorted(path.relative_to(export).as_posix() for path in export.rglob("*.md"))
+    assert files == ["2024/05/2024-05-01-may-day.md", "2024/05/2024-05-02-second.md",
+                     "undated/undated-idea.md"]
+
+    entry = frontmatter.loads((export / files[0]).read_text(encoding="utf-8"))
+    assert entry["title"] == "May Day"
+    assert entry["tags"] == ["walks", "food"]
+    assert str(entry["date"]) == "2024-05-01"
+    assert entry.content == "A *walk* by the river.\n\n- bread\n- milk"
+
+    # Nothing was edited in Notion, so the next runs write nothing
+    before = {path: path.stat().st_mtime_ns for path in export.rglob("*.md")}
+    for options in ((), ("--full",)):
+        result = run_exporter(*options)
+        assert result.returncode == 0, result.stdout + result.stderr
+        assert "Exported: 0" in result.stdout and "Unchanged: 3" in result.stdout
+    assert {path: path.stat().st_mtime_ns for path in export.rglob("*.md")} == before
+    assert server.stats.calls.get("blocks.children.list", 0) == 3
+
+
+def test_missing_settings(importer_env):
+    result = subprocess.run([sys.executable, str(EXPORTER)],
+                            env=dict(importer_env, NOTION_TOKEN=""),
+                            capture_output=True, text=True, encoding="utf-8", timeout=60)
+    assert result.returncode == 1
+    assert "Missing required environment variable: NOTION_TOKEN" in result.stdout
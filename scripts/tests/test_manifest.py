@@ -0,0 +1,69 @@
+"""The import manifest: files that haven't changed cost no requests."""
+
+import os
+
+
+def _calls(server):
+    return dict(server.stats.calls)
+
+
+def _blocks_text(page_blocks, page):
+    return ["".join(run["plain_text"] for run in block[block["type"]]["rich_text"])
+            for block in page_blocks(page["id"])]
+
+
+def test_unchanged_files_are_skipped_without_requests(journal, write_entry, run_importer,
+                                                      server):
+    paths = [write_entry(f"2024/01/{n:02d}.md", f"Entry {n}", f"Body {n}\n") for n in range(5)]
+    result = run_importer()
+    assert result.returncode == 0, result.stdout + result.stderr
+    assert (journal / ".notion-import.sqlite").exists()
+    assert "Imported: 5" in result.stdout
+
+    before = _calls(server)
+    result = run_importer()
+    assert result.returncode == 0, result.stdout + result.stderr
+    assert "Skipped: 5 (5 unchanged)" in result.stdout
+    # Only the database schema is read; no title checks or page writes
+    assert _calls(server) == dict(before, **{"databases.retrieve":
+                                             before["databases.retrieve"] + 1})
+
+    # Touched but not edited: the content hash still matches
+    stat = paths[0].stat()
+    os.utime(paths[0], ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+    result = run_importer()
+    assert "Skipped: 5 (5 unchanged)" in result.stdout
+    assert server.stats.calls.get("databases.query", 0) == before.get("databases.query", 0)
+
+
+def test_edited_file_is_matched_to_its_page(write_entry, run_importer, server, pages,
+                                            page_blocks):
+    write_entry("a.md", "A", "Before\n")
+    write_entry("b.md", "B", "Same\n")
+    assert run_importer().returncode == 0
+    queries = server.stats.calls["databases.query"]
+
+    write_entry("a.md", "A", "After\n")
+    for _ in range(2):
+        result = run_importer()
+        assert result.returncode == 0, result.stdout + result.stderr
+        assert "Skipped: 2 (1 unchanged)" in result.stdout
+    # The page ID comes from the manifest, not from a title query
+    assert server.stats.calls["databases.query"] == queries
+
+    # The skipped edit isn't recorded as imported, so --sync still sends it
+    result = run_importer("--sync")
+    assert "Updated: 1" in result.stdout
+    assert sorted(pages()) == ["A", "B"]
+    assert _blocks_text(page_blocks, pages()["A"]) == ["After"]
+
+
+def test_no_manifest_checks_every_file(write_entry, run_importer, server):
+    for n in range(3):
+        write_entry(f"{n}.md", f"Entry {n}", "Body\n")
+    assert run_importer().returncode == 0
+    queries = server.stats.calls["databases.query"]
+    result = run_importer("--no-manifest")
+    assert result.returncode == 0, result.stdout + result.stderr
+    assert "Skipped: 3\n" in result.stdout
+    assert server.stats.calls["databases.query"] == queries + 3
@@ -0,0 +1,131 @@
+"""Markdown → Notion blocks: the blocks stay within Notion's limits."""
+
+import io
+import json
+
+from journal_markdown import MAX_BLOCKS_PER_REQUEST, MAX_NESTING_DEPTH, MAX_PACKED_LENGTH, \
+    MAX_TEXT_LENGTH, content_to_notion_blocks, iter_stream_blocks, plain_text
+
+
+def _depth(blocks, level=0):
+    """Deepest level of nested children (0 for flat blocks)."""
+    deepest = level
+    for block in blocks:
+        children = block[block["type"]].get("children")
+        if children:
+            deepest = max(deepest, _depth(children, level + 1))
+    return deepest
+
+
+def _runs(blocks):
+    for block in blocks:
+        data = block[block["type"]]
+        yield from data.get("rich_text", [])
+        yield from _runs(data.get("children", []))
+
+
+def test_long_paragraph_is_split_into_runs_of_at_most_2000_characters():
+    text = "word " * 2000
+    blocks = content_to_notion_blocks(text)
+    assert all(len(run["text"]["content"]) <= MAX_TEXT_LENGTH for run in _runs(blocks))
+    assert "".join(plain_text(b["paragraph"]["rich_text"]) for b in blocks) == text.strip()
+
+
+def test_long_code_block_keeps_its_text():
+    code = "\n".join(f"print({n})" for n in range(600))
+    blocks = content_to_notion_blocks(f"```python\n{code}\n```")
+    assert {block["type"] for block in blocks} == {"code"}
+    assert all(len(run["text"]["content"]) <= MAX_TEXT_LENGTH for run in _runs(blocks))
+    assert "".join(plain_text(b["code"]["rich_text"]) for b in blocks) == code
+
+
+def test_deep_lists_are_flattened_to_the_nesting_limit():
+    items = "".join("  " * level + f"- level {level}\n" for level in range(8))
+    blocks = content_to_notion_blocks(items)
+    assert _depth(blocks) == MAX_NESTING_DEPTH
+    assert [run["text"]["content"] for run in _runs(blocks)] == \
+        [f"level {level}" for level in range(8)]
+
+
+def test_streamed_conversion_matches_whole_text():
+    content = "# Title\n\n" + "\n\n".join(f"Paragraph {n}. " * 50 for n in range(300)) + \
+        "\n\n- a\n  - b\n"
+    streamed = list(iter_stream_blocks(io.StringIO(content, newline="")))
+    assert streamed == content_to_notion_blocks(content)
+
+
+def test_entry_with_more_blocks_than_one_request_takes_is_imported_whole(
+        write_entry, run_importer, pages, page_blocks, server):
+    # The fake server, like Notion, rejects requests with over 100 children
+    body = "\n\n".join(f"Paragraph {n}" for n in range(2 * MAX_BLOCKS_PER_REQUEST + 50))
+    write_entry("long.md", "Long", body + "\n")
+    result = run_importer()
+    assert result.returncode == 0, result.stdout + result.stderr
+
+    blocks = page_blocks(pages()["Long"]["id"])
+    assert [plain_text(b["paragraph"]["rich_text"]) for b in blocks] == body.split("\n\n")
+    assert server.stats.calls["blocks.children.append"] >= 2
+
+
+def test_requests_are_split_by_size_as_well_as_count(write_entry, run_importer, pages,
+                                                     page_blocks, server):
+    # JSON escapes CJK text, so 100 blocks of it would make a 1.2 MB request,
+    # over Notion's 500 KB limit
+    body = "\n\n".join("日本語" * 666 for _ in range(MAX_BLOCKS_PER_REQUEST))
+    assert len(json.dumps(content_to_notion_blocks(body))) > 1_000_000
+    write_entry("cjk.md", "CJK", body + "\n")
+    result = run_importer()
+    assert result.returncode == 0, result.stdout + result.stderr
+    assert len(page_blocks(pages()["CJK"]["id"])) == MAX_BLOCKS_PER_REQUEST
+    assert server.stats.calls["blocks.children.append"] >= 2
+
+
+def _packed_text(blocks):
+    """The paragraphs' text, with the blank line that separates blocks in Markdown."""
+    return "\n\n".join(plain_text(block["paragraph"]["rich_text"]) for block in blocks)
+
+
+def test_pack_merges_paragraphs_within_notions_limits():
+    paragraphs = [f"Short paragraph number {n}, with a few words." for n in range(2000)]
+    content = "\n\n".join(paragraphs)
+    blocks = content_to_notion_blocks(content, pack=True)
+
+    assert len(blocks) < len(content_to_notion_blocks(content)) / 50
+    for block in blocks:
+        runs = block["paragraph"]["rich_text"]
+        assert len(runs) <= 100
+        assert all(len(run["text"]["content"]) <= MAX_TEXT_LENGTH for run in runs)
+        assert sum(len(run["text"]["content"]) for run in runs) <= MAX_PACKED_LENGTH
+    assert _packed_text(blocks) == content
+
+
+def test_pack_cuts_long_paragraphs_between_words():
+    paragraph = " ".join(f"word{n}" for n in range(12000))
+    blocks = content_to_notion_blocks(paragraph, pack=True)
+    assert len(blocks) > 1
+    runs = [run["text"]["content"] for block in blocks for run in block["paragraph"]["rich_text"]]
+    assert all(len(run) <= MAX_TEXT_LENGTH for run in runs)
+    assert all(run.endswith(" ") for run in runs[:-1])
+    assert "".join(runs) == paragraph
+
+
+def test_pack_leaves_other_blocks_alone():
+    content = "One.\n\nTwo.\n\n# Heading\n\n- item\n  - nested\n\nThree.\n\nFour."
+    packed = content_to_notion_blocks(content, pack=True)
+    assert [block["type"] for block in packed] == ["paragraph", "heading_1",
+                                                    "bulleted_list_item", "paragraph"]
+    assert packed[1:3] == content_to_notion_blocks(content)[2:4]
+    assert _packed_text([packed[0]]) == "One.\n\nTwo."
+    assert _packed_text([packed[3]]) == "Three.\n\nFour."
+
+
+def test_packed_entry_is_imported_in_one_request(write_entry, run_importer, pages,
+                                                 page_blocks, server):
+    paragraphs = [f"Paragraph {n}." for n in range(500)]
+    write_entry("packed.md", "Packed", "\n\n".join(paragraphs) + "\n")
+    result = run_importer("--pack")
+    assert result.returncode == 0, result.stdout + result.stderr
+
+    blocks = page_blocks(pages()["Packed"]["id"])
+    assert _packed_text(blocks) == "\n\n".join(paragraphs)
+    assert server.stats.calls.get("blocks.children.append", 0) == 0
@@ -0,0 +1,40 @@
+"""--resume: an interrupted import carries on where it stopped."""
+
+import signal
+import sys
+
+import pytest
+
+pytestmark = pytest.mark.skipif(sys.platform == "win32", reason="interrupts with SIGTERM")
+
+ENTRIES = 80
+
+
+def test_resume_after_sigterm(journal, write_entry, start_importer, run_importer, pages,
+                              server, wait_for):
+    for n in range(ENTRIES):
+        write_entry(f"2024/{n // 28 + 1:02d}/{n % 28 + 1:02d}.md", f"Entry {n}", f"Body {n}\n")
+    server.latency = 0.05
+    process = start_importer("--workers", "4")
+    wait_for(lambda: len(server.workspace.pages) >= 12)
+    process.send_signal(signal.SIGTERM)
+    out, err = process.communicate(timeout=60)
+    assert process.returncode == 0, out + err
+    assert "Run again with --resume" in out
+
+    created = len(server.workspace.pages)
+    assert created < ENTRIES
+    assert (journal / ".notion-import.checkpoint.jsonl").exists()
+
+    # Every page the interrupted run made is in the checkpoint and the
+    # manifest, so only the files without one are looked up again
+    server.latency = 0
+    queries = server.stats.calls["databases.query"]
+    result = run_importer("--resume", "--workers", "4")
+    assert result.returncode == 0, result.stdout + result.stderr
+    assert "Resuming after" in result.stdout
+    assert server.stats.calls["databases.query"] - queries == ENTRIES - created
+
+    assert sorted(pages()) == sorted(f"Entry {n}" for n in range(ENTRIES))
+    assert len(server.workspace.pages) == ENTRIES
+    assert not (journal / ".notion-import.checkpoint.jsonl").exists()
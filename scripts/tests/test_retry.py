@@ -0,0 +1,64 @@
+"""Rate limits are retried, and failed files are kept for --retry-failed."""
+
+import json
+
+
+def test_rate_limited_requests_are_retried(server, write_entry, run_importer, pages):
+    # Every 429 comes with "Retry-After: 1", which pauses all the workers
+    server.throttle = 0.2
+    for n in range(8):
+        write_entry(f"2024/01/{n:02d}.md", f"Entry {n}", f"Body {n}\n")
+    result = run_importer("--workers", "4")
+    assert result.returncode == 0, result.stdout + result.stderr
+
+    assert server.stats.throttled > 0
+    assert sorted(pages()) == sorted(f"Entry {n}" for n in range(8))
+    assert len(server.workspace.pages) == 8  # no page was created twice
+    assert "Failed: 0" in result.stdout
+
+
+def test_retry_failed_imports_only_the_failed_files(journal, write_entry, run_importer,
+                                                    pages, server):
+    write_entry("good.md", "Good", "Fine\n")
+    broken = write_entry("broken.md", "[unclosed", "Body\n")
+    result = run_importer()
+    assert result.returncode == 0, result.stdout + result.stderr
+    assert list(pages()) == ["Good"]
+
+    dead_letter = journal / ".notion-import-failed.jsonl"
+    failed = [json.loads(line) for line in dead_letter.read_text(encoding="utf-8").splitlines()]
+    assert [entry["path"] for entry in failed] == ["broken.md"]
+    assert failed[0]["error"]
+
+    broken.write_text("---\ntitle: Fixed\n---\nBody\n", encoding="utf-8")
+    write_entry("new.md", "Not retried", "Body\n")
+    queries = server.stats.calls.get("databases.query", 0)
+    result = run_importer("--retry-failed")
+    assert result.returncode == 0, result.stdout + result.stderr
+
+    assert sorted(pages()) == ["Fixed", "Good"]
+    assert "Retrying 1 failed file(s)" in result.stdout
+    assert server.stats.calls.get("databases.query", 0) - queries <= 1
+    assert not dead_letter.exists()
+
+
+def test_retry_failed_keeps_files_that_fail_again(journal, write_entry, run_importer, pages):
+    write_entry("broken.md", "[unclosed", "Body\n")
+    write_entry("also-broken.md", "[unclosed", "Body\n")
+    run_importer()
+    (journal / "also-broken.md").write_text("---\ntitle: Fixed\n---\n", encoding="utf-8")
+
+    result = run_importer("--retry-failed")
+    assert result.returncode == 0, result.stdout + result.stderr
+    assert list(pages()) == ["Fixed"]
+    dead_letter = journal / ".notion-import-failed.jsonl"
+    assert [json.loads(line)["path"] for line in
+            dead_letter.read_text(encoding="utf-8").splitlines()] == ["broken.md"]
+
+
+def test_retry_failed_with_nothing_to_retry(run_importer, write_entry):
+    write_entry("good.md", "Good", "Fine\n")
+    assert run_importer().returncode == 0
+    result = run_importer("--retry-failed")
+    assert result.returncode == 0, result.stdout + result.stderr
+    assert "No failed files to retry" in result.stdout
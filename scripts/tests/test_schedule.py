@@ -0,0 +1,108 @@
+"""--order: which entries are imported first."""
+
+import json
+import threading
+from pathlib import Path
+
+import pytest
+
+from journal_schedule import path_date, schedule, sort_key
+
+
+@pytest.mark.parametrize("path, date", [
+    ("2024/06/14.md", (2024, 6, 14)),
+    ("2024-06-14 Beach.md", (2024, 6, 14)),
+    ("notes/20240614.md", (2024, 6, 14)),
+    ("2024-06/notes.md", (2024, 6, 0)),
+    ("2024/notes.md", (2024, 0, 0)),
+    ("2023/2024-01-02.md", (2024, 1, 2)),  # the file's own name wins
+    ("ideas/recipes.md", None),
+    ("1234/99.md", None),
+])
+def test_path_date(path, date):
+    assert path_date(path) == date
+
+
+def test_sort_key():
+    newest = lambda path, **metadata: sort_key("newest", path, 0, metadata)
+    assert newest("2024/01/01.md") < newest("2023/12/31.md")
+    assert newest("2023/12/31.md", date="2024-02-01") < newest("2024/01/01.md")
+    assert newest("2000/01/01.md") < newest("undated.md")
+    assert newest("undated.md", priority=1) < newest("2024/01/01.md")
+    assert sort_key("smallest", "a.md", 10, {}) < sort_key("smallest", "b.md", 20, {})
+    assert sort_key("priority", "a.md", 0, {"priority": "high"}) == \
+        sort_key("priority", "b.md", 0, {})
+
+
+def test_schedule_orders_items_that_tie_by_arrival():
+    assert list(schedule([3, 1, 2, 1], key=lambda n: n)) == [1, 1, 2, 3]
+    assert list(schedule(["b1", "a", "b2"], key=len)) == ["a", "b1", "b2"]
+
+
+def test_schedule_starts_before_the_items_are_all_read():
+    more = threading.Event()
+
+    def items():
+        yield from (2, 1)
+        assert more.wait(10), "schedule() waited for all the items"
+        yield 0
+
+    # The first item is the best of the first `lookahead` read
+    found = schedule(items(), key=lambda n: n, lookahead=2)
+    assert next(found) == 1
+    more.set()
+    assert list(found) == [0, 2]
+
+
+def test_schedule_raises_after_handing_out_what_it_read():
+    def items():
+        yield 1
+        raise OSError("folder gone")
+
+    found = schedule(items(), key=lambda n: n)
+    assert next(found) == 1
+    with pytest.raises(OSError, match="folder gone"):
+        next(found)
+
+
+def _imported(events, journal):
+    """(path in the journal, unchanged) of each file the events list, in import order."""
+    files = [json.loads(line) for line in events.read_text(encoding="utf-8").splitlines()]
+    files = sorted((event for event in files if event["event"] == "file"),
+                   key=lambda event: event["index"])
+    return [(Path(event["path"]).relative_to(journal).as_posix(), event["unchanged"])
+            for event in files]
+
+
+def test_newest_first(journal, write_entry, run_importer, tmp_path):
+    write_entry("2023/12/31.md", "Old year")
+    write_entry("2024/01/01.md", "New year")
+    write_entry("2024/01/02.md", "Backdated", date="2022-05-05")
+    write_entry("ideas.md", "Undated")
+    write_entry("2020/01/01.md", "Pinned", priority=5)
+    events = tmp_path / "events.jsonl"
+    result = run_importer("--order", "newest", "--workers", "2", "--events", str(events))
+    assert result.returncode == 0, result.stdout + result.stderr
+    assert "Importing the newest entries first" in result.stdout
+    assert [path for path, _ in _imported(events, journal)] == \
+        ["2020/01/01.md", "2024/01/01.md", "2023/12/31.md", "2024/01/02.md", "ideas.md"]
+
+
+def test_smallest_first_and_unchanged_files(journal, write_entry, run_importer, tmp_path,
+                                            server):
+    write_entry("long.md", "Long", "Words " * 500 + "\n")
+    write_entry("short.md", "Short", "Hi\n")
+    write_entry("middle.md", "Middle", "Some words " * 20 + "\n")
+    events = tmp_path / "events.jsonl"
+    assert run_importer("--order", "smallest", "--events", str(events)).returncode == 0
+    assert [path for path, _ in _imported(events, journal)] == \
+        ["short.md", "middle.md", "long.md"]
+
+    # Unchanged files are handed on first, without being read or sent again
+    write_entry("middle.md", "Middle", "Edited\n")
+    created = server.stats.calls["pages.create"]
+    assert run_importer("--order", "smallest", "--events", str(events)).returncode == 0
+    imported = _imported(events, journal)
+    assert sorted(imported[:2]) == [("long.md", True), ("short.md", True)]
+    assert imported[2] == ("middle.md", False)
+    assert server.stats.calls["pages.create"] == created
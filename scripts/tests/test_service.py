@@ -0,0 +1,92 @@
+"""--serve and JournalImporter: imports on request from one warm process."""
+
+import json
+
+import pytest
+
+from journal_service import JournalImporter
+
+
+def _ask(process, request):
+    process.stdin.write(json.dumps(request) + "\n")
+    process.stdin.flush()
+    return json.loads(process.stdout.readline())
+
+
+def test_serve_answers_each_request(journal, write_entry, start_importer, pages, server):
+    first = write_entry("2024/01/first.md", "First", "Body\n")
+    second = write_entry("2024/01/second.md", "Second", "Body\n")
+    process = start_importer("--serve", "--sync")
+
+    assert _ask(process, {"id": 1, "op": "ping"}) == {"id": 1, "ok": True}
+
+    answer = _ask(process, {"id": 2, "path": str(first)})
+    assert answer["ok"] and answer["totals"] == {"imported": 1}
+    [result] = answer["results"]
+    assert result["status"] == "imported" and result["title"] == "First"
+    assert result["page_id"] == pages()["First"]["id"]
+
+    missing = journal / "2024/01/missing.md"
+    answer = _ask(process, {"id": 3, "paths": [str(second), str(missing)]})
+    assert [r["status"] for r in answer["results"]] == ["imported", "failed"]
+    assert answer["results"][1]["error"] == "File not found"
+
+    # The database was loaded once, for the first import
+    assert server.stats.calls["databases.retrieve"] == 1
+
+    first.write_text("---\ntitle: First\n---\nEdited\n", encoding="utf-8")
+    answer = _ask(process, {"id": 4, "paths": [str(first)]})
+    assert [r["status"] for r in answer["results"]] == ["updated"]
+
+    assert _ask(process, {"id": 5, "op": "shutdown"}) == {"id": 5, "ok": True}
+    out, err = process.communicate(timeout=30)
+    assert process.returncode == 0, err
+    assert out == ""  # progress goes to stderr, only answers to stdout
+    assert "Stopped serving" in err
+    assert sorted(pages()) == ["First", "Second"]
+
+
+@pytest.mark.parametrize("line, error", [
+    ("not json", "Expecting value"),
+    ('["a list"]', "a request must be a JSON object"),
+    ('{"id": 1, "op": "nope"}', "unknown op: nope"),
+    ('{"id": 1, "paths": "a.md"}', '"paths" must be a list of file paths'),
+])
+def test_serve_rejects_bad_requests_and_keeps_going(line, error, start_importer):
+    process = start_importer("--serve")
+    process.stdin.write(line + "\n")
+    process.stdin.flush()
+    answer = json.loads(process.stdout.readline())
+    assert answer["ok"] is False and error in answer["error"]
+    assert _ask(process, {"id": 2, "op": "ping"}) == {"id": 2, "ok": True}
+    process.stdin.close()  # the end of the input stops the worker too
+    process.wait(timeout=30)
+    assert process.returncode == 0
+
+
+def test_serve_cant_be_combined_with_watch(run_importer):
+    result = run_importer("--serve", "--watch")
+    assert result.returncode != 0
+    assert "--serve can't be combined" in result.stderr
+
+
+def test_journal_importer_from_python(journal, write_entry, server, pages, importer_env,
+                                      monkeypatch):
+    for name in ("JOURNAL_MANIFEST_PATH", "JOURNAL_DEAD_LETTER_PATH",
+                 "JOURNAL_CHECKPOINT_PATH", "JOURNAL_CACHE_PATH"):
+        monkeypatch.setenv(name, importer_env[name])
+    database_id = importer_env["NOTION_JOURNAL_DB_ID"]
+    entry = write_entry("a.md", "A", "Body\n")
+    with JournalImporter(["--quiet"], token="secret_fake", database_id=database_id,
+                         root_path=str(journal), base_url=server.url) as importer:
+        result = importer.import_file(str(entry))
+        again = importer.import_file(str(entry))
+    assert result["status"] == "imported"
+    assert result["page_id"] == pages()["A"]["id"]
+    assert again["status"] == "skipped" and again["unchanged"]
+    assert again["page_id"] == result["page_id"]
+
+    with pytest.raises(ValueError, match="only for the command line"):
+        JournalImporter(["--watch"], token="secret_fake", database_id=database_id)
+    with pytest.raises(ValueError, match="Invalid importer options"):
+        JournalImporter(["--no-such-option"], token="secret_fake", database_id=database_id)
@@ -0,0 +1,87 @@
+"""--sync: pages are updated in place by diffing their blocks."""
+
+import pytest
+
+from journal_markdown import content_to_notion_blocks
+from journal_sync import block_signature, plan_block_changes
+
+PARAGRAPHS = ["First paragraph.", "Second paragraph.", "Third paragraph."]
+
+
+def _stored(texts):
+    """Paragraph blocks as the API returns them, with IDs b0, b1, ..."""
+    blocks = content_to_notion_blocks("\n\n".join(texts))
+    for n, block in enumerate(blocks):
+        block.update(id=f"b{n}", has_children=False)
+    return blocks
+
+
+def test_unchanged_page_needs_no_operations():
+    assert plan_block_changes(_stored(PARAGRAPHS),
+                              content_to_notion_blocks("\n\n".join(PARAGRAPHS))) == []
+
+
+def test_edited_paragraph_is_updated_in_place():
+    new = content_to_notion_blocks("First paragraph.\n\nSecond, edited.\n\nThird paragraph.")
+    operations = plan_block_changes(_stored(PARAGRAPHS), new)
+    assert [(op, target) for op, target, _ in operations] == [("update", "b1")]
+
+
+def test_insert_at_start_rewrites_the_first_block():
+    # Notion can't insert before the first block, so it becomes an update
+    # followed by a copy of the old first block
+    new = content_to_notion_blocks("New start.\n\n" + "\n\n".join(PARAGRAPHS))
+    operations = plan_block_changes(_stored(PARAGRAPHS), new)
+    assert [(op, target) for op, target, _ in operations] == [("update", "b0"),
+                                                              ("insert", "b0")]
+    assert [block_signature(b) for b in operations[1][2]] == \
+        [block_signature(new[1])]
+
+
+EDITS = {
+    "edit": PARAGRAPHS[:1] + ["Second, edited."] + PARAGRAPHS[2:],
+    "insert at start": ["# A heading"] + PARAGRAPHS,
+    "insert in middle": PARAGRAPHS[:2] + ["- a list item", "- another"] + PARAGRAPHS[2:],
+    "append": PARAGRAPHS + ["```python\nprint('hi')\n```"],
+    "delete": PARAGRAPHS[1:],
+    "replace type": ["> A quote now."] + PARAGRAPHS[1:],
+    "nested list": PARAGRAPHS + ["- parent\n  - child\n    - grandchild"],
+    "empty": [],
+}
+
+
+@pytest.mark.parametrize("edit", sorted(EDITS))
+def test_sync_brings_page_in_line_with_file(edit, write_entry, run_importer, pages,
+                                            page_blocks, server):
+    entry = write_entry("2024/05/01.md", "Synced", "\n\n".join(PARAGRAPHS) + "\n")
+    assert run_importer().returncode == 0
+    page = pages()["Synced"]
+    kept = {block["id"] for block in page_blocks(page["id"])}
+
+    body = "\n\n".join(EDITS[edit]) + "\n"
+    entry.write_text("---\ntitle: Synced\n---\n" + body, encoding="utf-8")
+    created = server.stats.calls.get("pages.create", 0)
+    result = run_importer("--sync")
+    assert result.returncode == 0, result.stdout + result.stderr
+
+    assert list(pages()) == ["Synced"]
+    assert pages()["Synced"]["id"] == page["id"]
+    assert server.stats.calls.get("pages.create", 0) == created
+    after = page_blocks(page["id"])
+    assert [block_signature(b) for b in after] == \
+        [block_signature(b) for b in content_to_notion_blocks(body)]
+    if edit == "edit":
+        # Only the edited block was touched
+        assert {block["id"] for block in after} == kept
+
+
+def test_sync_clears_deleted_tags_and_date(write_entry, run_importer, pages):
+    entry = write_entry("a.md", "Tagged", "Body\n", tags="work, travel", date="2024-05-01")
+    assert run_importer().returncode == 0
+    assert pages()["Tagged"]["properties"]["Date"]["date"]["start"] == "2024-05-01"
+
+    entry.write_text("---\ntitle: Tagged\n---\nBody\n", encoding="utf-8")
+    assert run_importer("--sync").returncode == 0
+    properties = pages()["Tagged"]["properties"]
+    assert properties["Tags"]["multi_select"] == []
+    assert properties["Date"]["date"] is None
@@ -0,0 +1,72 @@
+"""Tags: one option per tag, however it is spelt, created in one schema update."""
+
+import pytest
+
+from journal_tags import TagRegistry, normalize_tag, tag_key
+
+
+@pytest.mark.parametrize("tag, normalized", [
+    ("a", "a"),
+    ("A ", "A"),
+    ("  two   words\t", "two words"),
+    ("one, two", "one two"),
+    ("café", "café"),  # NFC
+    (2024, "2024"),
+])
+def test_normalize_tag(tag, normalized):
+    assert normalize_tag(tag) == normalized
+
+
+def test_spellings_collapse_into_one_tag():
+    registry = TagRegistry()
+    assert tag_key("Travel ") == tag_key("travel")
+    assert registry.canonical_tags(["a", "A ", "a", "", "b"]) == ["a", "b"]
+    assert registry.canonical("A") == "a"  # the first spelling seen wins
+
+    registry.load_schema({"properties": {"Tags": {"type": "multi_select", "multi_select": {
+        "options": [{"id": "1", "name": "Travel", "color": "blue"}]}}}})
+    assert registry.canonical("travel  ") == "Travel"  # and the database's over it
+    assert registry.missing(["TRAVEL", "new", "New "]) == ["new"]
+    assert registry.schema_update(["new"]) == {"Tags": {"multi_select": {"options": [
+        {"id": "1", "name": "Travel", "color": "blue"}, {"name": "new"}]}}}
+
+
+def _entry(write_entry, path, title, tags):
+    quoted = ", ".join(f'"{tag}"' for tag in tags)  # keeps "A " as written
+    return write_entry(path, title, "Body\n", tags=f"[{quoted}]")
+
+
+def _tags(page):
+    return [option["name"] for option in page["properties"]["Tags"]["multi_select"]]
+
+
+def test_create_tags_makes_one_schema_update(write_entry, run_importer, pages, server,
+                                             importer_env):
+    database = server.workspace.retrieve_database(importer_env["NOTION_JOURNAL_DB_ID"])
+    schema = database["properties"]  # the server's own copy, updated in place
+    schema["Tags"]["multi_select"]["options"].append(
+        {"id": "existing", "name": "Travel", "color": "blue"})
+    _entry(write_entry, "1.md", "One", ["a"])
+    _entry(write_entry, "2.md", "Two", ["A ", "travel"])
+    _entry(write_entry, "3.md", "Three", ["a", "b", "TRAVEL"])
+
+    result = run_importer("--create-tags", "--workers", "3")
+    assert result.returncode == 0, result.stdout + result.stderr
+    assert "Added 2 tag option(s), 3 in total" in result.stdout
+    assert server.stats.calls["databases.update"] == 1
+
+    options = schema["Tags"]["multi_select"]["options"]
+    assert sorted(option["name"] for option in options) == ["Travel", "a", "b"]
+    assert next(option for option in options if option["name"] == "Travel") == \
+        {"id": "existing", "name": "Travel", "color": "blue"}
+    found = pages()
+    assert _tags(found["One"]) == ["a"]
+    assert _tags(found["Two"]) == ["a", "Travel"]
+    assert _tags(found["Three"]) == ["a", "b", "Travel"]
+
+    # Nothing new to add: no schema update
+    _entry(write_entry, "4.md", "Four", ["B"])
+    result = run_importer("--create-tags")
+    assert "Added 0 tag option(s)" in result.stdout
+    assert server.stats.calls["databases.update"] == 1
+    assert _tags(pages()["Four"]) == ["b"]
@@ -0,0 +1,82 @@
+"""Local images and files are uploaded once, and only from inside the journal."""
+
+
+def _media(page_blocks, page):
+    return [block for block in page_blocks(page["id"]) if block["type"] in ("image", "file")]
+
+
+def _texts(page_blocks, page):
+    return ["".join(run["plain_text"] for run in block[block["type"]].get("rich_text", []))
+            for block in page_blocks(page["id"])]
+
+
+def test_shared_photo_is_uploaded_once(journal, write_entry, run_importer, pages,
+                                       page_blocks, server):
+    photo = b"\x89PNG fake image data" * 100
+    (journal / "photos").mkdir()
+    (journal / "photos" / "beach.png").write_bytes(photo)
+    (journal / "2024").mkdir()
+    (journal / "2024" / "beach.png").write_bytes(photo)  # a copy, same name
+    write_entry("one.md", "One", "![Beach](photos/beach.png)\n")
+    write_entry("two.md", "Two", "Again:\n\n![Beach again](photos/beach.png)\n")
+    write_entry("2024/three.md", "Three", "![](beach.png)\n")
+
+    result = run_importer("--workers", "3")
+    assert result.returncode == 0, result.stdout + result.stderr
+
+    assert len(server.workspace.file_uploads) == 1
+    upload = next(iter(server.workspace.file_uploads.values()))
+    for title in ("One", "Two", "Three"):
+        [image] = _media(page_blocks, pages()[title])
+        assert image["type"] == "image"
+        assert image["image"]["type"] == "file"
+        assert upload["id"] in image["image"]["file"]["url"]
+
+
+def test_later_runs_reuse_uploads_from_the_manifest(journal, write_entry, run_importer,
+                                                    server):
+    (journal / "scan.pdf").write_bytes(b"%PDF-1.4 receipt")
+    write_entry("one.md", "One", "[Receipt](scan.pdf)\n")
+    assert run_importer().returncode == 0
+    created = server.stats.calls["file_uploads.create"]
+
+    write_entry("two.md", "Two", "[Same receipt](scan.pdf)\n")
+    result = run_importer()
+    assert result.returncode == 0, result.stdout + result.stderr
+    assert server.stats.calls["file_uploads.create"] == created
+
+
+def test_same_name_different_content_is_uploaded_twice(journal, write_entry, run_importer,
+                                                       server):
+    for folder, data in (("a", b"first photo"), ("b", b"second photo")):
+        (journal / folder).mkdir()
+        (journal / folder / "photo.jpg").write_bytes(data)
+        write_entry(f"{folder}/entry.md", folder.upper(), "![](photo.jpg)\n")
+    assert run_importer().returncode == 0
+    assert len(server.workspace.file_uploads) == 2
+
+
+def test_files_outside_the_journal_stay_text(journal, tmp_path, write_entry, run_importer,
+                                             pages, page_blocks, server):
+    secret = tmp_path / "secret.png"
+    secret.write_bytes(b"not for Notion")
+    write_entry("entry.md", "Entry",
+                f"![](../secret.png)\n\n![]({secret})\n\n![](missing.png)\n")
+    result = run_importer()
+    assert result.returncode == 0, result.stdout + result.stderr
+
+    assert server.workspace.file_uploads == {}
+    page = pages()["Entry"]
+    assert _media(page_blocks, page) == []
+    assert _texts(page_blocks, page) == ["![](../secret.png)", f"![]({secret})",
+                                         "![](missing.png)"]
+    assert "outside the journal" in result.stdout
+
+
+def test_no_uploads_keeps_references_as_text(journal, write_entry, run_importer, pages,
+                                             page_blocks, server):
+    (journal / "photo.png").write_bytes(b"image")
+    write_entry("entry.md", "Entry", "![A photo](photo.png)\n")
+    assert run_importer("--no-uploads").returncode == 0
+    assert server.workspace.file_uploads == {}
+    assert _texts(page_blocks, pages()["Entry"]) == ["![A photo](photo.png)"]
@@ -0,0 +1,74 @@
+"""--watch: entries are imported as they are saved."""
+
+import json
+import signal
+import sys
+
+import pytest
+
+pytestmark = pytest.mark.skipif(sys.platform == "win32", reason="stops the watcher with SIGTERM")
+
+
+def _wait_until_watching(process):
+    for line in process.stdout:
+        if "Watching" in line:
+            return
+    pytest.fail("the importer exited before watching: " + process.stderr.read())
+
+
+def _text(page_blocks, page):
+    return ["".join(run["plain_text"] for run in block[block["type"]]["rich_text"])
+            for block in page_blocks(page["id"])]
+
+
+def test_watch_imports_new_and_edited_entries(journal, write_entry, start_importer, pages,
+                                              page_blocks, wait_for, tmp_path):
+    write_entry("2024/01/first.md", "First", "Before\n")
+    events = tmp_path / "events.jsonl"
+    process = start_importer("--watch", "--quiet", "--debounce", "0.2",
+                             "--events", str(events))
+    _wait_until_watching(process)
+    assert list(pages()) == ["First"]  # the run before watching
+
+    write_entry("2024/01/second.md", "Second", "New entry\n")
+    write_entry("2024/02/third.md", "Third", "In a new folder\n")
+    for n in range(3):
+        write_entry("2024/01/first.md", "First", f"Edit {n}\n")
+    write_entry("2024/01/.hidden.md", "Hidden", "Not imported\n")
+
+    def imported():
+        found = pages()
+        return {"Second", "Third"} <= set(found) and \
+            _text(page_blocks, found["First"]) == ["Edit 2"]
+    wait_for(imported)
+
+    process.send_signal(signal.SIGTERM)
+    out, err = process.communicate(timeout=30)
+    assert process.returncode == 0, out + err
+    assert "Stopped watching" in out
+    assert sorted(pages()) == ["First", "Second", "Third"]
+
+    files = [json.loads(line) for line in events.read_text(encoding="utf-8").splitlines()]
+    assert files[0]["event"] == "start" and files[-1]["event"] == "end"
+    assert files[-1]["interrupted"] is True  # watching only ever stops that way
+    statuses = {(event["path"].rsplit("/", 1)[-1], event["status"])
+                for event in files if event["event"] == "file" and not event["unchanged"]}
+    assert ("first.md", "updated") in statuses
+    assert ("second.md", "imported") in statuses
+    assert not any(name == ".hidden.md" for name, _ in statuses)
+
+
+def test_watch_edits_update_the_same_page(write_entry, start_importer, pages, page_blocks,
+                                          wait_for, server):
+    write_entry("a.md", "A", "One\n\nTwo\n")
+    process = start_importer("--watch", "--quiet", "--debounce", "0.2")
+    _wait_until_watching(process)
+    page = pages()["A"]
+
+    write_entry("a.md", "A", "One\n\nTwo, edited\n")
+    wait_for(lambda: _text(page_blocks, pages()["A"]) == ["One", "Two, edited"])
+    process.send_signal(signal.SIGTERM)
+    process.communicate(timeout=30)
+
+    assert pages()["A"]["id"] == page["id"]
+    assert server.stats.calls["pages.create"] == 1
@@ -0,0 +1,60 @@
+"""--workers: a concurrent import ends the way a sequential one does."""
+
+import json
+
+import pytest
+
+FILLERS = 24
+
+
+def _blocks_text(page_blocks, page):
+    return ["".join(run["plain_text"] for run in block[block["type"]]["rich_text"])
+            for block in page_blocks(page["id"])]
+
+
+@pytest.mark.parametrize("workers", [1, 2, 4, 8])
+def test_workers_match_a_sequential_run(workers, journal, write_entry, run_importer, pages,
+                                        page_blocks, server, importer_env, tmp_path):
+    server.workspace.create_page({
+        "parent": {"database_id": importer_env["NOTION_JOURNAL_DB_ID"]},
+        "properties": {"Name": {"title": [{"type": "text", "text": {"content": "Existing"}}]}},
+    })
+    expected = {
+        "2024/01/01.md": "imported",
+        "2024/01/02.md": "imported",  # the first file with this title gets the page
+        "2024/01/03.md": "skipped",
+        "2024/01/04.md": "failed",
+        "2024/01/05.md": "skipped",   # already in Notion
+        "2024/12/31.md": "skipped",
+    }
+    write_entry("2024/01/01.md", "Monday", "Start of the week\n")
+    write_entry("2024/01/02.md", "Same", "First\n")
+    write_entry("2024/01/03.md", "Same", "Second\n")
+    write_entry("2024/01/04.md", "[unclosed", "Broken\n")
+    write_entry("2024/01/05.md", "Existing", "Already there\n")
+    for n in range(FILLERS):
+        path = f"2024/{n // 10 + 2:02d}/{n % 10 + 1:02d}.md"
+        write_entry(path, f"Filler {n}", f"Paragraph {n}\n\n- item {n}\n")
+        expected[path] = "imported"
+    write_entry("2024/12/31.md", "Same", "Third\n")
+    server.jitter = 0.02  # so that requests finish out of order
+
+    events = tmp_path / "events.jsonl"
+    result = run_importer("--workers", str(workers), "--events", str(events))
+    assert result.returncode == 0, result.stdout + result.stderr
+
+    lines = [json.loads(line) for line in events.read_text(encoding="utf-8").splitlines()]
+    files = [event for event in lines if event["event"] == "file"]
+    # Finished in path order, numbered as they were found
+    assert [event["index"] for event in files] == list(range(1, len(expected) + 1))
+    assert {event["path"][len(str(journal)) + 1:]: event["status"] for event in files} \
+        == expected
+
+    imported = sum(status == "imported" for status in expected.values())
+    end = lines[-1]
+    assert (end["imported"], end["skipped"], end["failed"], end["total"]) == \
+        (imported, 3, 1, len(expected))
+    assert server.stats.calls["pages.create"] == imported
+    assert sorted(pages()) == sorted(["Existing", "Monday", "Same"]
+                                     + [f"Filler {n}" for n in range(FILLERS)])
+    assert _blocks_text(page_blocks, pages()["Same"]) == ["First"]
@@ -7,13 +7,25 @@ Run this before attempting to import your journal entries.
 
 Usage:
     python3 scripts/validate-journal-setup.py
+    python3 scripts/validate-journal-setup.py --deep
+    python3 scripts/validate-journal-setup.py --deep --processes 16
 """
 
 import os
 import sys
-from pathlib import Path
+import time
+import argparse
+import multiprocessing
+from collections import Counter, defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice, repeat
 from dotenv import load_dotenv
 
+# Standard library only, so they load even when the checks below fail;
+# journal_checks needs python-frontmatter and is imported for --deep
+from journal_files import iter_markdown_files
+from journal_tags import TagRegistry
+
 # Load environment variables
 load_dotenv()
 
@@ -25,12 +37,219 @@ def print_header(text):
 def check_mark(passed):
     return "✅" if passed else "❌"
 
-def main():
+# ─────────────────────────────────────────────────────────────
+# Deep Checks (--deep)
+# ─────────────────────────────────────────────────────────────
+
+# Files sent to a worker process at a time
+CHECK_CHUNK_SIZE = 64
+
+# Examples listed per kind of problem
+MAX_LISTED = 5
+
+# Same default as the importer's JOURNAL_STREAM_THRESHOLD_MB
+STREAM_THRESHOLD = int(float(os.getenv("JOURNAL_STREAM_THRESHOLD_MB", "8")) * 1024 * 1024)
+
+# Properties the importer writes, other than the title ("Name")
+IMPORTED_PROPERTIES = {
+    "Tags": "multi_select",
+    "Date": "date",
+    "Content Hash": "rich_text",
+    "Source Path": "rich_text",
+}
+
+PROBLEM_HEADLINES = {
+    "parse": "{n} file(s) can't be parsed",
+    "title": "{n} file(s) have a title that isn't text",
+    "run": "{n} file(s) would send text runs Notion rejects",
+    "date": "{n} file(s) have a date that isn't recognised",
+    "tags": "{n} file(s) have tags that are ignored",
+    "blocks": "{n} file(s) are over 100 blocks and take several requests",
+    "long_line": "{n} file(s) have lines over 2000 characters",
+    "missing_file": "{n} file(s) refer to files that are missing or outside the journal",
+}
+
+
+def _chunks(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _process_pool(processes):
+    # Same start method as the importer's --parse-processes pool
+    methods = multiprocessing.get_all_start_methods()
+    context = multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+    return ProcessPoolExecutor(max_workers=processes, mp_context=context)
+
+
+def print_examples(items):
+    for path, message in items[:MAX_LISTED]:
+        print(f"       - {path}: {message}")
+    if len(items) > MAX_LISTED:
+        print(f"       ... and {len(items) - MAX_LISTED} more")
+
+
+def check_entries_deeply(journal_path, processes, database=None):
+    """
+    Parse and convert every entry in worker processes, with the importer's
+    own functions, and report what the import would trip on.
+
+    Args:
+        journal_path: Journal root folder
+        processes: Number of worker processes
+        database: databases.retrieve response, to check the entries
+            against the live schema (None to skip that)
+
+    Returns:
+        False if some files would fail to import
+    """
+    from journal_checks import ERRORS, check_entries
+
+    passed = True
+    started = time.monotonic()
+    problems = defaultdict(list)   # kind → [(path, message)]
+    titles = defaultdict(list)     # title → paths
+    copies = defaultdict(list)     # content hash → paths
+    fields = Counter()
+    tags = []
+    tagged = dated = total = 0
+
+    paths = (found.path for found in iter_markdown_files(journal_path))
+    with _process_pool(processes) as pool:
+        chunks = _chunks(paths, CHECK_CHUNK_SIZE)
+        for results in pool.map(check_entries, chunks, repeat(STREAM_THRESHOLD),
+                                repeat(journal_path)):
+            for entry in results:
+                total += 1
+                path = os.path.relpath(entry['path'], journal_path)
+                for kind, message in entry['problems']:
+                    problems[kind].append((path, message))
+                if entry['title'] is None:
+                    continue
+                titles[entry['title']].append(path)
+                copies[entry['content_hash']].append(path)
+                fields.update(entry['fields'])
+                tags.extend(entry['tags'])
+                tagged += bool(entry['tags'])
+                dated += entry['has_date']
+    elapsed = time.monotonic() - started
+
+    if not total:
+        print(f"  ⚠️  No Markdown files to check")
+        return True
+    print(f"  ✅ Parsed and converted {total} file(s) in {elapsed:.1f}s "
+          f"({processes} process(es), {total / max(elapsed, 1e-9):.0f} files/s)")
+
+    for kind, headline in PROBLEM_HEADLINES.items():
+        found = problems.get(kind)
+        if not found:
+            continue
+        if kind in ERRORS:
+            print(f"  ❌ {headline.format(n=len(found))}")
+            passed = False
+        else:
+            print(f"  ⚠️  {headline.format(n=len(found))}")
+        print_examples(found)
+
+    duplicates = {title: found for title, found in titles.items() if len(found) > 1}
+    if duplicates:
+        print(f"  ⚠️  {len(duplicates)} title(s) are used by more than one file "
+              f"(each file gets its own page, unless you import with --dedupe title)")
+        print_examples([(", ".join(found[:3]) + (" ..." if len(found) > 3 else ""), repr(title))
+                        for title, found in duplicates.items()])
+    identical = [found for found in copies.values() if len(found) > 1]
+    if identical:
+        print(f"  ⚠️  {sum(len(found) - 1 for found in identical)} file(s) are copies "
+              f"of another file and will be skipped")
+        print_examples([(", ".join(found[1:]), f"same content as {found[0]}")
+                        for found in identical])
+
+    if database is not None:
+        passed = check_schema(database, fields, tags, tagged, dated) and passed
+    return passed
+
+
+def check_schema(database, fields, tags, tagged, dated):
+    """
+    Compare what the entries use with the database's properties.
+
+    Returns:
+        False if the import would be rejected for some entries
+    """
+    passed = True
+    properties = database.get('properties', {})
+    title_name = next((name for name, prop in properties.items()
+                       if prop.get('type') == 'title'), None)
+    if title_name is not None and title_name != "Name":
+        print(f"  ❌ The title property is called \"{title_name}\", "
+              f"but the importer writes to \"Name\"")
+        passed = False
+
+    used = {"Tags": tagged, "Date": dated}
+    for name, expected in IMPORTED_PROPERTIES.items():
+        prop = properties.get(name)
+        if prop is None:
+            if name in used and used[name]:
+                print(f"  ❌ {used[name]} file(s) have {name.lower()}, "
+                      f"but the database has no \"{name}\" property")
+                passed = False
+            elif name not in used:
+                print(f"  ℹ️  \"{name}\" will be added to the database by the first import with --dedupe hash")
+        elif prop.get('type') != expected:
+            print(f"  ❌ \"{name}\" is a {prop.get('type')} property, "
+                  f"the importer needs {expected.replace('_', '-')}")
+            passed = False
+
+    if tags and properties.get("Tags", {}).get('type') == "multi_select":
+        registry = TagRegistry("Tags")
+        registry.load_schema(database)
+        missing = registry.missing(tags)
+        if missing:
+            print(f"  ℹ️  {len(missing)} tag(s) have no option yet: "
+                  f"{', '.join(missing[:MAX_LISTED])}{' ...' if len(missing) > MAX_LISTED else ''}")
+            print(f"     Notion adds them during the import, or use --create-tags")
+
+    ignored = [(name, count) for name, count in fields.most_common()
+               if name not in ("title", "tags", "date")]
+    if ignored:
+        print(f"  ℹ️  Frontmatter fields the importer doesn't send: "
+              + ", ".join(f"{name} ({count})" for name, count in ignored[:10]))
+    if passed:
+        print(f"  ✅ The entries match the database properties")
+    return passed
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Check that the journal import is set up correctly."
+    )
+    parser.add_argument(
+        "--deep", action="store_true",
+        help="also parse and convert every entry, and check them against "
+             "the database properties"
+    )
+    parser.add_argument(
+        "--processes", type=int, default=os.cpu_count() or 1, metavar="N",
+        help="worker processes for --deep (default: one per CPU, %(default)s here)"
+    )
+    args = parser.parse_args(argv)
+    if args.processes < 1:
+        parser.error("--processes must be at least 1")
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
     print("╔════════════════════════════════════════════════════════╗")
     print("║     🔍 Journal Import Setup Validator 🔍              ║")
     print("╚════════════════════════════════════════════════════════╝")
     
     all_checks_passed = True
+    missing_packages = []
     
     # ─────────────────────────────────────────────────────────────
     # Check 1: Python Dependencies
@@ -50,6 +269,7 @@ def main():
         except ImportError:
             print(f"  ❌ {package_name} is NOT installed")
             print(f"     Install with: pip3 install {package_name}")
+            missing_packages.append(package_name)
             all_checks_passed = False
     
     # ─────────────────────────────────────────────────────────────
@@ -94,15 +314,20 @@ def main():
     if os.path.exists(journal_path):
         print(f"  ✅ Journal directory exists: {journal_path}")
         
-        # Count markdown files
-        md_files = list(Path(journal_path).rglob("*.md"))
-        if md_files:
-            print(f"  ✅ Found {len(md_files)} Markdown file(s)")
+        # Count markdown files (same search as the importer)
+        md_count = 0
+        samples = []
+        for found in iter_markdown_files(journal_path):
+            md_count += 1
+            if len(samples) < 3:
+                samples.append(found.path)
+        if md_count:
+            print(f"  ✅ Found {md_count} Markdown file(s)")
             print(f"     Sample files:")
-            for f in md_files[:3]:
+            for f in samples:
                 print(f"       - {f.name}")
-            if len(md_files) > 3:
-                print(f"       ... and {len(md_files) - 3} more")
+            if md_count > 3:
+                print(f"       ... and {md_count - 3} more")
         else:
             print(f"  ⚠️  No Markdown files found in {journal_path}")
             print(f"     Make sure your journal entries have .md extension")
@@ -114,13 +339,15 @@ def main():
     # ─────────────────────────────────────────────────────────────
     # Check 4: Notion Connection (if dependencies are installed)
     # ─────────────────────────────────────────────────────────────
+    database = None
     if notion_token and notion_db_id:
         print_header("4. Notion Connection")
         
         try:
             from notion_client import Client
             
-            notion = Client(auth=notion_token)
+            notion = Client(auth=notion_token,
+                            base_url=os.getenv("NOTION_BASE_URL", "https://api.notion.com"))
             
             # Try to retrieve the database
             try:
@@ -154,6 +381,19 @@ def main():
         except ImportError:
             print(f"  ⏭️  Skipping Notion connection test (notion-client not installed)")
     
+    # ─────────────────────────────────────────────────────────────
+    # Check 5: Journal Entries (--deep)
+    # ─────────────────────────────────────────────────────────────
+    if args.deep and os.path.exists(journal_path):
+        print_header("5. Journal Entries")
+        if "python-frontmatter" in missing_packages:
+            print(f"  ⏭️  Skipping the entry checks (python-frontmatter not installed)")
+        elif not check_entries_deeply(journal_path, args.processes, database):
+            all_checks_passed = False
+    elif os.path.exists(journal_path):
+        print(f"\n  ℹ️  Run with --deep to also parse every entry and check it "
+              f"against the database")
+    
     # ─────────────────────────────────────────────────────────────
     # Final Summary
     # ─────────────────────────────────────────────────────────────